@@ -0,0 +1,51 @@
+"""add collection_seconds
+
+Revision ID: 397b97291507
+Revises: 73346047ee31
+Create Date: 2026-10-19 10:12:41.302114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '397b97291507'
+down_revision = '73346047ee31'
+branch_labels = None
+depends_on = None
+
+BACKFILL = {
+    'sqlite': (
+        'UPDATE charityproject SET collection_seconds = CAST(ROUND('
+        '(julianday(close_date) - julianday(create_date)) * 86400'
+        ') AS INTEGER) WHERE close_date IS NOT NULL'
+    ),
+    'postgresql': (
+        'UPDATE charityproject SET collection_seconds = CAST('
+        'EXTRACT(EPOCH FROM close_date - create_date) AS INTEGER'
+        ') WHERE close_date IS NOT NULL'
+    ),
+}
+
+
+def upgrade():
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('collection_seconds', sa.Integer(), nullable=True)
+        )
+    op.execute(BACKFILL[op.get_bind().dialect.name])
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_charityproject_collection_seconds'),
+            ['collection_seconds'],
+            unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.drop_index(
+            batch_op.f('ix_charityproject_collection_seconds')
+        )
+        batch_op.drop_column('collection_seconds')
@@ -0,0 +1,52 @@
+"""add donor stats
+
+Revision ID: 3f7b2d9c6a41
+Revises: 8d2f6c1a9e37
+Create Date: 2026-10-19 21:12:48.305116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7b2d9c6a41'
+down_revision = '8d2f6c1a9e37'
+branch_labels = None
+depends_on = None
+
+BACKFILL = (
+    'INSERT INTO donorstats (user_id, donations, donated_amount, '
+    'invested_amount, first_donation_date, last_donation_date) '
+    'SELECT user_id, COUNT(id), COALESCE(SUM(full_amount), 0), '
+    'COALESCE(SUM(invested_amount), 0), MIN(create_date), '
+    'MAX(create_date) FROM donation WHERE user_id IS NOT NULL '
+    'GROUP BY user_id'
+)
+
+
+def upgrade():
+    op.create_index(
+        'ix_donation_user_id_create_date', 'donation',
+        ['user_id', 'create_date'], unique=False
+    )
+    op.create_table(
+        'donorstats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('donations', sa.BigInteger(), nullable=False),
+        sa.Column('donated_amount', sa.BigInteger(), nullable=False),
+        sa.Column('invested_amount', sa.BigInteger(), nullable=False),
+        sa.Column('first_donation_date', sa.DateTime(), nullable=True),
+        sa.Column('last_donation_date', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['user.id'], name='fk_donorstats_user_id_user'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_table('donorstats')
+    op.drop_index('ix_donation_user_id_create_date', table_name='donation')
@@ -0,0 +1,40 @@
+"""add report state
+
+Revision ID: 5c1e8a2f4b90
+Revises: 397b97291507
+Create Date: 2026-10-19 13:40:05.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8a2f4b90'
+down_revision = '397b97291507'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reportstate',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('spreadsheet_id', sa.String(length=100), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('rows', sa.Integer(), nullable=True),
+        sa.Column('update_date', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_charityproject_close_date', ['close_date'], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.drop_index('ix_charityproject_close_date')
+    op.drop_table('reportstate')
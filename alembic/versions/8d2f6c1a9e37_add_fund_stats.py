@@ -0,0 +1,53 @@
+"""add fund stats
+
+Revision ID: 8d2f6c1a9e37
+Revises: 5c1e8a2f4b90
+Create Date: 2026-10-19 18:05:27.640913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6c1a9e37'
+down_revision = '5c1e8a2f4b90'
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    'projects', 'closed_projects', 'required_amount', 'remaining_amount',
+    'collection_seconds', 'donations', 'closed_donations', 'raised_amount',
+    'invested_amount', 'waiting_amount',
+)
+REST = (
+    'CASE WHEN fully_invested THEN 0 '
+    'ELSE full_amount - COALESCE(invested_amount, 0) END'
+)
+CLOSED = 'CASE WHEN fully_invested THEN 1 ELSE 0 END'
+BACKFILL = (
+    'INSERT INTO fundstats (id, {columns}, update_date) '
+    'SELECT 1, p.*, d.*, CURRENT_TIMESTAMP FROM ('
+    'SELECT COUNT(id), COALESCE(SUM({closed}), 0), '
+    'COALESCE(SUM(full_amount), 0), COALESCE(SUM({rest}), 0), '
+    'COALESCE(SUM(collection_seconds), 0) FROM charityproject) AS p, ('
+    'SELECT COUNT(id), COALESCE(SUM({closed}), 0), '
+    'COALESCE(SUM(full_amount), 0), COALESCE(SUM(invested_amount), 0), '
+    'COALESCE(SUM({rest}), 0) FROM donation) AS d'
+).format(columns=', '.join(COUNTERS), closed=CLOSED, rest=REST)
+
+
+def upgrade():
+    op.create_table(
+        'fundstats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        *(sa.Column(name, sa.BigInteger(), nullable=False)
+          for name in COUNTERS),
+        sa.Column('update_date', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_table('fundstats')
@@ -0,0 +1,53 @@
+"""add donation buckets
+
+Revision ID: b6e41f0d27c8
+Revises: 3f7b2d9c6a41
+Create Date: 2026-10-19 23:02:11.518734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e41f0d27c8'
+down_revision = '3f7b2d9c6a41'
+branch_labels = None
+depends_on = None
+
+BUCKET_STARTS = {
+    'postgresql': {
+        'hour': "date_trunc('hour', create_date)",
+        'day': "date_trunc('day', create_date)",
+    },
+    'sqlite': {
+        'hour': "strftime('%Y-%m-%d %H:00:00.000000', create_date)",
+        'day': "strftime('%Y-%m-%d 00:00:00.000000', create_date)",
+    },
+}
+BACKFILL = (
+    'INSERT INTO donationbucket (bucket, start, donations, amount) '
+    "SELECT '{bucket}', {start}, COUNT(id), SUM(full_amount) "
+    'FROM donation WHERE create_date IS NOT NULL GROUP BY {start}'
+)
+
+
+def upgrade():
+    op.create_table(
+        'donationbucket',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.String(length=4), nullable=False),
+        sa.Column('start', sa.DateTime(), nullable=False),
+        sa.Column('donations', sa.BigInteger(), nullable=False),
+        sa.Column('amount', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'bucket', 'start', name='uq_donationbucket_bucket_start')
+    )
+    starts = BUCKET_STARTS[op.get_bind().dialect.name]
+    for bucket, start in starts.items():
+        op.execute(BACKFILL.format(bucket=bucket, start=start))
+
+
+def downgrade():
+    op.drop_table('donationbucket')
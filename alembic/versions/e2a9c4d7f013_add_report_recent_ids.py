@@ -0,0 +1,26 @@
+"""add report recent ids
+
+Revision ID: e2a9c4d7f013
+Revises: b6e41f0d27c8
+Create Date: 2026-10-20 10:12:44.207153
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c4d7f013'
+down_revision = 'b6e41f0d27c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reportstate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recent_ids', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reportstate', schema=None) as batch_op:
+        batch_op.drop_column('recent_ids')
@@ -1,4 +1,8 @@
 from .charity_project import router as charity_project_router # noqa
 from .donation import router as donation_router # noqa
 from .google_api import router as google_api_router  # noqa
+from .metrics import router as metrics_router # noqa
+from .profiler import router as profiler_router # noqa
+from .report import router as report_router # noqa
+from .stats import router as stats_router # noqa
 from .user import router as user_router # noqa
\ No newline at end of file
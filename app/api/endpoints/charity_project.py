@@ -1,19 +1,22 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.validators import (
     check_project_exists, check_name_duplicate, check_project_start,
-    check_full_amount, check_project_close)
-from app.core.db import get_async_session
+    check_full_amount, check_project_close, check_progress_ids,
+    check_project_progress_exists)
+from app.core.db import get_async_read_session, get_async_session
+from app.core.timing import TimedRoute
 from app.core.user import current_superuser
-from app.crud import charity_project_crud
+from app.crud import charity_project_crud, project_progress_crud
 from app.services import StringCharityProject as const
 from app.services import invest_process
 from app.schemas import (
-    CharityProjectCreate, CharityProjectRead, CharityProjectUpdate)
-router = APIRouter()
+    CharityProjectCreate, CharityProjectRead, CharityProjectUpdate,
+    ProjectProgressRead)
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get(
@@ -23,7 +26,7 @@ router = APIRouter()
     response_model_exclude_none=True,
 )
 async def get_all_charity_projects(
-        session: AsyncSession = Depends(get_async_session),
+        session: AsyncSession = Depends(get_async_read_session),
 ) -> List[CharityProjectRead]:
     """
     Получение списка всех благотворительных проектов
@@ -37,6 +40,51 @@ async def get_all_charity_projects(
     return projects
 
 
+@router.get(
+    '/progress',
+    summary=const.GET_PROGRESS_MANY,
+    description=const.GET_PROGRESS_MANY_DESCRIPTION,
+    response_model=List[ProjectProgressRead],
+)
+async def get_charity_projects_progress(
+        ids: List[int] = Query(...),
+        session: AsyncSession = Depends(get_async_read_session),
+) -> List[ProjectProgressRead]:
+    """
+    Получение прогресса сбора нескольких проектов
+    #### Args:
+        - ids (List[int]) ID проектов.
+        - session (AsyncSession) асинхронная сессия базы данных.
+    Добавлена через Depends.
+    #### Returns:
+        - List[ProjectProgressRead]: прогресс найденных проектов
+    """
+    await check_progress_ids(ids)
+    return await project_progress_crud.get_many(ids, session)
+
+
+@router.get(
+    '/{project_id}/progress',
+    summary=const.GET_PROGRESS,
+    description=const.GET_PROGRESS_DESCRIPTION,
+    response_model=ProjectProgressRead,
+)
+async def get_charity_project_progress(
+        project_id: int,
+        session: AsyncSession = Depends(get_async_read_session),
+) -> ProjectProgressRead:
+    """
+    Получение прогресса сбора проекта
+    #### Args:
+        - project_id (int) ID проекта.
+        - session (AsyncSession) асинхронная сессия базы данных.
+    Добавлена через Depends.
+    #### Returns:
+        - ProjectProgressRead: собранная и требуемая сумма проекта
+    """
+    return await check_project_progress_exists(project_id, session)
+
+
 @router.post(
     '/',
     summary=const.CREATE,
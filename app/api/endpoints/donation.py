@@ -3,16 +3,17 @@ from typing import List
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.core.db import get_async_read_session, get_async_session
+from app.core.timing import TimedRoute
 from app.core.user import current_superuser, current_user
-from app.crud import donation_crud
+from app.crud import donation_crud, donor_stats_crud
 from app.models import User
 from app.services import StringDonation as const
 from app.services import invest_process
 from app.schemas import (
-    DonationCreate, DonationRead)
+    DonationCreate, DonationRead, DonationSummary)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get(
@@ -24,7 +25,7 @@ router = APIRouter()
     dependencies=[Depends(current_superuser)],
 )
 async def get_donation(
-        session: AsyncSession = Depends(get_async_session),
+        session: AsyncSession = Depends(get_async_read_session),
 ) -> List[DonationRead]:
     """
     Получение данных из базы данных о всех пожертвованиях.
@@ -75,7 +76,7 @@ async def create_donation(
 )
 async def get_all_donation(
     user: User = Depends(current_user),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ) -> List[DonationRead]:
     """
     Получение списка пожертвований пользователя.
@@ -88,4 +89,33 @@ async def get_all_donation(
         - List[DonationRead]: Список моделей пожертвований пользователя.
     """
     donations = await donation_crud.get_by_user(user, session)
-    return donations
\ No newline at end of file
+    return donations
+
+
+@router.get(
+    '/my/summary',
+    summary=const.GET_SUMMARY,
+    description=const.GET_SUMMARY_DESCRIPTION,
+    response_model=DonationSummary,
+    dependencies=[Depends(current_user)],
+)
+async def get_donation_summary(
+    user: User = Depends(current_user),
+    session: AsyncSession = Depends(get_async_read_session),
+) -> DonationSummary:
+    """
+    Получение итогов пожертвований пользователя.
+    Итоги читаются из строки пользователя, которая меняется вместе
+    с его пожертвованиями; без нее считаются агрегирующим запросом.
+    #### Args:
+        - user (User): Модель данных для пользователя.
+          Добавлена через Depends.
+        - session (AsyncSession): Асинхронная сессия базы данных.
+          Добавлена через Depends.
+    #### Returns:
+        - DonationSummary: Итоги пожертвований пользователя.
+    """
+    summary = await donor_stats_crud.get_by_user(user, session)
+    if summary is None:
+        summary = await donation_crud.get_summary(user, session)
+    return summary
@@ -1,18 +1,21 @@
-from typing import Dict, Union
+from http import HTTPStatus as st
+from typing import Any, Dict, Optional
 from aiogoogle import Aiogoogle
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-from app.core.db import get_async_session
-from app.core.google_client import get_service
+from app.api.validators import check_report_job_exists
+from app.core.db import get_async_read_session, get_async_session
+from app.core.google_client import get_service, google_client
+from app.core.timing import TimedRoute
 from app.core.user import current_superuser
-from app.crud import charity_project_crud
+from app.schemas import ReportJobRead
 from app.services import StringGoogleApi as const
 from app.services import (
-    set_user_permissions, spreadsheets_update_value, spreadsheets_create)
+    generate_report, refresh_report, report_job_runner)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -22,31 +25,72 @@ router = APIRouter()
     dependencies=[Depends(current_superuser)],
 )
 async def get_report(
+        response: Response,
+        limit: Optional[int] = Query(None, gt=0),
+        background: bool = False,
+        incremental: bool = False,
         session: AsyncSession = Depends(get_async_session),
-        wrapper_services: Aiogoogle = Depends(get_service)
+        read_session: AsyncSession = Depends(get_async_read_session),
+        wrapper_services: Aiogoogle = Depends(get_service),
+) -> Dict[str, Any]:
+    """
+    Формирование отчета о закрытых проектах
+    #### Args:
+        - limit (Optional[int]): количество самых быстрых проектов в отчете.
+        - background (bool): поставить отчет в очередь фоновых задач.
+        - incremental (bool): дописать в прошлый отчет только проекты,
+        которых в нем еще нет, после уже записанных. Параметр limit
+        при этом не учитывается.
+        - session (AsyncSession): сессия основной базы, в ней
+        инкрементальный отчет сохраняет свое состояние.
+        - read_session (AsyncSession): сессия чтения для полного отчета.
+        - wrapper_services (Aiogoogle): объект Aiogoogle.
+    Добавлены через Depends. Сессии берут соединение только при первом
+    запросе, поэтому фоновый отчет, работающий в своей сессии
+    и клиенте, соединений в запросе не занимает.
+    #### Returns:
+        - Dict[str, Any]: возвращает ссылку на сформированный отчет,
+        количество проектов в отчете и длительность шагов
+        формирования отчета в секундах, а для фонового отчета -
+        идентификатор и статус задачи
+    """
+    if background:
+        job = report_job_runner.submit(limit, incremental)
+        response.status_code = st.ACCEPTED
+        return {'job_id': job.id, 'status': job.status}
+    if incremental:
+        return await refresh_report(session, wrapper_services)
+    return await generate_report(read_session, wrapper_services, limit)
+
+
+@router.get(
+    '/stats',
+    summary=const.GET_STATS,
+    description=const.GET_STATS_DESCRIPTION,
+    dependencies=[Depends(current_superuser)],
+)
+async def get_google_stats() -> Dict[str, Any]:
+    """
+    Счетчики запросов к Google API с момента запуска процесса
+    #### Returns:
+        - Dict[str, Any]: запросы, повторы, ошибки и паузы по API.
+    """
+    return google_client.stats.as_dict()
 
-) -> Dict[str, Union[str, Dict[str, str]]]:
-    projects = await charity_project_crud.get_projects_by_completion_rate(
-        session
-    )
+
+@router.get(
+    '/jobs/{job_id}',
+    summary=const.GET_JOB,
+    description=const.GET_JOB_DESCRIPTION,
+    response_model=ReportJobRead,
+    dependencies=[Depends(current_superuser)],
+)
+async def get_report_job(job_id: str) -> ReportJobRead:
     """
-    Получение списка всех благотворительных проектов
+    Получение статуса фоновой задачи формирования отчета
     #### Args:
-        - session (AsyncSession) асинхронная сессия базы данных.
-        - wrapper_services (Aiogoogle): Объект Aiogoogle,
-    используемый для взаимодействия с Google Drive API.
-    Добавлена через Depends.
+        - job_id (str): идентификатор задачи.
     #### Returns:
-        - Dict[str, Union[str, Dict[str,str]]]: возвращает ссылку на
-        сформированный отчет и список данных что включенны в отчет
+        - ReportJobRead: статус задачи, ссылка на отчет или текст ошибки.
     """
-    spreadsheet_id = await spreadsheets_create(wrapper_services)
-    await set_user_permissions(spreadsheet_id, wrapper_services)
-    await spreadsheets_update_value(spreadsheet_id,
-                                    projects,
-                                    wrapper_services)
-
-    return {
-        'URL': f'https://docs.google.com/spreadsheets/d/{spreadsheet_id}',
-        'data': projects
-    }
+    return await check_report_job_exists(job_id)
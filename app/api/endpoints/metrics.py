@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+from app.core.timing import TimedRoute
+from app.services import StringMetrics as const
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get(
+    '/metrics',
+    summary=const.GET,
+    description=const.GET_DESCRIPTION,
+    response_class=PlainTextResponse,
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Метрики приложения для Prometheus
+    #### Returns:
+        - PlainTextResponse: метрики в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
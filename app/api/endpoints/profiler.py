@@ -0,0 +1,93 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import PlainTextResponse
+
+from app.api.validators import check_profile_exists
+from app.core.profiler import profiler
+from app.core.timing import TimedRoute
+from app.core.user import current_superuser
+from app.schemas import ProfileRead, ProfilerArm, ProfilerTargetRead
+from app.services import StringProfiler as const
+
+router = APIRouter(
+    route_class=TimedRoute, dependencies=[Depends(current_superuser)]
+)
+
+
+@router.post(
+    '/',
+    response_model=ProfilerTargetRead,
+    summary=const.POST_ARM,
+    description=const.POST_ARM_DESCRIPTION,
+)
+async def arm_profiler(arm_in: ProfilerArm) -> ProfilerTargetRead:
+    """
+    Включение профилирования следующих запросов
+    #### Args:
+        - arm_in (ProfilerArm): метод, начало пути, количество запросов
+          и признак профилирования только запросов с заголовком.
+    #### Returns:
+        - ProfilerTargetRead: ожидающие профилирования запросы и токен
+          для заголовка X-Profile.
+    """
+    return profiler.arm(
+        arm_in.path, arm_in.method, arm_in.count, arm_in.header_only
+    )
+
+
+@router.get(
+    '/',
+    response_model=Optional[ProfilerTargetRead],
+    summary=const.GET_STATUS,
+)
+async def get_profiler_target() -> Optional[ProfilerTargetRead]:
+    """
+    Ожидающие профилирования запросы
+    #### Returns:
+        - Optional[ProfilerTargetRead]: цель профилировщика или None.
+    """
+    return profiler.target
+
+
+@router.delete('/', summary=const.DELETE_ARM, response_class=Response)
+async def disarm_profiler() -> Response:
+    """
+    Отключение профилирования запросов
+    #### Returns:
+        - Response: пустой ответ.
+    """
+    profiler.disarm()
+    return Response()
+
+
+@router.get(
+    '/profiles',
+    response_model=List[ProfileRead],
+    summary=const.GET_PROFILES,
+)
+async def get_profiles() -> List[ProfileRead]:
+    """
+    Последние профили запросов, начиная с новых
+    #### Returns:
+        - List[ProfileRead]: сводки профилей без стеков.
+    """
+    return list(reversed(profiler.profiles))
+
+
+@router.get(
+    '/profiles/{profile_id}',
+    summary=const.GET_PROFILE,
+    description=const.GET_PROFILE_DESCRIPTION,
+    response_class=PlainTextResponse,
+)
+async def get_profile(profile_id: str) -> PlainTextResponse:
+    """
+    Стеки профиля запроса для построения flamegraph
+    #### Args:
+        - profile_id (str): идентификатор профиля.
+    #### Returns:
+        - PlainTextResponse: стеки в свернутом формате.
+    """
+    profile = await check_profile_exists(profile_id)
+    return PlainTextResponse(profile.folded())
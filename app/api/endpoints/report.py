@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.validators import check_report_format_available
+from app.core.db import get_async_read_session
+from app.core.timing import TimedRoute
+from app.core.user import current_superuser
+from app.schemas import ReportFormat
+from app.services import StringReport as const
+from app.services import stream_report
+from app.services.report_sinks import REPORT_SINKS
+
+FILE_DATE_FORMAT = '%Y%m%d_%H%M%S'
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get(
+    '/{report_format}',
+    summary=const.GET_FILE,
+    description=const.GET_FILE_DESCRIPTION,
+    response_class=StreamingResponse,
+    dependencies=[Depends(current_superuser)],
+)
+async def get_report_file(
+        report_format: ReportFormat,
+        limit: Optional[int] = Query(None, gt=0),
+        session: AsyncSession = Depends(get_async_read_session),
+) -> StreamingResponse:
+    """
+    Выгрузка отчета о закрытых проектах в файл
+    #### Args:
+        - report_format (ReportFormat): формат файла: csv, xlsx или parquet.
+        - limit (Optional[int]): количество самых быстрых проектов в отчете.
+        - session (AsyncSession) асинхронная сессия базы данных.
+    #### Returns:
+        - StreamingResponse: файл отчета, формируемый по частям.
+    """
+    await check_report_format_available(report_format)
+    sink = REPORT_SINKS[report_format.value]
+    file_name = (
+        f'report_{datetime.now().strftime(FILE_DATE_FORMAT)}.{sink.extension}'
+    )
+    return StreamingResponse(
+        stream_report(session, report_format.value, limit),
+        media_type=sink.media_type,
+        headers={'Content-Disposition': f'attachment; filename={file_name}'},
+    )
@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.validators import check_date_range
+from app.core.db import get_async_read_session
+from app.core.timing import TimedRoute
+from app.core.user import current_superuser
+from app.crud import donation_bucket_crud, fund_stats_crud
+from app.schemas import (
+    DonationBucketRead, DonationBucketSize, FundStatsRead)
+from app.services import StringStats as const
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get(
+    '/',
+    summary=const.GET,
+    description=const.GET_DESCRIPTION,
+    response_model=FundStatsRead,
+    dependencies=[Depends(current_superuser)],
+)
+async def get_fund_stats(
+        session: AsyncSession = Depends(get_async_read_session),
+) -> FundStatsRead:
+    """
+    Получение сводных показателей фонда, только для суперюзеров
+    #### Args:
+        - session (AsyncSession) асинхронная сессия базы данных.
+    Добавлена через Depends.
+    #### Returns:
+        - FundStatsRead: счетчики и суммы по проектам и пожертвованиям.
+    """
+    return await fund_stats_crud.get_stats(session)
+
+
+@router.get(
+    '/donations',
+    summary=const.GET_DONATIONS,
+    description=const.GET_DONATIONS_DESCRIPTION,
+    response_model=List[DonationBucketRead],
+    dependencies=[Depends(current_superuser)],
+)
+async def get_donation_buckets(
+        bucket: DonationBucketSize = DonationBucketSize.DAY,
+        from_date: Optional[datetime] = Query(None, alias='from'),
+        to_date: Optional[datetime] = Query(None, alias='to'),
+        session: AsyncSession = Depends(get_async_read_session),
+) -> List[DonationBucketRead]:
+    """
+    Получение пожертвований по интервалам, только для суперюзеров
+    #### Args:
+        - bucket (DonationBucketSize) размер интервала.
+        - from_date (Optional[datetime]) начало периода.
+        - to_date (Optional[datetime]) конец периода, не включается.
+        - session (AsyncSession) асинхронная сессия базы данных.
+    Добавлена через Depends.
+    #### Returns:
+        - List[DonationBucketRead]: количество и сумма пожертвований
+        по интервалам.
+    """
+    from_date, to_date = await check_date_range(from_date, to_date)
+    return await donation_bucket_crud.get_range(
+        bucket.value, from_date, to_date, session)
@@ -4,6 +4,10 @@ from app.api.endpoints import (
     charity_project_router,
     donation_router,
     google_api_router,
+    metrics_router,
+    profiler_router,
+    report_router,
+    stats_router,
     user_router,
 )
 
@@ -22,4 +26,12 @@ main_router.include_router(
 main_router.include_router(
     google_api_router, prefix='/google', tags=['Google']
 )
+main_router.include_router(
+    report_router, prefix='/report', tags=['Report']
+)
+main_router.include_router(stats_router, prefix='/stats', tags=['Stats'])
+main_router.include_router(metrics_router, tags=['Metrics'])
+main_router.include_router(
+    profiler_router, prefix='/profiler', tags=['Profiler']
+)
 main_router.include_router(user_router)
@@ -1,13 +1,19 @@
 from datetime import datetime
 from http import HTTPStatus as st
+from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import charity_project_crud
+from app.core.config import settings
+from app.core.profiler import Profile, profiler
+from app.crud import charity_project_crud, project_progress_crud
 from app.models import CharityProject
-from app.schemas import CharityProjectUpdate
+from app.schemas import CharityProjectUpdate, ReportFormat
 from app.services import StringValidatorsError as const
+from app.services import (
+    count_collection_seconds, report_job_runner, sink_available)
+from app.services.report_jobs import ReportJob
 
 
 async def check_full_amount(
@@ -30,10 +36,13 @@ async def check_full_amount(
             detail=const.AMOUNT_LESS,
         )
     elif project_in.full_amount == project.invested_amount:
+        close_date = datetime.now()
         project_in = {
             **project_in.dict(exclude_unset=True),
-            'close_date': datetime.now(),
+            'close_date': close_date,
             'fully_invested': True,
+            'collection_seconds': count_collection_seconds(
+                project.create_date, close_date),
         }
     return project_in
 
@@ -97,6 +106,130 @@ async def check_project_exists(
     return project
 
 
+async def check_project_progress_exists(
+    project_id: int,
+    session: AsyncSession,
+) -> Dict:
+    """
+    Проверка существования проекта по его прогрессу из кэша
+    #### Args:
+        project_id (int): Идентификатор проекта
+        session (AsyncSession): Сессия для обращения к базе данных
+    #### Returns:
+        Dict: Прогресс сбора проекта
+    #### Raises:
+        HTTPException: Если проект с указанным идентификатором не найден
+    """
+    progress = await project_progress_crud.get_many([project_id], session)
+    if not progress:
+        raise HTTPException(
+            status_code=st.NOT_FOUND,
+            detail=const.NOT_FOUND
+        )
+    return progress[0]
+
+
+async def check_progress_ids(project_ids: List[int]) -> None:
+    """
+    Проверка количества проектов в пакетном запросе прогресса
+    #### Args:
+        project_ids (List[int]): Идентификаторы проектов
+    #### Raises:
+        HTTPException: Если проектов больше settings.progress_max_ids
+    """
+    if len(project_ids) > settings.progress_max_ids:
+        raise HTTPException(
+            status_code=st.BAD_REQUEST,
+            detail=f'{const.TOO_MANY_IDS} (> {settings.progress_max_ids})'
+        )
+
+
+async def check_report_job_exists(job_id: str) -> ReportJob:
+    """
+    Проверка существования задачи формирования отчета
+    #### Args:
+        job_id (str): Идентификатор задачи
+    #### Returns:
+        ReportJob: Задача формирования отчета
+    #### Raises:
+        HTTPException: Если задача с указанным идентификатором не найдена
+    """
+    job = report_job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=st.NOT_FOUND,
+            detail=const.JOB_NOT_FOUND
+        )
+    return job
+
+
+async def check_profile_exists(profile_id: str) -> Profile:
+    """
+    Проверка наличия профиля запроса в истории профилировщика
+    #### Args:
+        profile_id (str): Идентификатор профиля
+    #### Returns:
+        Profile: Профиль запроса
+    #### Raises:
+        HTTPException: Если профиль не найден или вытеснен из истории
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=st.NOT_FOUND,
+            detail=const.PROFILE_NOT_FOUND
+        )
+    return profile
+
+
+async def check_report_format_available(
+    report_format: ReportFormat,
+) -> None:
+    """
+    Проверка наличия библиотеки для формата отчета
+    #### Args:
+        report_format (ReportFormat): Формат файла отчета
+    #### Raises:
+        HTTPException: Если нужная формату библиотека не установлена
+    """
+    if not sink_available(report_format.value):
+        raise HTTPException(
+            status_code=st.BAD_REQUEST,
+            detail=f'{const.FORMAT_UNAVAILABLE} ({report_format.value})'
+        )
+
+
+async def check_date_range(
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Проверка периода выборки
+    Даты с часовым поясом переводятся в местное время сервера
+    без пояса, в котором хранятся даты пожертвований.
+    #### Args:
+        from_date (Optional[datetime]): Начало периода
+        to_date (Optional[datetime]): Конец периода
+    #### Returns:
+        Tuple[Optional[datetime], Optional[datetime]]: Начало и конец
+        периода без часового пояса
+    #### Raises:
+        HTTPException: Если начало периода не раньше его конца
+    """
+    from_date, to_date = (
+        value.astimezone().replace(tzinfo=None)
+        if value is not None and value.tzinfo is not None else value
+        for value in (from_date, to_date)
+    )
+    if from_date is not None and to_date is not None and (
+            from_date >= to_date):
+        raise HTTPException(
+            status_code=st.BAD_REQUEST,
+            detail=const.DATE_RANGE
+        )
+    return from_date, to_date
+
+
 async def check_project_start(project: CharityProject) -> None:
     """
     Проверка наличия средств у проекта
@@ -0,0 +1,72 @@
+"""
+Проверка сводки фонда: счетчики пересчитываются по таблицам проектов
+и пожертвований за один проход и сравниваются с сохраненными.
+Запуск:
+    python -m app.commands.fundstats [--fix]
+Без --fix при расхождении команда завершается с кодом 1.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from app.core.db import AsyncSessionLocal, engine
+from app.crud import fund_stats_crud
+from app.models.fund_stats import FUND_STATS_ID
+
+
+async def verify(
+        session_factory: Callable,
+        fix: bool = False,
+) -> Dict[str, Tuple[Optional[int], int]]:
+    """
+    Сравнивает сохраненную сводку фонда с пересчитанной
+    #### Args:
+    - session_factory (Callable): Фабрика асинхронных сессий.
+    - fix (bool): Перезаписать сводку пересчитанными значениями.
+    #### Returns:
+    - Dict[str, Tuple[Optional[int], int]]: Расходящиеся счетчики:
+    сохраненное и пересчитанное значение.
+    """
+    async with session_factory() as session:
+        stats = await fund_stats_crud.get(FUND_STATS_ID, session)
+        actual = await fund_stats_crud.count(session)
+        differences = {
+            name: (getattr(stats, name, None), value)
+            for name, value in actual.items()
+            if getattr(stats, name, None) != value
+        }
+        if differences and fix:
+            await fund_stats_crud.save(actual, session)
+    return differences
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Пересчет и проверка сводки фонда.'
+    )
+    parser.add_argument(
+        '--fix', action='store_true',
+        help='Записать пересчитанные значения вместо сохраненных.',
+    )
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Tuple]:
+    try:
+        return await verify(AsyncSessionLocal, args.fix)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    differences = asyncio.run(main(args))
+    for name, (stored, actual) in differences.items():
+        print(f'{name}: сохранено {stored}, по таблицам {actual}')
+    if not differences:
+        print('Сводка фонда совпадает с таблицами.')
+    elif args.fix:
+        print('Сводка фонда пересчитана.')
+    else:
+        sys.exit(1)
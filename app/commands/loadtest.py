@@ -0,0 +1,314 @@
+"""
+Нагрузочный прогон приложения в одном процессе.
+Запросы идут в app.main.app через ASGI-транспорт httpx без сети,
+поэтому замеряется только само приложение и база данных.
+Запуск:
+    python -m app.commands.loadtest --requests 2000 --concurrency 50
+По умолчанию используется временный файл SQLite, для PostgreSQL
+укажите --database-url.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from dataclasses import dataclass, field
+from math import ceil
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+from sqlalchemy import update
+
+BASE_URL = 'http://loadtest'
+PASSWORD = 'load-test-password'
+SUPERUSER_EMAIL = 'admin@loadtest.example'
+PERCENTILES = (50, 90, 99)
+# Доли запросов в прогоне: чтение проектов, пожертвования,
+# чтение своих пожертвований и выгрузка отчета.
+DEFAULT_MIX = {'projects': 60, 'donate': 20, 'my_donations': 15, 'report': 5}
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Перцентиль отсортированных значений по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    rank = max(ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Разбирает смесь запросов вида projects=60,donate=20."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                f'Неизвестный запрос {name!r}, доступны: '
+                f'{", ".join(OPERATIONS)}'
+            )
+        mix[name] = int(weight)
+    return mix
+
+
+@dataclass
+class RouteStats:
+    """Длительности запросов одного маршрута в секундах."""
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            **{
+                f'p{percent}_ms': round(
+                    percentile(latencies, percent) * 1000, 1)
+                for percent in PERCENTILES
+            },
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        }
+
+
+@dataclass
+class LoadReport:
+    """Итоги прогона по маршрутам."""
+    elapsed: float
+    routes: Dict[str, RouteStats]
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            route: stats.summary(self.elapsed)
+            for route, stats in sorted(self.routes.items())
+        }
+
+    def format_table(self) -> str:
+        rows = self.as_dict()
+        columns = list(next(iter(rows.values()), {}))
+        width = max([len(route) for route in rows] + [5])
+        lines = [
+            'route'.ljust(width) + ''.join(f'{name:>10}' for name in columns)
+        ]
+        for route, summary in rows.items():
+            lines.append(route.ljust(width) + ''.join(
+                f'{summary[name]:>10}' for name in columns
+            ))
+        total = sum(len(stats.latencies) for stats in self.routes.values())
+        lines.append(
+            f'{total} запросов за {self.elapsed:.2f} с, '
+            f'{total / self.elapsed if self.elapsed else 0:.1f} запросов/с'
+        )
+        return '\n'.join(lines)
+
+
+class LoadRunner:
+    """
+    Готовит данные и выполняет смесь запросов к приложению
+    заданным количеством параллельных клиентов.
+    """
+
+    def __init__(
+            self,
+            app,
+            session_factory: Callable,
+            users: int = 20,
+            projects: int = 50,
+            mix: Optional[Dict[str, int]] = None,
+            seed: int = 0,
+    ) -> None:
+        self.app = app
+        self.session_factory = session_factory
+        self.users = users
+        self.projects = projects
+        self.mix = mix or DEFAULT_MIX
+        self.seed = seed
+        self.tokens: List[str] = []
+        self.superuser_token: Optional[str] = None
+        self.routes: Dict[str, RouteStats] = {}
+        self.remaining = 0
+
+    async def login(self, client: httpx.AsyncClient, email: str) -> str:
+        response = await client.post(
+            '/auth/jwt/login',
+            data={'username': email, 'password': PASSWORD},
+        )
+        response.raise_for_status()
+        return response.json()['access_token']
+
+    async def register(self, client: httpx.AsyncClient, email: str) -> None:
+        response = await client.post(
+            '/auth/register', json={'email': email, 'password': PASSWORD}
+        )
+        # 400 - пользователь остался от прошлого прогона в той же базе.
+        if response.status_code not in (201, 400):
+            response.raise_for_status()
+
+    async def promote_superuser(self, email: str) -> None:
+        # Модели импортируются после выбора базы, см. main.
+        from app.models import User
+
+        async with self.session_factory() as session:
+            await session.execute(
+                update(User).where(User.email == email)
+                .values(is_superuser=True)
+            )
+            await session.commit()
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        """Создает пользователей, суперпользователя и проекты."""
+        rng = random.Random(self.seed)
+        await self.register(client, SUPERUSER_EMAIL)
+        await self.promote_superuser(SUPERUSER_EMAIL)
+        self.superuser_token = await self.login(client, SUPERUSER_EMAIL)
+        for number in range(self.users):
+            email = f'user{number}@loadtest.example'
+            await self.register(client, email)
+            self.tokens.append(await self.login(client, email))
+        headers = self.auth(self.superuser_token)
+        for number in range(self.projects):
+            await client.post('/charity_project/', headers=headers, json={
+                'name': f'Проект нагрузки {self.seed}-{number}',
+                'description': 'Проект для нагрузочного прогона',
+                'full_amount': rng.randint(10_000, 1_000_000),
+            })
+
+    @staticmethod
+    def auth(token: str) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {token}'}
+
+    async def projects_list(self, client, rng) -> httpx.Response:
+        return await client.get('/charity_project/')
+
+    async def donate(self, client, rng) -> httpx.Response:
+        return await client.post(
+            '/donation/',
+            headers=self.auth(rng.choice(self.tokens)),
+            json={'full_amount': rng.randint(1, 5000)},
+        )
+
+    async def my_donations(self, client, rng) -> httpx.Response:
+        return await client.get(
+            '/donation/my', headers=self.auth(rng.choice(self.tokens))
+        )
+
+    async def report(self, client, rng) -> httpx.Response:
+        return await client.get(
+            '/report/csv', headers=self.auth(self.superuser_token)
+        )
+
+    async def google_report(self, client, rng) -> httpx.Response:
+        return await client.post(
+            '/google/', headers=self.auth(self.superuser_token)
+        )
+
+    async def worker(self, client: httpx.AsyncClient, number: int) -> None:
+        rng = random.Random(self.seed * 1000 + number)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while self.remaining > 0:
+            self.remaining -= 1
+            name = rng.choices(names, weights)[0]
+            method: Callable[..., Awaitable[httpx.Response]] = getattr(
+                self, OPERATIONS[name])
+            start = perf_counter()
+            try:
+                response = await method(client, rng)
+                failed = response.status_code >= 400
+                route = f'{response.request.method} {response.request.url.path}'
+            except Exception:
+                failed = True
+                route = name
+            stats = self.routes.setdefault(route, RouteStats())
+            stats.latencies.append(perf_counter() - start)
+            stats.errors += failed
+
+    async def run(self, requests: int, concurrency: int) -> LoadReport:
+        """
+        Выполняет прогон
+        #### Args:
+        - requests (int): Общее количество запросов смеси.
+        - concurrency (int): Количество параллельных клиентов.
+        #### Returns:
+        - LoadReport: Пропускная способность и перцентили по маршрутам.
+        """
+        transport = httpx.ASGITransport(app=self.app)
+        async with httpx.AsyncClient(
+                transport=transport, base_url=BASE_URL, timeout=None
+        ) as client:
+            if not self.tokens:
+                await self.setup(client)
+            self.routes = {}
+            self.remaining = requests
+            start = perf_counter()
+            await asyncio.gather(*(
+                self.worker(client, number) for number in range(concurrency)
+            ))
+            elapsed = perf_counter() - start
+        return LoadReport(elapsed, self.routes)
+
+
+OPERATIONS = {
+    'projects': 'projects_list',
+    'donate': 'donate',
+    'my_donations': 'my_donations',
+    'report': 'report',
+    'google': 'google_report',
+}
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный прогон приложения без сети.'
+    )
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument(
+        '--mix', type=parse_mix, default=DEFAULT_MIX,
+        help='Доли запросов, например projects=60,donate=20,'
+             'my_donations=15,report=5. Запрос google формирует '
+             'отчет в Google Sheets и требует учетных данных.',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--database-url',
+        help='База для прогона. По умолчанию временный файл SQLite.',
+    )
+    parser.add_argument(
+        '--json', dest='json_path', help='Файл для итогов в формате JSON.'
+    )
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> LoadReport:
+    # Настройки читаются при импорте приложения, поэтому база
+    # выбирается до импорта.
+    from app.core.db import AsyncSessionLocal, Base, engine
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    runner = LoadRunner(
+        app, AsyncSessionLocal, args.users, args.projects, args.mix, args.seed
+    )
+    try:
+        return await runner.run(args.requests, args.concurrency)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['DATABASE_URL'] = args.database_url or (
+            f'sqlite+aiosqlite:///{os.path.join(directory, "loadtest.db")}'
+        )
+        report = asyncio.run(main(args))
+    print(report.format_table())
+    if args.json_path:
+        with open(args.json_path, 'w') as file:
+            json.dump(report.as_dict(), file, ensure_ascii=False, indent=2)
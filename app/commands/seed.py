@@ -0,0 +1,543 @@
+"""
+Массовое заполнение базы пользователями, проектами и пожертвованиями.
+Пожертвования распределяются по проектам так же, как при создании
+через API: в порядке создания, от старых к новым. Строки пишутся
+пачками через executemany, а в PostgreSQL через COPY.
+Запуск:
+    python -m app.commands.seed --projects 100000 --donations 1000000
+"""
+import argparse
+import asyncio
+import random
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from math import exp
+from time import perf_counter
+from typing import (
+    Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple)
+
+from sqlalchemy import Table, bindparam, func, select
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection, AsyncEngine, create_async_engine)
+
+from app.core.config import settings
+from app.core.db import Base
+from app.core.password import hash_password
+from app.crud.donation_bucket import recount_donation_buckets
+from app.crud.donor_stats import recount_donor_stats
+from app.crud.fund_stats import count_fund_stats, store_fund_stats
+from app.models import CharityProject, Donation, User
+
+SEED_PASSWORD = 'seed-password'
+DISTRIBUTIONS = ('lognormal', 'uniform')
+
+
+@dataclass
+class SeedConfig:
+    """
+    Параметры заполнения. Суммы задаются медианой: логнормальное
+    распределение с разбросом amount_sigma или равномерное от 1
+    до удвоенной медианы. user_skew задает перекос числа пожертвований
+    в сторону первых пользователей, 0 - равномерно.
+    """
+    users: int = 1000
+    projects: int = 10_000
+    donations: int = 100_000
+    seed: int = 0
+    days: float = 365
+    project_amount: int = 50_000
+    donation_amount: int = 1_000
+    amount_sigma: float = 1.0
+    distribution: str = 'lognormal'
+    user_skew: float = 1.0
+    batch_rows: int = 50_000
+
+
+@dataclass
+class SeedReport:
+    """Итоги заполнения."""
+    users: int = 0
+    projects: int = 0
+    donations: int = 0
+    closed_projects: int = 0
+    closed_donations: int = 0
+    updated: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.users + self.projects + self.donations
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+MICROSECOND = timedelta(microseconds=1)
+
+
+class Fund:
+    """
+    Проект или пожертвование в очереди распределения. Моменты
+    создания и закрытия хранятся в микросекундах от начала заполнения,
+    а даты - уже в виде значений для записи в базу.
+    """
+    __slots__ = (
+        'id', 'full_amount', 'invested_amount', 'created', 'create_date',
+        'closed', 'close_date', 'row', 'existing',
+    )
+
+    def __init__(
+            self,
+            id: int,
+            full_amount: int,
+            created: int,
+            create_date: Any,
+            row: Tuple = (),
+            invested_amount: int = 0,
+            existing: bool = False,
+    ) -> None:
+        self.id = id
+        self.full_amount = full_amount
+        self.invested_amount = invested_amount
+        self.created = created
+        self.create_date = create_date
+        self.closed: Optional[int] = None
+        self.close_date: Any = None
+        self.row = row
+        self.existing = existing
+
+
+def amount_sampler(
+        rng: random.Random,
+        distribution: str,
+        median: int,
+        sigma: float,
+) -> Callable[[], int]:
+    """Функция, возвращающая случайную положительную сумму."""
+    if distribution == 'uniform':
+        return lambda: rng.randint(1, 2 * median)
+    gauss = rng.gauss
+    return lambda: int(median * exp(sigma * gauss(0, 1))) or 1
+
+
+def event_times(
+        rng: random.Random,
+        count: int,
+        span: timedelta,
+) -> Iterator[int]:
+    """
+    count моментов в микросекундах по порядку,
+    по одному в каждом отрезке span/count.
+    """
+    step = span / MICROSECOND / max(count, 1)
+    random_value = rng.random
+    for number in range(count):
+        yield int(step * (number + random_value()))
+
+
+def sqlite_date(value: datetime) -> str:
+    """Дата в формате, в котором SQLAlchemy хранит DateTime в SQLite."""
+    return value.isoformat(' ', 'microseconds')
+
+
+class TableWriter:
+    """Буфер строк одной таблицы, записываемый пачками."""
+
+    def __init__(
+            self,
+            connection: AsyncConnection,
+            table: Table,
+            columns: Sequence[str],
+    ) -> None:
+        self.connection = connection
+        self.table = table
+        self.columns = tuple(columns)
+        self.rows: List[Tuple] = []
+        preparer = connection.dialect.identifier_preparer
+        self.insert_sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            preparer.format_table(table),
+            ', '.join(preparer.quote(name) for name in self.columns),
+            ', '.join('?' * len(self.columns)),
+        )
+
+    def take(self) -> List[Tuple]:
+        rows, self.rows = self.rows, []
+        return rows
+
+    async def insert(self, rows: List[Tuple]) -> None:
+        raw = (await self.connection.get_raw_connection()).driver_connection
+        if self.connection.dialect.name == 'postgresql':
+            await raw.copy_records_to_table(
+                self.table.name, records=rows, columns=self.columns
+            )
+        else:
+            await raw.executemany(self.insert_sql, rows)
+
+
+PROJECT_COLUMNS = (
+    'id', 'name', 'description', 'full_amount', 'invested_amount',
+    'fully_invested', 'create_date', 'close_date', 'collection_seconds',
+)
+DONATION_COLUMNS = (
+    'id', 'user_id', 'comment', 'full_amount', 'invested_amount',
+    'fully_invested', 'create_date', 'close_date',
+)
+USER_COLUMNS = (
+    'id', 'email', 'hashed_password', 'is_active', 'is_superuser',
+    'is_verified',
+)
+
+
+class Seeder:
+    """Моделирует поступление проектов и пожертвований по времени."""
+
+    def __init__(
+            self,
+            connection: AsyncConnection,
+            config: SeedConfig,
+            tables: Dict[str, Table],
+    ) -> None:
+        self.connection = connection
+        self.config = config
+        self.tables = tables
+        self.rng = random.Random(config.seed)
+        self.report = SeedReport()
+        self.open_projects: Deque[Fund] = deque()
+        self.open_donations: Deque[Fund] = deque()
+        self.updated: Dict[str, List[Fund]] = {
+            'charityproject': [], 'donation': []
+        }
+        self.projects = TableWriter(
+            connection, tables['charityproject'], PROJECT_COLUMNS
+        )
+        self.donations = TableWriter(
+            connection, tables['donation'], DONATION_COLUMNS
+        )
+        self.start = datetime.now()
+        self.pending: Optional[asyncio.Future] = None
+
+    async def flush(self, writer: TableWriter) -> None:
+        """
+        Запускает запись накопленных строк. Пока драйвер пишет пачку,
+        генерируется следующая; одновременно пишется одна пачка.
+        """
+        if not writer.rows:
+            return
+        rows = writer.take()
+        await self.wait()
+        self.pending = asyncio.ensure_future(writer.insert(rows))
+
+    async def wait(self) -> None:
+        pending, self.pending = self.pending, None
+        if pending is not None:
+            await pending
+
+    async def max_value(self, column) -> Any:
+        return await self.connection.scalar(select(func.max(column)))
+
+    async def load_open(
+            self, table: Table, queue: Deque[Fund], start: datetime) -> None:
+        """Незакрытые объекты базы встают в начало очереди."""
+        rows = await self.connection.execute(
+            select(
+                table.c.id, table.c.full_amount,
+                table.c.invested_amount, table.c.create_date,
+            )
+            .where(table.c.fully_invested.is_(False))
+            .order_by(table.c.create_date, table.c.id)
+        )
+        for id, full_amount, invested_amount, create_date in rows:
+            queue.append(Fund(
+                id, full_amount, (create_date - start) // MICROSECOND,
+                create_date, invested_amount=invested_amount or 0,
+                existing=True,
+            ))
+
+    def close(
+            self, fund: Fund, now: int, date: Any, is_project: bool) -> None:
+        fund.closed = now
+        fund.close_date = date
+        if is_project:
+            self.report.closed_projects += 1
+        else:
+            self.report.closed_donations += 1
+        self.write(fund, is_project)
+
+    def write(self, fund: Fund, is_project: bool) -> None:
+        if fund.existing:
+            table = 'charityproject' if is_project else 'donation'
+            self.updated[table].append(fund)
+            return
+        closed = fund.closed is not None
+        if is_project:
+            name, description = fund.row
+            self.projects.rows.append((
+                fund.id, name, description, fund.full_amount,
+                fund.invested_amount, closed, fund.create_date,
+                fund.close_date,
+                (fund.closed - fund.created) // 1_000_000 if closed else None,
+            ))
+        else:
+            user_id, comment = fund.row
+            self.donations.rows.append((
+                fund.id, user_id, comment, fund.full_amount,
+                fund.invested_amount, closed, fund.create_date,
+                fund.close_date,
+            ))
+
+    def invest(self, fund: Fund, queue: Deque[Fund], is_project: bool) -> None:
+        """Распределение как в app.services.invest_process."""
+        while queue and fund.invested_amount < fund.full_amount:
+            other = queue[0]
+            amount = min(
+                fund.full_amount - fund.invested_amount,
+                other.full_amount - other.invested_amount,
+            )
+            fund.invested_amount += amount
+            other.invested_amount += amount
+            if other.invested_amount == other.full_amount:
+                queue.popleft()
+                self.close(other, fund.created, fund.create_date,
+                           not is_project)
+            elif other.existing:
+                self.updated[
+                    'donation' if is_project else 'charityproject'
+                ].append(other)
+        if fund.invested_amount == fund.full_amount:
+            self.close(fund, fund.created, fund.create_date, is_project)
+        else:
+            (self.open_projects if is_project
+             else self.open_donations).append(fund)
+
+    async def seed_users(self, first_id: int) -> None:
+        """Создает config.users пользователей с id от first_id."""
+        users = TableWriter(self.connection, self.tables['user'], USER_COLUMNS)
+        # Один хеш на всех: пароль у сгенерированных пользователей общий.
+        hashed_password = await hash_password(SEED_PASSWORD)
+        for user_id in range(first_id, first_id + self.config.users):
+            users.rows.append((
+                user_id, f'seed{user_id}@example.com', hashed_password,
+                True, False, True,
+            ))
+        await users.insert(users.take())
+        self.report.users = self.config.users
+
+    async def run(self) -> SeedReport:
+        config = self.config
+        rng = self.rng
+        first_user = (
+            await self.max_value(self.tables['user'].c.id) or 0) + 1
+        project_table = self.tables['charityproject']
+        donation_table = self.tables['donation']
+        project_id = (await self.max_value(project_table.c.id) or 0) + 1
+        donation_id = (await self.max_value(donation_table.c.id) or 0) + 1
+        span = timedelta(days=config.days)
+        start = datetime.now() - span
+        latest = [
+            await self.max_value(table.c.create_date)
+            for table in (project_table, donation_table)
+        ]
+        latest = [value for value in latest if value is not None]
+        if latest and max(latest) > start:
+            start = max(latest)
+        self.start = start
+        await self.load_open(project_table, self.open_projects, start)
+        await self.load_open(donation_table, self.open_donations, start)
+        if config.users:
+            last_user = first_user + config.users - 1
+            # Пароль хешируется в пуле, пока генерируется первая пачка,
+            # а пользователи записываются раньше любой другой пачки.
+            self.pending = asyncio.ensure_future(self.seed_users(first_user))
+        else:
+            first_user, last_user = 1, first_user - 1
+        date = (
+            sqlite_date if self.connection.dialect.name == 'sqlite'
+            else lambda value: value
+        )
+        project_amount = amount_sampler(
+            rng, config.distribution, config.project_amount,
+            config.amount_sigma,
+        )
+        donation_amount = amount_sampler(
+            rng, config.distribution, config.donation_amount,
+            config.amount_sigma,
+        )
+        users_count = last_user - first_user + 1
+        exponent = 1 + config.user_skew
+        batch_rows = config.batch_rows
+
+        projects = event_times(rng, config.projects, span)
+        donations = event_times(rng, config.donations, span)
+        next_project = next(projects, None)
+        next_donation = next(donations, None)
+        while next_project is not None or next_donation is not None:
+            if next_donation is None or (
+                    next_project is not None and next_project <= next_donation):
+                fund = Fund(
+                    project_id, project_amount(), next_project,
+                    date(start + MICROSECOND * next_project),
+                    (f'Проект {project_id}', f'Описание проекта {project_id}'),
+                )
+                project_id += 1
+                self.invest(fund, self.open_donations, True)
+                next_project = next(projects, None)
+            else:
+                user_id = (
+                    first_user + int(users_count * rng.random() ** exponent)
+                    if users_count > 0 else None
+                )
+                fund = Fund(
+                    donation_id, donation_amount(), next_donation,
+                    date(start + MICROSECOND * next_donation),
+                    (user_id, None),
+                )
+                donation_id += 1
+                self.invest(fund, self.open_projects, False)
+                next_donation = next(donations, None)
+            if len(self.donations.rows) >= batch_rows:
+                await self.flush(self.donations)
+            if len(self.projects.rows) >= batch_rows:
+                await self.flush(self.projects)
+
+        for queue, is_project in (
+                (self.open_projects, True), (self.open_donations, False)):
+            for fund in queue:
+                if not fund.existing:
+                    self.write(fund, is_project)
+        await self.flush(self.projects)
+        await self.flush(self.donations)
+        await self.wait()
+        await self.update_existing()
+        await self.reset_sequences()
+        # Строки пишутся в обход ORM, поэтому сводка фонда, итоги
+        # пользователей и интервалы пожертвований пересчитываются целиком.
+        await self.connection.run_sync(
+            lambda connection: store_fund_stats(
+                connection, count_fund_stats(connection))
+        )
+        await self.connection.run_sync(recount_donor_stats)
+        await self.connection.run_sync(recount_donation_buckets)
+        self.report.projects = config.projects
+        self.report.donations = config.donations
+        return self.report
+
+    async def update_existing(self) -> None:
+        """Сохраняет распределение в объекты, бывшие в базе до заполнения."""
+        for name, funds in self.updated.items():
+            if not funds:
+                continue
+            table = self.tables[name]
+            values = {
+                fund.id: {
+                    'fund_id': fund.id,
+                    'invested_amount': fund.invested_amount,
+                    'fully_invested': fund.closed is not None,
+                    'close_date': (
+                        self.start + fund.closed * MICROSECOND
+                        if fund.closed is not None else None
+                    ),
+                }
+                for fund in funds
+            }
+            statement = table.update().where(
+                table.c.id == bindparam('fund_id')
+            ).values(
+                invested_amount=bindparam('invested_amount'),
+                fully_invested=bindparam('fully_invested'),
+                close_date=bindparam('close_date'),
+            )
+            await self.connection.execute(statement, list(values.values()))
+            if name == 'charityproject':
+                closed = [
+                    {'fund_id': fund.id,
+                     'seconds': (fund.closed - fund.created) // 1_000_000}
+                    for fund in funds if fund.closed is not None
+                ]
+                if closed:
+                    await self.connection.execute(
+                        table.update()
+                        .where(table.c.id == bindparam('fund_id'))
+                        .values(collection_seconds=bindparam('seconds')),
+                        closed,
+                    )
+            self.report.updated += len(values)
+
+    async def reset_sequences(self) -> None:
+        """После COPY с явными id сдвигает счетчики id PostgreSQL."""
+        if self.connection.dialect.name != 'postgresql':
+            return
+        for table in self.tables.values():
+            await self.connection.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('\"{0}\"', 'id'), "
+                'COALESCE((SELECT MAX(id) FROM "{0}"), 1))'.format(table.name)
+            )
+
+
+async def seed(engine: AsyncEngine, config: SeedConfig) -> SeedReport:
+    """
+    Заполняет базу одной транзакцией
+    #### Args:
+    - engine (AsyncEngine): Движок базы данных.
+    - config (SeedConfig): Количество объектов и распределения сумм.
+    #### Returns:
+    - SeedReport: Количество созданных и закрытых объектов и скорость.
+    """
+    tables = {
+        model.__tablename__: model.__table__
+        for model in (CharityProject, Donation, User)
+    }
+    start = perf_counter()
+    async with engine.begin() as connection:
+        report = await Seeder(connection, config, tables).run()
+    report.seconds = perf_counter() - start
+    return report
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(
+        description='Массовое заполнение базы тестовыми данными.'
+    )
+    for name, value in vars(defaults).items():
+        option = '--' + name.replace('_', '-')
+        if name == 'distribution':
+            parser.add_argument(option, choices=DISTRIBUTIONS, default=value)
+        else:
+            parser.add_argument(option, type=type(value), default=value)
+    parser.add_argument(
+        '--database-url',
+        help='База для заполнения. По умолчанию DATABASE_URL приложения.',
+    )
+    parser.add_argument(
+        '--create-tables', action='store_true',
+        help='Создать таблицы, если их нет, вместо миграций Alembic.',
+    )
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> SeedReport:
+    engine = create_async_engine(args.database_url or settings.database_url)
+    config = SeedConfig(**{
+        name: getattr(args, name) for name in vars(SeedConfig())
+    })
+    try:
+        if args.create_tables:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        return await seed(engine, config)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    report = asyncio.run(main(parse_args()))
+    print(
+        f'Пользователей: {report.users}, проектов: {report.projects} '
+        f'(закрыто {report.closed_projects}), пожертвований: '
+        f'{report.donations} (закрыто {report.closed_donations}), '
+        f'обновлено существующих: {report.updated}.\n'
+        f'{report.rows} строк за {report.seconds:.2f} с, '
+        f'{report.rows_per_second:,.0f} строк/с'
+    )
@@ -7,7 +7,17 @@ class Settings(BaseSettings):
     app_title: str = 'Кошачий благотворительный фонд'
     description: str = 'Сервис для поддержки котиков!'
     secret: str = 'SECRET'
+    jwt_signed_claims: bool = False
+    user_cache_ttl: float = 60
+    user_cache_size: int = 1024
+    progress_cache_ttl: float = 5
+    progress_cache_size: int = 10000
+    progress_max_ids: int = 100
+    password_hash_workers: int = 2
+    password_hash_processes: bool = False
     database_url: str = 'sqlite+aiosqlite:///./fastapi.db'
+    replica_url: Optional[str] = None
+    replica_sticky_seconds: float = 5
     type: Optional[str] = None
     project_id: Optional[str] = None
     private_key_id: Optional[str] = None
@@ -19,6 +29,26 @@ class Settings(BaseSettings):
     auth_provider_x509_cert_url: Optional[str] = None
     client_x509_cert_url: Optional[str] = None
     email: Optional[str] = None
+    google_discovery_cache_dir: str = '.cache/google_discovery'
+    google_discovery_ttl: int = 86400
+    google_pool_size: int = 10
+    google_sheets_chunk_rows: int = 1000
+    google_sheets_rate: float = 1.0
+    google_drive_rate: float = 10.0
+    google_rate_burst: int = 5
+    google_retry_attempts: int = 5
+    google_backoff_base: float = 0.5
+    google_backoff_max: float = 30.0
+    report_jobs_concurrency: int = 2
+    report_jobs_history: int = 100
+    report_chunk_rows: int = 1000
+    report_refresh_overlap: float = 3600
+    request_timing: bool = True
+    profiler_interval: float = 0.005
+    profiler_history: int = 20
+    slow_query_seconds: float = 0.2
+    slow_query_log_interval: float = 60
+    slow_query_explain: bool = False
 
     class Config:
         env_file = '.env'
@@ -1,8 +1,30 @@
-from sqlalchemy import Column, Integer
+import hashlib
+import logging
+import sys
+from dataclasses import dataclass
+from time import monotonic, perf_counter
+from typing import Dict, Iterator, Optional
+
+import greenlet
+from fastapi import Request
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declared_attr, declarative_base, sessionmaker
+from sqlalchemy.orm import (
+    Session, declared_attr, declarative_base, sessionmaker)
 
 from .config import settings
+from .metrics import pool_checkout_wait, registry
+from .timing import add_phase
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(f'{__name__}.slow_query')
+
+STICKY_CLIENTS_LIMIT = 10000
+SLOW_QUERY_SHAPES_LIMIT = 1000
+SLOW_QUERY_PARAMETERS_LENGTH = 500
+CALLER_MODULES = ('app.crud', 'app.services', 'app.api')
+EXPLAIN_PREFIXES = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
 
 
 class PreBase:
@@ -18,12 +40,295 @@ Base = declarative_base(cls=PreBase)
 
 engine = create_async_engine(settings.database_url)
 
-async_session = AsyncSession(engine)
+replica_engine = (
+    create_async_engine(settings.replica_url)
+    if settings.replica_url else engine
+)
+
+
+@dataclass
+class CheckoutStats:
+    """Накопленная статистика ожидания соединений из пула."""
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+checkout_stats = CheckoutStats()
+
+
+class MeteredSession(Session):
+    """
+    Сессия, измеряющая время получения соединения.
+    Соединение берется из пула только при первом запросе к базе,
+    время от первого запроса до начала транзакции накапливается
+    в info['checkout_seconds'].
+    """
+
+
+def _start_checkout(session: Session) -> None:
+    if not session.info.get('connected'):
+        session.info.setdefault('checkout_started', perf_counter())
+
+
+@event.listens_for(MeteredSession, 'do_orm_execute')
+def _on_execute(orm_execute_state) -> None:
+    _start_checkout(orm_execute_state.session)
+
+
+@event.listens_for(MeteredSession, 'before_flush')
+def _on_flush(session, flush_context, instances) -> None:
+    _start_checkout(session)
+
+
+@event.listens_for(MeteredSession, 'after_begin')
+def _on_begin(session, transaction, connection) -> None:
+    session.info['connected'] = True
+    started = session.info.pop('checkout_started', None)
+    if started is not None:
+        seconds = perf_counter() - started
+        session.info['checkout_seconds'] = (
+            session.info.get('checkout_seconds', 0.0) + seconds)
+        checkout_stats.add(seconds)
+        add_phase('pool', seconds)
+        pool_checkout_wait.observe(seconds)
+
+
+@event.listens_for(MeteredSession, 'after_commit')
+def _on_commit(session) -> None:
+    session.info['committed'] = True
+
+
+@event.listens_for(MeteredSession, 'after_transaction_end')
+def _on_transaction_end(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info['connected'] = False
+
+
+AsyncSessionLocal = sessionmaker(
+    engine,
+    class_=AsyncSession,
+    sync_session_class=MeteredSession,
+    expire_on_commit=False,
+)
+
+AsyncReadSessionLocal = sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    sync_session_class=MeteredSession,
+    expire_on_commit=False,
+)
+
+
+def _pool_samples(method: str) -> Iterator:
+    """Значения пулов соединений основной базы и реплики."""
+    engines = {'primary': engine}
+    if replica_engine is not engine:
+        engines['replica'] = replica_engine
+    for name, async_engine in engines.items():
+        value = getattr(async_engine.sync_engine.pool, method, None)
+        if value is not None:
+            yield {'engine': name}, value()
 
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
 
+registry.callback(
+    'db_pool_connections_in_use',
+    'Соединения, выданные из пула.',
+    'gauge',
+    lambda: _pool_samples('checkedout'),
+)
+registry.callback(
+    'db_pool_size',
+    'Размер пула соединений.',
+    'gauge',
+    lambda: _pool_samples('size'),
+)
 
-async def get_async_session():
 
+@dataclass
+class SlowQueryShape:
+    """Статистика медленных выполнений одного текста SQL-запроса."""
+    count: int = 0
+    max_seconds: float = 0.0
+    suppressed: int = 0
+    logged_at: Optional[float] = None
+    plan: Optional[str] = None
+
+
+# Текст SQL-запроса с плейсхолдерами -> статистика медленных выполнений.
+slow_queries: Dict[str, SlowQueryShape] = {}
+
+
+def _query_caller() -> str:
+    """
+    Функция приложения, выполнившая запрос. Синхронная часть
+    SQLAlchemy работает в дочернем greenlet, поэтому после его стека
+    просматривается стек корутины в родительском greenlet.
+    """
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '')
+            if module.startswith(CALLER_MODULES):
+                code = frame.f_code
+                return f'{module}.{getattr(code, "co_qualname", code.co_name)}'
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return 'unknown'
+        frame = current.gr_frame
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """План выполнения запроса или None для неподдерживаемых запросов."""
+    if not statement.lstrip().upper().startswith(EXPLAIN_PREFIXES):
+        return None
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    )
+    conn.info['slow_query_explain'] = True
+    try:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    except Exception as error:
+        return f'EXPLAIN не выполнен: {error}'
+    finally:
+        conn.info['slow_query_explain'] = False
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_slow_query(
+        conn, cursor, statement, parameters, context, executemany) -> None:
+    # Начало хранится в контексте выполнения, а не в соединении:
+    # после ошибки запроса after_cursor_execute не вызывается,
+    # и в соединении из пула осталось бы устаревшее значение.
+    if settings.slow_query_seconds > 0 and context is not None:
+        context._slow_query_start = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_slow_query(
+        conn, cursor, statement, parameters, context, executemany) -> None:
+    start = getattr(context, '_slow_query_start', None)
+    if start is None:
+        return
+    seconds = perf_counter() - start
+    if (seconds < settings.slow_query_seconds or
+            conn.info.get('slow_query_explain')):
+        return
+    shape = slow_queries.get(statement)
+    if shape is None:
+        if len(slow_queries) >= SLOW_QUERY_SHAPES_LIMIT:
+            return
+        shape = slow_queries[statement] = SlowQueryShape()
+        if (settings.slow_query_explain and not executemany and
+                not context.execution_options.get('stream_results')):
+            shape.plan = _explain(conn, statement, parameters)
+    shape.count += 1
+    shape.max_seconds = max(shape.max_seconds, seconds)
+    now = monotonic()
+    if (shape.logged_at is not None and
+            now - shape.logged_at < settings.slow_query_log_interval):
+        shape.suppressed += 1
+        return
+    slow_query_logger.warning(
+        'Медленный запрос %.3f с из %s (пропущено с прошлой записи: %d)'
+        '\n%s\nПараметры: %s%s',
+        seconds, _query_caller(), shape.suppressed, statement,
+        repr(parameters)[:SLOW_QUERY_PARAMETERS_LENGTH],
+        f'\nПлан:\n{shape.plan}' if shape.plan and shape.logged_at is None
+        else '',
+    )
+    shape.logged_at = now
+    shape.suppressed = 0
+
+
+registry.callback(
+    'db_slow_queries_total',
+    'Запросы дольше slow_query_seconds.',
+    'counter',
+    lambda: [({}, sum(shape.count for shape in slow_queries.values()))],
+)
+
+# Клиенты, недавно выполнившие запись: ключ клиента -> время записи.
+_recent_writes: Dict[str, float] = {}
+
+
+def _client_key(request: Request) -> str:
+    """Ключ клиента: хеш заголовка авторизации, а без него адрес клиента.
+
+    Сам токен не хранится, чтобы живые JWT не оседали в памяти процесса.
+    """
+    authorization = request.headers.get('authorization')
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else ''
+
+
+def _remember_write(request: Request) -> None:
+    """Запоминает момент записи клиента для чтения своих записей."""
+    now = monotonic()
+    if len(_recent_writes) >= STICKY_CLIENTS_LIMIT:
+        for key, write_time in list(_recent_writes.items()):
+            if now - write_time > settings.replica_sticky_seconds:
+                del _recent_writes[key]
+    _recent_writes[_client_key(request)] = now
+
+
+def _is_sticky(request: Request) -> bool:
+    """Проверяет, писал ли клиент в основную базу в последние секунды."""
+    write_time = _recent_writes.get(_client_key(request))
+    return (
+        write_time is not None and
+        monotonic() - write_time <= settings.replica_sticky_seconds
+    )
+
+
+def _record_checkout(request: Request, async_session: AsyncSession) -> None:
+    """Сохраняет время ожидания соединения в состоянии запроса."""
+    seconds = async_session.sync_session.info.get('checkout_seconds')
+    if seconds is None:
+        return
+    request.state.db_checkout_seconds = (
+        getattr(request.state, 'db_checkout_seconds', 0.0) + seconds)
+    logger.debug(
+        '%s %s: ожидание соединения %.6f с',
+        request.method, request.url.path, seconds
+    )
+
+
+async def get_async_session(request: Request):
+    """
+    Сессия основной базы данных для запросов с записью.
+    Соединение из пула берется только при первом запросе к базе,
+    поэтому отклоненные до обращения к базе запросы его не занимают.
+    Клиент читает из основной базы, только если запись зафиксирована.
+    """
     async with AsyncSessionLocal() as async_session:
         yield async_session
+    _record_checkout(request, async_session)
+    if (replica_engine is not engine and
+            settings.replica_sticky_seconds > 0 and
+            async_session.sync_session.info.get('committed')):
+        _remember_write(request)
+
+
+async def get_async_read_session(request: Request):
+    """
+    Сессия только для чтения, привязанная к реплике.
+    Без настроенной реплики, а также в течение replica_sticky_seconds
+    после записи этого же клиента, возвращает сессию основной базы.
+    """
+    if replica_engine is engine or _is_sticky(request):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = AsyncReadSessionLocal
+    async with session_factory() as async_session:
+        yield async_session
+    _record_checkout(request, async_session)
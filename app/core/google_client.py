@@ -1,8 +1,26 @@
+import asyncio
+import json
+import logging
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from http import HTTPStatus as st
+from pathlib import Path
+from time import monotonic, perf_counter, time
+from typing import Any, Dict, Optional, Tuple
+
 from aiogoogle import Aiogoogle
 from aiogoogle.auth.creds import ServiceAccountCreds
+from aiogoogle.excs import HTTPError
+from aiogoogle.models import Request
+from aiogoogle.resource import GoogleAPI
+from aiogoogle.sessions.aiohttp_session import AiohttpSession
+from aiohttp import ClientError, TCPConnector
 
 from app.core.config import settings
+from app.core.metrics import google_request_latency, registry
 
+logger = logging.getLogger(__name__)
 
 SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
@@ -20,11 +38,356 @@ INFO = {
     'auth_provider_x509_cert_url': settings.auth_provider_x509_cert_url,
     'client_x509_cert_url': settings.client_x509_cert_url
 }
+GOOGLE_APIS = (('sheets', 'v4'), ('drive', 'v3'))
+RETRY_STATUSES = frozenset((
+    st.TOO_MANY_REQUESTS, st.INTERNAL_SERVER_ERROR, st.BAD_GATEWAY,
+    st.SERVICE_UNAVAILABLE, st.GATEWAY_TIMEOUT,
+))
 
 
 cred = ServiceAccountCreds(scopes=SCOPES, **INFO)
 
 
+class DiscoveryCache:
+    """
+    Кэш discovery-документов Google API в памяти и на диске.
+    Документ скачивается только если его нет в кэше
+    или он старше google_discovery_ttl. Копия в памяти устаревает
+    вместе с файлом, из которого загружена.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        # (имя, версия) -> (описание API, время устаревания).
+        self.apis: Dict[Tuple[str, str], Tuple[GoogleAPI, float]] = {}
+
+    def _path(self, api_name: str, api_version: str) -> Path:
+        return self.cache_dir / f'{api_name}_{api_version}.json'
+
+    def get(self, api_name: str, api_version: str) -> Optional[GoogleAPI]:
+        """Документ из памяти, если он не устарел."""
+        api, expires = self.apis.get((api_name, api_version), (None, 0))
+        if time() > expires:
+            self.apis.pop((api_name, api_version), None)
+            return None
+        return api
+
+    def load(self, api_name: str, api_version: str) -> Optional[GoogleAPI]:
+        """Загружает документ с диска в память, если он не устарел."""
+        path = self._path(api_name, api_version)
+        try:
+            expires = path.stat().st_mtime + self.ttl
+            if time() > expires:
+                return None
+            document = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        api = GoogleAPI(document)
+        self.apis[api_name, api_version] = api, expires
+        return api
+
+    def save(self, api_name: str, api_version: str, api: GoogleAPI) -> None:
+        """Сохраняет документ в память и на диск."""
+        self.apis[api_name, api_version] = api, time() + self.ttl
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._path(api_name, api_version).write_text(
+                json.dumps(api.discovery_document), encoding='utf-8'
+            )
+        except OSError as error:
+            logger.warning('Не удалось сохранить discovery-документ: %s', error)
+
+    async def discover(
+            self,
+            wrapper_services: Aiogoogle,
+            api_name: str,
+            api_version: str,
+    ) -> GoogleAPI:
+        """
+        Возвращает описание API из кэша, скачивая его при необходимости.
+        #### Args:
+        - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+        - api_name (str): Имя API, например sheets.
+        - api_version (str): Версия API, например v4.
+        #### Returns:
+        - GoogleAPI: Описание API для построения запросов.
+        """
+        api = (
+            self.get(api_name, api_version) or
+            self.load(api_name, api_version)
+        )
+        if api is None:
+            api = await wrapper_services.discover(api_name, api_version)
+            self.save(api_name, api_version, api)
+        return api
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов: rate запросов в секунду
+    с запасом burst. Нулевой rate снимает ограничение.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Ждет свободный токен и возвращает время ожидания в секундах."""
+        if self.rate <= 0:
+            return 0
+        async with self.lock:
+            now = monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            delay = 0.0
+            if self.tokens < 1:
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                self.tokens = 1.0
+                self.updated = monotonic()
+            self.tokens -= 1
+            return delay
+
+
+@dataclass
+class GoogleApiStats:
+    """Счетчики запросов к Google API по именам API."""
+    requests: Counter = field(default_factory=Counter)
+    retries: Counter = field(default_factory=Counter)
+    failures: Counter = field(default_factory=Counter)
+    backoff_seconds: Counter = field(default_factory=Counter)
+    throttle_seconds: Counter = field(default_factory=Counter)
+    rows_written: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': dict(self.requests),
+            'retries': dict(self.retries),
+            'failures': dict(self.failures),
+            'backoff_seconds': {
+                api: round(value, 3)
+                for api, value in self.backoff_seconds.items()
+            },
+            'throttle_seconds': {
+                api: round(value, 3)
+                for api, value in self.throttle_seconds.items()
+            },
+            'rows_written': self.rows_written,
+        }
+
+
+def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+    """
+    Можно ли повторить запрос после ошибки.
+    На 429 Google отклоняет запрос до выполнения, поэтому его можно
+    повторить всегда. Ошибки 5xx и обрывы соединения повторяются
+    только для идемпотентных запросов.
+    """
+    if isinstance(error, HTTPError):
+        status = error.res.status_code if error.res is not None else None
+        if status == st.TOO_MANY_REQUESTS:
+            return True
+        return idempotent and status in RETRY_STATUSES
+    return idempotent and isinstance(
+        error, (ClientError, asyncio.TimeoutError)
+    )
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """
+    Пауза перед повтором: экспоненциальная с полным случайным
+    разбросом, но не меньше Retry-After из ответа Google.
+    """
+    delay = random.uniform(0, min(
+        settings.google_backoff_max,
+        settings.google_backoff_base * 2 ** attempt,
+    ))
+    res = getattr(error, 'res', None)
+    retry_after = (res.headers or {}).get('Retry-After') if res else None
+    try:
+        delay = max(delay, float(retry_after))
+    except (TypeError, ValueError):
+        pass
+    return min(delay, settings.google_backoff_max)
+
+
+class GoogleClient:
+    """
+    Долгоживущий клиент Aiogoogle с общим пулом HTTP-соединений.
+    Запускается и останавливается вместе с приложением.
+    """
+
+    def __init__(self) -> None:
+        self.aiogoogle = Aiogoogle(service_account_creds=cred)
+        self.session: Optional[AiohttpSession] = None
+        self.discovery = DiscoveryCache(
+            settings.google_discovery_cache_dir,
+            settings.google_discovery_ttl,
+        )
+        self.stats = GoogleApiStats()
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.configure_buckets()
+
+    def configure_buckets(self) -> None:
+        """Создает ограничители частоты запросов по настройкам."""
+        self.buckets = {
+            'sheets': TokenBucket(
+                settings.google_sheets_rate, settings.google_rate_burst
+            ),
+            'drive': TokenBucket(
+                settings.google_drive_rate, settings.google_rate_burst
+            ),
+        }
+
+    async def call(
+            self,
+            wrapper_services: Aiogoogle,
+            api_name: str,
+            request: Request,
+            idempotent: bool = True,
+    ) -> Any:
+        """
+        Выполняет запрос от имени сервисного аккаунта с ограничением
+        частоты по API и повтором после временных ошибок.
+        #### Args:
+        - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+        - api_name (str): Имя API, по нему выбирается ограничитель.
+        - request (Request): Подготовленный запрос Aiogoogle.
+        - idempotent (bool): Можно ли повторять запрос после ошибок 5xx.
+        #### Returns:
+        - Any: Ответ Google API.
+        """
+        bucket = self.buckets.get(api_name)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                self.stats.throttle_seconds[api_name] += await bucket.acquire()
+            self.stats.requests[api_name] += 1
+            start = perf_counter()
+            try:
+                response = await wrapper_services.as_service_account(request)
+            except Exception as error:
+                google_request_latency.observe(
+                    perf_counter() - start, api_name, 'error'
+                )
+                if (attempt + 1 >= settings.google_retry_attempts or
+                        not is_retryable(error, idempotent)):
+                    self.stats.failures[api_name] += 1
+                    raise
+                delay = backoff_delay(attempt, error)
+                logger.warning(
+                    'Повтор запроса к %s через %.2f с: %s',
+                    api_name, delay, error
+                )
+                self.stats.retries[api_name] += 1
+                self.stats.backoff_seconds[api_name] += delay
+                attempt += 1
+                await asyncio.sleep(delay)
+            else:
+                google_request_latency.observe(
+                    perf_counter() - start, api_name, 'ok'
+                )
+                return response
+
+    async def start(self) -> None:
+        """Открывает пул соединений и загружает discovery-документы."""
+        self.configure_buckets()
+        self.session = AiohttpSession(
+            connector=TCPConnector(limit=settings.google_pool_size)
+        )
+        for api_name, api_version in GOOGLE_APIS:
+            if self.discovery.load(api_name, api_version) is not None:
+                continue
+            if settings.client_email is None:
+                continue
+            self.aiogoogle.session_context.set(self.session)
+            try:
+                await self.discovery.discover(
+                    self.aiogoogle, api_name, api_version
+                )
+            except Exception as error:
+                logger.warning(
+                    'Не удалось загрузить discovery-документ %s %s: %s',
+                    api_name, api_version, error
+                )
+            finally:
+                self.aiogoogle.session_context.set(None)
+
+    async def stop(self) -> None:
+        """Закрывает пул соединений."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+google_client = GoogleClient()
+
+
+def _stats_samples(counter: str):
+    for api_name, value in getattr(google_client.stats, counter).items():
+        yield {'api': api_name}, value
+
+
+for counter, documentation in (
+        ('retries', 'Повторы запросов к Google API.'),
+        ('failures', 'Запросы к Google API, завершившиеся ошибкой.'),
+        ('backoff_seconds', 'Суммарная пауза перед повторами.'),
+        ('throttle_seconds', 'Суммарное ожидание ограничителя частоты.'),
+):
+    registry.callback(
+        f'google_api_{counter}_total', documentation, 'counter',
+        lambda counter=counter: _stats_samples(counter),
+    )
+registry.callback(
+    'google_api_rows_written_total',
+    'Проекты, записанные в Google таблицы.',
+    'counter',
+    lambda: [({}, google_client.stats.rows_written)],
+)
+
+
+async def discover(
+        wrapper_services: Aiogoogle,
+        api_name: str,
+        api_version: str,
+) -> GoogleAPI:
+    """Описание Google API из общего кэша discovery-документов."""
+    return await google_client.discovery.discover(
+        wrapper_services, api_name, api_version
+    )
+
+
+async def call(
+        wrapper_services: Aiogoogle,
+        api_name: str,
+        request: Request,
+        idempotent: bool = True,
+) -> Any:
+    """Запрос к Google API с ограничением частоты и повторами."""
+    return await google_client.call(
+        wrapper_services, api_name, request, idempotent
+    )
+
+
 async def get_service():
-    async with Aiogoogle(service_account_creds=cred) as aiogoogle:
-        yield aiogoogle
+    """
+    Отдает общий клиент Aiogoogle, привязывая к запросу пул соединений.
+    Если клиент не запущен (например, вне приложения),
+    открывает временную сессию.
+    """
+    if google_client.session is None:
+        async with Aiogoogle(service_account_creds=cred) as aiogoogle:
+            yield aiogoogle
+        return
+    google_client.aiogoogle.session_context.set(google_client.session)
+    try:
+        yield google_client.aiogoogle
+    finally:
+        google_client.aiogoogle.session_context.set(None)
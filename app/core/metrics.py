@@ -0,0 +1,171 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+def escape(value: str) -> str:
+    return (
+        str(value).replace('\\', '\\\\')
+        .replace('\n', '\\n').replace('"', '\\"')
+    )
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape(value)}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus.
+    Наблюдение увеличивает один счетчик корзины без блокировок:
+    метрики обновляются из цикла событий, накопленные значения
+    по корзинам считаются только при выдаче /metrics.
+    """
+    type = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Значения меток -> [счетчики корзин..., +Inf, сумма].
+        self.values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values.setdefault(
+                labels, [0] * (len(self.buckets) + 2)
+            )
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def render(self) -> Iterable[str]:
+        for labels, state in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(
+                    self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                bucket_labels = format_labels(
+                    self.labelnames + ('le',),
+                    labels + (format_value(bound),),
+                )
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            series = format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{series} {format_value(state[-1])}'
+            yield f'{self.name}_count{series} {cumulative}'
+
+
+class CallbackMetric:
+    """
+    Счетчик или gauge, значения которого считываются при выдаче
+    /metrics из уже существующей статистики приложения.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            type: str,
+            callback: Callable[[], Iterable[Sample]],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.callback = callback
+
+    def render(self) -> Iterable[str]:
+        for labels, value in self.callback():
+            series = format_labels(tuple(labels), tuple(labels.values()))
+            yield f'{self.name}{series} {format_value(value)}'
+
+
+class MetricsRegistry:
+    """Набор метрик, выдаваемых в текстовом формате Prometheus."""
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def callback(self, *args, **kwargs) -> CallbackMetric:
+        return self.register(CallbackMetric(*args, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+request_latency = registry.histogram(
+    'http_request_duration_seconds',
+    'Длительность обработки запроса по маршрутам.',
+    ('method', 'route', 'status'),
+)
+allocation_duration = registry.histogram(
+    'allocation_duration_seconds',
+    'Длительность одного распределения средств.',
+    ('model',),
+)
+allocation_batch_size = registry.histogram(
+    'allocation_batch_size',
+    'Количество открытых объектов, загруженных для распределения.',
+    ('model',),
+    SIZE_BUCKETS,
+)
+allocation_rows_touched = registry.histogram(
+    'allocation_rows_touched',
+    'Количество объектов, измененных одним распределением.',
+    ('model',),
+    SIZE_BUCKETS,
+)
+pool_checkout_wait = registry.histogram(
+    'db_pool_checkout_wait_seconds',
+    'Ожидание соединения из пула с первого запроса сессии.',
+)
+google_request_latency = registry.histogram(
+    'google_api_request_duration_seconds',
+    'Длительность запросов к Google API, включая повторы.',
+    ('api', 'outcome'),
+)
+report_duration = registry.histogram(
+    'report_duration_seconds',
+    'Длительность формирования отчета в Google Sheets.',
+    ('mode',),
+)
@@ -0,0 +1,135 @@
+import asyncio
+from concurrent.futures import (
+    Executor, ProcessPoolExecutor, ThreadPoolExecutor)
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi_users.password import PasswordHelper
+
+from app.core.config import settings
+from app.core.timing import phase
+
+_helper = PasswordHelper()
+# Результаты, посчитанные в пуле для текущего вызова менеджера.
+_prepared: ContextVar[Optional[Dict[Tuple, object]]] = ContextVar(
+    'prepared_passwords', default=None
+)
+
+
+class PreparedPasswordHelper(PasswordHelper):
+    """
+    Помощник паролей для fastapi-users.
+    Библиотека вызывает hash и verify_and_update синхронно, поэтому
+    менеджер пользователей заранее считает их в пуле через
+    prepared_password, а помощник возвращает готовый результат.
+    Без подготовленного результата пароль обрабатывается на месте.
+    """
+
+    def hash(self, password: str) -> str:
+        prepared = _prepared.get()
+        if prepared is not None and ('hash', password) in prepared:
+            return prepared[('hash', password)]
+        return super().hash(password)
+
+    def verify_and_update(
+            self,
+            plain_password: str,
+            hashed_password: str,
+    ) -> Tuple[bool, Optional[str]]:
+        key = ('verify', plain_password, hashed_password)
+        prepared = _prepared.get()
+        if prepared is not None and key in prepared:
+            return prepared[key]
+        return super().verify_and_update(plain_password, hashed_password)
+
+
+password_helper = PreparedPasswordHelper()
+
+
+def _hash(password: str) -> str:
+    return _helper.hash(password)
+
+
+def _verify_and_update(
+        plain_password: str,
+        hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    return _helper.verify_and_update(plain_password, hashed_password)
+
+
+def _create_executor() -> Executor:
+    """
+    Пул для хеширования паролей вне цикла событий.
+    bcrypt отпускает GIL, поэтому по умолчанию достаточно потоков.
+    """
+    if settings.password_hash_processes:
+        return ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+    return ThreadPoolExecutor(
+        max_workers=settings.password_hash_workers,
+        thread_name_prefix='password-hash',
+    )
+
+
+password_executor = _create_executor()
+
+
+async def hash_password(password: str) -> str:
+    """
+    Хеширует пароль в пуле password_executor.
+    #### Args:
+        - password (str): Пароль в открытом виде.
+    #### Returns:
+        - str: Хеш пароля.
+    """
+    loop = asyncio.get_running_loop()
+    with phase('password'):
+        return await loop.run_in_executor(
+            password_executor, _hash, password)
+
+
+async def verify_and_update_password(
+        plain_password: str,
+        hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Проверяет пароль в пуле password_executor.
+    #### Args:
+        - plain_password (str): Пароль в открытом виде.
+        - hashed_password (str): Сохраненный хеш пароля.
+    #### Returns:
+        - Tuple[bool, Optional[str]]: Результат проверки и новый хеш,
+        если сохраненный нужно обновить.
+    """
+    loop = asyncio.get_running_loop()
+    with phase('password'):
+        return await loop.run_in_executor(
+            password_executor, _verify_and_update,
+            plain_password, hashed_password
+        )
+
+
+@asynccontextmanager
+async def prepared_password(
+        password: str,
+        hashed_password: Optional[str] = None,
+) -> AsyncIterator[None]:
+    """
+    Считает в пуле хеш пароля или, если передан hashed_password,
+    его проверку; внутри блока password_helper отдает готовый результат.
+    #### Args:
+        - password (str): Пароль в открытом виде.
+        - hashed_password (Optional[str]): Сохраненный хеш пароля.
+    """
+    if hashed_password is None:
+        prepared = {('hash', password): await hash_password(password)}
+    else:
+        prepared = {
+            ('verify', password, hashed_password):
+                await verify_and_update_password(password, hashed_password)
+        }
+    token = _prepared.set({**(_prepared.get() or {}), **prepared})
+    try:
+        yield
+    finally:
+        _prepared.reset(token)
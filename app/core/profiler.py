@@ -0,0 +1,186 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from secrets import token_hex
+from time import perf_counter, sleep
+from typing import Deque, Dict, List, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+PROFILE_HEADER = 'x-profile'
+
+
+@dataclass
+class Profile:
+    """Результат профилирования одного запроса."""
+    method: str
+    path: str
+    id: str = field(default_factory=lambda: uuid4().hex)
+    create_date: datetime = field(default_factory=datetime.now)
+    status: Optional[int] = None
+    duration: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def folded(self) -> str:
+        """Стеки в свернутом формате flamegraph.pl и speedscope."""
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+
+@dataclass
+class ProfilerTarget:
+    """Запросы, которые нужно профилировать."""
+    method: Optional[str]
+    path: str
+    remaining: int
+    header_only: bool = False
+    token: str = field(default_factory=lambda: token_hex(16))
+
+    def matches(self, method: str, path: str, token: Optional[str]) -> bool:
+        if token is not None or self.header_only:
+            return token == self.token
+        return (
+            (self.method is None or self.method == method) and
+            path.startswith(self.path)
+        )
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return (
+        f'{code.co_name} '
+        f'({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+    )
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профилировщик запросов по требованию.
+    Суперпользователь включает профилирование следующих count
+    запросов по методу и началу пути. Запрос с заголовком X-Profile
+    профилируется, только если в заголовке выданный токен, а при
+    header_only профилируются только такие запросы. Пока профилирование не включено,
+    middleware делает одну проверку атрибута на запрос.
+    Фоновый поток раз в profiler_interval секунд снимает стек
+    потока цикла событий и засчитывает его запросу, задача которого
+    выполняется в этот момент. Время ожидания ввода-вывода
+    в профиль не попадает.
+    """
+
+    def __init__(self, history: int) -> None:
+        self.target: Optional[ProfilerTarget] = None
+        self.profiles: Deque[Profile] = deque(maxlen=history)
+        self.active: Dict[asyncio.Task, Profile] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[int] = None
+        self.sampler: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def arm(
+            self,
+            path: str,
+            method: Optional[str] = None,
+            count: int = 1,
+            header_only: bool = False,
+    ) -> ProfilerTarget:
+        self.target = ProfilerTarget(
+            method=method.upper() if method else None,
+            path=path,
+            remaining=count,
+            header_only=header_only,
+        )
+        return self.target
+
+    def disarm(self) -> None:
+        self.target = None
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def claim(self, method: str, path: str, token: Optional[str]) -> bool:
+        """Решает, профилировать ли запрос, и уменьшает счетчик."""
+        target = self.target
+        if target is None or not target.matches(method, path, token):
+            return False
+        target.remaining -= 1
+        if target.remaining <= 0:
+            self.target = None
+        return True
+
+    def start(self, profile: Profile) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        with self.lock:
+            self.active[asyncio.current_task()] = profile
+            if self.sampler is None:
+                self.sampler = threading.Thread(
+                    target=self._sample, name='request-profiler', daemon=True
+                )
+                self.sampler.start()
+
+    def finish(self, profile: Profile) -> None:
+        with self.lock:
+            self.active.pop(asyncio.current_task(), None)
+        self.profiles.append(profile)
+
+    def _sample(self) -> None:
+        while True:
+            with self.lock:
+                if not self.active:
+                    self.sampler = None
+                    return
+            frame = sys._current_frames().get(self.loop_thread)
+            profile = self.active.get(asyncio.current_task(self.loop))
+            if frame is not None and profile is not None:
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(frame_name(frame))
+                    frame = frame.f_back
+                profile.stacks[';'.join(reversed(stack))] += 1
+                profile.samples += 1
+            sleep(settings.profiler_interval)
+
+
+profiler = SamplingProfiler(settings.profiler_history)
+
+
+class ProfilerMiddleware:
+    """ASGI-middleware, оборачивающее выбранные запросы в профилировщик."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if profiler.target is None or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token = dict(scope['headers']).get(PROFILE_HEADER.encode())
+        if not profiler.claim(
+                scope['method'], scope['path'],
+                token.decode() if token is not None else None):
+            await self.app(scope, receive, send)
+            return
+        profile = Profile(method=scope['method'], path=scope['path'])
+
+        async def send_with_status(message) -> None:
+            if message['type'] == 'http.response.start':
+                profile.status = message['status']
+            await send(message)
+
+        start = perf_counter()
+        profiler.start(profile)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profile.duration = round(perf_counter() - start, 6)
+            profiler.finish(profile)
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Dict, Iterator, Optional, Set
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import request_latency
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    """
+    Длительности этапов одного запроса в секундах
+    и количество выполненных SQL-запросов.
+    """
+    __slots__ = ('start', 'phases', 'active', 'queries', 'endpoint_end')
+
+    def __init__(self) -> None:
+        self.start = perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.active: Set[str] = set()
+        self.queries = 0
+        self.endpoint_end: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        """Значение заголовка Server-Timing в миллисекундах."""
+        metrics = [
+            f'{name};dur={seconds * 1000:.1f}'
+            for name, seconds in self.phases.items()
+        ]
+        if self.queries:
+            metrics.append(f'sql;desc="{self.queries} queries"')
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar(
+    'current_timing', default=None
+)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Замеряет этап запроса. Вложенный замер этапа с тем же именем
+    не учитывается повторно. Вне запроса ничего не делает.
+    """
+    timing = current_timing.get()
+    if timing is None or name in timing.active:
+        yield
+        return
+    timing.active.add(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timing.active.discard(name)
+        timing.add(name, perf_counter() - start)
+
+
+def timed_phase(name: str) -> Callable:
+    """Декоратор асинхронной функции, замеряющий ее как этап запроса."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with phase(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_phase(name: str, seconds: float) -> None:
+    """Добавляет уже измеренную длительность к этапу текущего запроса."""
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany) -> None:
+    # Как и для медленных запросов, начало хранится в контексте
+    # выполнения: запрос с ошибкой не оставляет его в соединении.
+    if current_timing.get() is not None and context is not None:
+        context._timing_start = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany) -> None:
+    timing = current_timing.get()
+    start = getattr(context, '_timing_start', None)
+    if timing is None or start is None:
+        return
+    timing.queries += 1
+    timing.add('db', perf_counter() - start)
+
+
+class TimedRoute(APIRoute):
+    """
+    Маршрут, отмечающий окончание работы обработчика: время
+    от него до начала ответа учитывается как сериализация.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+        if (asyncio.iscoroutinefunction(endpoint) and
+                not getattr(endpoint, 'timed', False)):
+            endpoint = self.timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def timed_endpoint(endpoint: Callable) -> Callable:
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                with phase('endpoint'):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                timing = current_timing.get()
+                if timing is not None:
+                    timing.endpoint_end = perf_counter()
+        wrapper.timed = True
+        return wrapper
+
+
+class TimingMiddleware:
+    """
+    ASGI-middleware, собирающее длительности этапов запроса:
+    auth, db (с количеством SQL-запросов), pool, invest, endpoint
+    и serialize. При включенной настройке request_timing отдает их
+    в заголовке Server-Timing и пишет одну строку лога в формате JSON
+    на запрос. Длительность запроса всегда попадает в гистограмму
+    http_request_duration_seconds с шаблоном маршрута в метке.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.route_paths: Optional[Dict[Callable, str]] = None
+
+    def route_path(self, scope) -> str:
+        """Шаблон пути маршрута, обработавшего запрос."""
+        if self.route_paths is None:
+            self.route_paths = {
+                route.endpoint: route.path
+                for route in scope['app'].routes
+                if hasattr(route, 'endpoint')
+            }
+        return self.route_paths.get(scope.get('endpoint'), 'unmatched')
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        status = None
+
+        async def send_with_timing(message) -> None:
+            nonlocal status
+            if (message['type'] == 'http.response.start' and
+                    settings.request_timing):
+                status = message['status']
+                now = perf_counter()
+                if timing.endpoint_end is not None:
+                    timing.add('serialize', now - timing.endpoint_end)
+                headers = list(message.get('headers', []))
+                headers.append((
+                    b'server-timing',
+                    timing.server_timing(now - timing.start).encode(),
+                ))
+                message = {**message, 'headers': headers}
+            elif message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+            total = perf_counter() - timing.start
+            request_latency.observe(
+                total, scope['method'], self.route_path(scope), str(status)
+            )
+            if settings.request_timing and logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({
+                    'method': scope['method'],
+                    'path': scope['path'],
+                    'status': status,
+                    'total_ms': round(total * 1000, 1),
+                    'queries': timing.queries,
+                    **{
+                        f'{name}_ms': round(seconds * 1000, 1)
+                        for name, seconds in timing.phases.items()
+                    },
+                }))
@@ -1,31 +1,166 @@
 # app/core/user.py
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 
+import jwt
+from cachetools import TTLCache
 from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import (
-    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException
+    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException,
+    exceptions
 )
 from fastapi_users.authentication import (
     AuthenticationBackend, BearerTransport, JWTStrategy
 )
+from fastapi_users.jwt import decode_jwt, generate_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
 from app.core.db import get_async_session
+from app.core.password import password_helper, prepared_password
+from app.core.timing import phase
 from app.models import User
 from app.schemas import UserCreate
 
+USER_CLAIMS = ('email', 'is_active', 'is_superuser', 'is_verified')
+
+# Кэш записей пользователей: id -> значения колонок (TTL + LRU).
+user_cache = TTLCache(
+    maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl
+)
+
+
+def detached_user(user_data: Dict[str, Any]) -> User:
+    """Создает объект пользователя без запроса к базе данных."""
+    user = User(**user_data)
+    make_transient_to_detached(user)
+    return user
+
+
+class CachedUserDatabase(SQLAlchemyUserDatabase):
+    """
+    Доступ к пользователям с кэшированием записей по id.
+    Из кэша пользователь подключается к сессии через merge(load=False),
+    без обращения к базе данных. Поиск по email запоминается на время
+    запроса (экземпляр создается для каждого запроса) до первой записи.
+    """
+
+    def __init__(self, session: AsyncSession, user_table) -> None:
+        super().__init__(session, user_table)
+        self.by_email: Dict[str, Optional[User]] = {}
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        if email not in self.by_email:
+            self.by_email[email] = await super().get_by_email(email)
+        return self.by_email[email]
+
+    async def get(self, id: int) -> Optional[User]:
+        user_data = user_cache.get(id)
+        if user_data is None:
+            user = await super().get(id)
+            if user is not None:
+                user_cache[id] = {
+                    column.key: getattr(user, column.key)
+                    for column in inspect(User).column_attrs
+                }
+            return user
+        return await self.session.merge(
+            detached_user(user_data), load=False
+        )
+
+    async def create(self, create_dict: Dict[str, Any]) -> User:
+        self.by_email.clear()
+        return await super().create(create_dict)
+
+    async def update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        user_cache.pop(user.id, None)
+        self.by_email.clear()
+        return await super().update(user, update_dict)
+
+    async def delete(self, user: User) -> None:
+        user_cache.pop(user.id, None)
+        self.by_email.clear()
+        await super().delete(user)
+
 
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
-    yield SQLAlchemyUserDatabase(session, User)
+    yield CachedUserDatabase(session, User)
 
 
 bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 
 
+class TimedJWTStrategy(JWTStrategy):
+    """JWT, проверка которого учитывается как этап запроса auth."""
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[User, int],
+    ) -> Optional[User]:
+        with phase('auth'):
+            return await super().read_token(token, user_manager)
+
+
+class ClaimsJWTStrategy(TimedJWTStrategy):
+    """
+    JWT со статусом пользователя в подписанных claims.
+    Авторизация по такому токену не обращается к базе данных,
+    изменения is_active/is_superuser вступают в силу с новым токеном.
+    """
+
+    async def write_token(self, user: User) -> str:
+        data = {
+            'user_id': str(user.id),
+            'aud': self.token_audience,
+            **{claim: getattr(user, claim) for claim in USER_CLAIMS},
+        }
+        return generate_jwt(
+            data, self.encode_key, self.lifetime_seconds,
+            algorithm=self.algorithm
+        )
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[User, int],
+    ) -> Optional[User]:
+        with phase('auth'):
+            return await self._read_claims(token, user_manager)
+
+    async def _read_claims(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[User, int],
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience,
+                algorithms=[self.algorithm]
+            )
+        except jwt.PyJWTError:
+            return None
+        if any(claim not in data for claim in USER_CLAIMS):
+            return await super().read_token(token, user_manager)
+        try:
+            user_id = user_manager.parse_id(data.get('user_id'))
+        except exceptions.InvalidID:
+            return None
+        return detached_user({
+            'id': user_id,
+            **{claim: data[claim] for claim in USER_CLAIMS},
+        })
+
+
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    if settings.jwt_signed_claims:
+        return ClaimsJWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    return TimedJWTStrategy(secret=settings.secret, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -36,6 +171,51 @@ auth_backend = AuthenticationBackend(
 
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
+    """
+    Менеджер пользователей.
+    Хеширование и проверка паролей выполняются в пуле
+    app.core.password, не блокируя цикл событий.
+    """
+
+    def __init__(self, user_db) -> None:
+        super().__init__(user_db, password_helper=password_helper)
+
+    async def create(
+        self,
+        user_create: UserCreate,
+        safe: bool = False,
+        request: Optional[Request] = None,
+    ) -> User:
+        async with prepared_password(user_create.password):
+            return await super().create(user_create, safe, request)
+
+    async def authenticate(
+        self, credentials: OAuth2PasswordRequestForm
+    ) -> Optional[User]:
+        # Пользователь запоминается в user_db, поэтому библиотека
+        # не запрашивает его повторно. Для несуществующего
+        # пользователя библиотека хеширует пароль, чтобы время ответа
+        # не выдавало его существование.
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            hashed_password = None
+        else:
+            hashed_password = user.hashed_password
+        async with prepared_password(credentials.password, hashed_password):
+            return await super().authenticate(credentials)
+
+    async def reset_password(
+        self, token: str, password: str, request: Optional[Request] = None
+    ) -> User:
+        async with prepared_password(password):
+            return await super().reset_password(token, password, request)
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        if 'password' not in update_dict:
+            return await super()._update(user, update_dict)
+        async with prepared_password(update_dict['password']):
+            return await super()._update(user, update_dict)
 
     async def validate_password(
         self,
@@ -56,6 +236,15 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     ):
         print(f'Пользователь {user.email} зарегистрирован.')
 
+    async def on_after_update(
+            self,
+            user: User,
+            update_dict: Dict[str, Any],
+            request: Optional[Request] = None,
+    ):
+        """Сбрасывает кэш пользователя, в том числе при деактивации."""
+        user_cache.pop(user.id, None)
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
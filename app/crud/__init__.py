@@ -1,2 +1,7 @@
 from .charity_project import charity_project_crud # noqa
-from .donation import donation_crud # noqa
\ No newline at end of file
+from .donation import donation_crud # noqa
+from .donation_bucket import donation_bucket_crud # noqa
+from .donor_stats import donor_stats_crud # noqa
+from .fund_stats import fund_stats_crud # noqa
+from .project_progress import project_progress_crud # noqa
+from .report_state import report_state_crud # noqa
\ No newline at end of file
@@ -1,43 +1,188 @@
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, Collection, List, Optional, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
 from app.crud.base import CRUDBase
 from app.models import CharityProject
 from app.schemas import CharityProjectCreate, CharityProjectUpdate
 
+SECONDS_IN_DAY = 86400
+
 
 class CRUDCharityProject(CRUDBase[
     CharityProject,
     CharityProjectCreate,
     CharityProjectUpdate
 ]):
+    @staticmethod
+    def _closed_filter(
+            query: Select,
+            closed_after: Optional[datetime] = None,
+            closed_until: Optional[datetime] = None,
+            exclude_ids: Collection[int] = (),
+    ) -> Select:
+        """
+        Ограничивает запрос закрытыми проектами по дате закрытия,
+        без проектов exclude_ids.
+        """
+        query = query.where(CharityProject.collection_seconds.isnot(None))
+        if closed_after is not None:
+            query = query.where(CharityProject.close_date > closed_after)
+        if closed_until is not None:
+            query = query.where(CharityProject.close_date <= closed_until)
+        if exclude_ids:
+            query = query.where(CharityProject.id.notin_(list(exclude_ids)))
+        return query
+
+    def _completion_rate_query(
+            self,
+            limit: Optional[int] = None,
+            closed_after: Optional[datetime] = None,
+            closed_until: Optional[datetime] = None,
+            offset: int = 0,
+            exclude_ids: Collection[int] = (),
+    ) -> Select:
+        """
+        Запрос закрытых проектов, отсортированных по скорости сбора.
+        Сортировка идет по индексу collection_seconds, при равной
+        скорости - по id, чтобы offset давал одинаковый результат.
+        id и close_date нужны инкрементальному обновлению отчета.
+        """
+        сollection_rate = (
+            cast(CharityProject.collection_seconds, Float) / SECONDS_IN_DAY
+        ).label('сollection_rate')
+        query = self._closed_filter(
+            select(
+                CharityProject.name,
+                сollection_rate,
+                CharityProject.description,
+                CharityProject.id,
+                CharityProject.close_date,
+            ),
+            closed_after,
+            closed_until,
+            exclude_ids,
+        ).order_by(CharityProject.collection_seconds, CharityProject.id)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
     async def get_projects_by_completion_rate(
             self,
             session: AsyncSession,
+            limit: Optional[int] = None,
     ) -> List[CharityProject]:
         """
-        Получает все закрытые проекты.
+        Получает закрытые проекты, отсортированные по скорости сбора.
         #### Args:
         - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        - limit(Optional[int]): Количество самых быстрых проектов.
+        По умолчанию возвращаются все закрытые проекты.
         #### Returns:
         - List[CharityProject]: Список закрытых проектов.
         """
-        сollection_rate = (
-            func.julianday(CharityProject.close_date) -
-            func.julianday(CharityProject.create_date)).label('сollection_rate')
         query_close_obj = await session.execute(
-            select(
-                CharityProject.name,
-                сollection_rate,
-                CharityProject.description,
-            )
-            .where(CharityProject.fully_invested == 1)
-            .order_by(сollection_rate)
+            self._completion_rate_query(limit)
         )
         projects = query_close_obj.all()
         return projects
 
+    async def get_closed_summary(
+            self,
+            session: AsyncSession,
+            closed_after: Optional[datetime] = None,
+            exclude_ids: Collection[int] = (),
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Считает закрытые проекты и находит последнюю дату закрытия.
+        #### Args:
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        - closed_after(Optional[datetime]): Учитывать только проекты,
+        закрытые после этой даты.
+        - exclude_ids(Collection[int]): Не учитывать эти проекты.
+        #### Returns:
+        - Tuple[int, Optional[datetime]]: Количество закрытых проектов
+        и наибольшая дата закрытия.
+        """
+        summary = await session.execute(
+            self._closed_filter(
+                select(
+                    func.count(CharityProject.id),
+                    func.max(CharityProject.close_date),
+                ),
+                closed_after,
+                exclude_ids=exclude_ids,
+            )
+        )
+        count, watermark = summary.one()
+        return count, watermark
+
+    async def get_closed_ids(
+            self,
+            session: AsyncSession,
+            ids: Collection[int],
+            closed_after: datetime,
+    ) -> List[int]:
+        """
+        Выбирает из ids проекты, закрытые после указанной даты.
+        #### Args:
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        - ids(Collection[int]): ID проверяемых проектов.
+        - closed_after(datetime): Дата закрытия, после которой
+        проект остается в выборке.
+        #### Returns:
+        - List[int]: ID проектов, закрытых после closed_after.
+        """
+        if not ids:
+            return []
+        result = await session.execute(
+            select(CharityProject.id).where(
+                CharityProject.id.in_(list(ids)),
+                CharityProject.close_date > closed_after,
+            )
+        )
+        return list(result.scalars().all())
+
+    async def stream_projects_by_completion_rate(
+            self,
+            session: AsyncSession,
+            chunk_size: int,
+            limit: Optional[int] = None,
+            closed_after: Optional[datetime] = None,
+            closed_until: Optional[datetime] = None,
+            offset: int = 0,
+            exclude_ids: Collection[int] = (),
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Потоково читает закрытые проекты частями через серверный курсор.
+        #### Args:
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        - chunk_size(int): Количество проектов в одной части.
+        - limit(Optional[int]): Количество самых быстрых проектов.
+        - closed_after(Optional[datetime]): Только проекты,
+        закрытые после этой даты.
+        - closed_until(Optional[datetime]): Только проекты,
+        закрытые не позже этой даты.
+        - offset(int): Количество пропускаемых первых проектов.
+        - exclude_ids(Collection[int]): Не выбирать эти проекты.
+        #### Returns:
+        - AsyncIterator[List[Row]]: Части списка закрытых проектов.
+        """
+        result = await session.stream(
+            self._completion_rate_query(
+                limit, closed_after, closed_until, offset, exclude_ids)
+        )
+        try:
+            async for chunk in result.partitions(chunk_size):
+                yield chunk
+        finally:
+            await result.close()
+
 
-charity_project_crud = CRUDCharityProject(CharityProject)
\ No newline at end of file
+charity_project_crud = CRUDCharityProject(CharityProject)
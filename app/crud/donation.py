@@ -4,7 +4,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
-from app.models import Donation, User
+from app.crud.donor_stats import donor_totals_query
+from app.models import Donation, DonorStats, User
 from app.schemas import DonationCreate, DonationUpdate
 
 
@@ -34,5 +35,28 @@ class CRUDDonation(CRUDBase[
         donations = donations.scalars().all()
         return donations
 
+    async def get_summary(
+            self,
+            user: User,
+            session: AsyncSession,
+    ) -> DonorStats:
+        """
+        Считает итоги пожертвований пользователя одним агрегирующим
+        запросом по индексу user_id и create_date.
+        #### Args:
+        - user(User): Пользователь, для которого нужно посчитать итоги.
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - DonorStats: Несохраненные итоги пожертвований пользователя.
+        """
+        totals = await session.execute(donor_totals_query([user.id]))
+        row = totals.mappings().first()
+        if row is None:
+            return DonorStats(
+                user_id=user.id, donations=0, donated_amount=0,
+                invested_amount=0,
+            )
+        return DonorStats(**row)
+
 
 donation_crud = CRUDDonation(Donation)
\ No newline at end of file
@@ -0,0 +1,200 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import delete, event, func, insert, inspect, literal, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.crud.donor_stats import UPSERT_INSERTS
+from app.models import Donation, DonationBucket
+
+# В таблице хранятся часы и дни, недели складываются из дней.
+STORED_BUCKETS = ('hour', 'day')
+BUCKET_COLUMNS = ('create_date', 'full_amount')
+BUCKET_SIZES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+# SQLite хранит даты строками, поэтому начало интервала должно
+# совпадать с форматом, в котором SQLAlchemy пишет datetime.
+SQLITE_FORMATS = {
+    'hour': '%Y-%m-%d %H:00:00.000000',
+    'day': '%Y-%m-%d 00:00:00.000000',
+}
+SQL_BUCKET_STARTS = {
+    'postgresql': lambda bucket, column: func.date_trunc(bucket, column),
+    'sqlite': lambda bucket, column: func.strftime(
+        SQLITE_FORMATS[bucket], column),
+}
+
+
+def bucket_start(value: datetime, bucket: str) -> datetime:
+    """Начало часа, дня или недели (с понедельника), в которые входит дата."""
+    start = value.replace(minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return start
+    start = start.replace(hour=0)
+    if bucket == 'day':
+        return start
+    return start - timedelta(days=start.weekday())
+
+
+def bucket_end(value: datetime, bucket: str) -> datetime:
+    """Конец последнего интервала, начавшегося раньше даты."""
+    start = bucket_start(value, bucket)
+    return value if start == value else start + BUCKET_SIZES[bucket]
+
+
+def recount_donation_buckets(connection: Connection) -> None:
+    """Пересчитывает все интервалы по таблице пожертвований."""
+    table = DonationBucket.__table__
+    connection.execute(delete(table))
+    for bucket in STORED_BUCKETS:
+        start = SQL_BUCKET_STARTS[connection.dialect.name](
+            bucket, Donation.create_date)
+        connection.execute(insert(table).from_select(
+            ['bucket', 'start', 'donations', 'amount'],
+            select(
+                literal(bucket), start, func.count(Donation.id),
+                func.sum(Donation.full_amount),
+            ).where(Donation.create_date.isnot(None)).group_by(start)
+        ))
+
+
+def add_donation_buckets(connection: Connection, rows: List[Dict]) -> None:
+    """
+    Прибавляет разницу к интервалам одним UPSERT на все строки;
+    строка интервала создается при первом пожертвовании в нем.
+    """
+    table = DonationBucket.__table__
+    statement = UPSERT_INSERTS[connection.dialect.name](table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.bucket, table.c.start],
+        set_={
+            name: table.c[name] + statement.excluded[name]
+            for name in ('donations', 'amount')
+        },
+    )
+    connection.execute(statement, rows)
+
+
+def _previous_values(obj: Donation) -> Optional[Tuple]:
+    """
+    Дата и сумма пожертвования до изменения в текущем flush.
+    None, если прежнее значение не было загружено.
+    """
+    state = inspect(obj)
+    values = []
+    for name in BUCKET_COLUMNS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.added:
+            return None
+        else:
+            values.append(getattr(obj, name))
+    return tuple(values)
+
+
+def _count_donation(delta: Dict, values: Tuple, sign: int) -> None:
+    """Прибавляет пожертвование со знаком sign к его часу и дню."""
+    create_date, full_amount = values
+    if create_date is None:
+        return
+    for bucket in STORED_BUCKETS:
+        row = delta[bucket, bucket_start(create_date, bucket)]
+        row[0] += sign
+        row[1] += sign * (full_amount or 0)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_donation_buckets(session: Session, flush_context) -> None:
+    """
+    Меняет интервалы в той же транзакции, что и пожертвования:
+    при создании, изменении даты или суммы и удалении.
+    """
+    delta = defaultdict(lambda: [0, 0])
+    for obj in session.new:
+        if isinstance(obj, Donation):
+            _count_donation(delta, (obj.create_date, obj.full_amount), 1)
+    for obj in session.dirty:
+        if not isinstance(obj, Donation):
+            continue
+        previous = _previous_values(obj)
+        if previous is None:
+            recount_donation_buckets(session.connection())
+            return
+        current = (obj.create_date, obj.full_amount)
+        if previous != current:
+            _count_donation(delta, previous, -1)
+            _count_donation(delta, current, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Donation):
+            _count_donation(delta, _previous_values(obj) or (
+                obj.create_date, obj.full_amount), -1)
+    rows = [
+        {'bucket': bucket, 'start': start,
+         'donations': donations, 'amount': amount}
+        for (bucket, start), (donations, amount) in delta.items()
+        if donations or amount
+    ]
+    if rows:
+        add_donation_buckets(session.connection(), rows)
+
+
+class CRUDDonationBucket(CRUDBase[
+    DonationBucket,
+    BaseModel,
+    BaseModel
+]):
+    async def get_range(
+            self,
+            bucket: str,
+            from_date: Optional[datetime],
+            to_date: Optional[datetime],
+            session: AsyncSession,
+    ) -> List[DonationBucket]:
+        """
+        Получает интервалы с пожертвованиями, пересекающиеся
+        с периодом [from_date, to_date), в порядке времени.
+        #### Args:
+        - bucket(str): Размер интервала: hour, day или week.
+        - from_date(Optional[datetime]): Начало периода.
+        - to_date(Optional[datetime]): Конец периода, не включается.
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - List[DonationBucket]: Интервалы; недели собираются из дней
+        и в базу не сохраняются.
+        """
+        stored = 'day' if bucket == 'week' else bucket
+        query = select(DonationBucket).where(
+            DonationBucket.bucket == stored,
+            DonationBucket.donations > 0,
+        ).order_by(DonationBucket.start)
+        if from_date is not None:
+            query = query.where(
+                DonationBucket.start >= bucket_start(from_date, bucket))
+        if to_date is not None:
+            # Неделя складывается из дней целиком, даже если to_date
+            # приходится на ее середину.
+            query = query.where(
+                DonationBucket.start < bucket_end(to_date, bucket))
+        buckets = (await session.execute(query)).scalars().all()
+        if bucket == stored:
+            return buckets
+        weeks = {}
+        for day in buckets:
+            start = bucket_start(day.start, bucket)
+            week = weeks.setdefault(start, DonationBucket(
+                bucket=bucket, start=start, donations=0, amount=0))
+            week.donations += day.donations
+            week.amount += day.amount
+        return list(weeks.values())
+
+
+donation_bucket_crud = CRUDDonationBucket(DonationBucket)
@@ -0,0 +1,159 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import case, delete, event, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.crud.base import CRUDBase
+from app.crud.fund_stats import fund_values, previous_fund_values
+from app.models import Donation, DonorStats, User
+
+DONOR_COUNTERS = ('donations', 'donated_amount', 'invested_amount')
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def donor_totals_query(user_ids: Optional[Iterable[int]] = None) -> Select:
+    """
+    Итоги пожертвований по пользователям одним агрегирующим запросом.
+    Для одного пользователя читает индекс по user_id и create_date.
+    """
+    query = select(
+        Donation.user_id,
+        func.count(Donation.id).label('donations'),
+        func.coalesce(func.sum(Donation.full_amount), 0)
+        .label('donated_amount'),
+        func.coalesce(func.sum(Donation.invested_amount), 0)
+        .label('invested_amount'),
+        func.min(Donation.create_date).label('first_donation_date'),
+        func.max(Donation.create_date).label('last_donation_date'),
+    ).where(Donation.user_id.isnot(None)).group_by(Donation.user_id)
+    if user_ids is not None:
+        query = query.where(Donation.user_id.in_(list(user_ids)))
+    return query
+
+
+def recount_donor_stats(
+        connection: Connection,
+        user_ids: Optional[Iterable[int]] = None,
+) -> None:
+    """Пересчитывает итоги пользователей, без user_ids - всех."""
+    table = DonorStats.__table__
+    statement = delete(table)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        statement = statement.where(table.c.user_id.in_(user_ids))
+    connection.execute(statement)
+    totals = donor_totals_query(user_ids).subquery()
+    connection.execute(insert(table).from_select(
+        [column.name for column in totals.c], select(totals)
+    ))
+
+
+def add_donor_stats(connection: Connection, rows: List[Dict]) -> None:
+    """
+    Прибавляет разницу к итогам пользователей одним UPSERT
+    на все строки; строка пользователя создается при первом
+    пожертвовании.
+    """
+    table = DonorStats.__table__
+    statement = UPSERT_INSERTS[connection.dialect.name](table)
+    new = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            **{name: table.c[name] + new[name] for name in DONOR_COUNTERS},
+            'first_donation_date': case(
+                (table.c.first_donation_date.is_(None) |
+                 (new.first_donation_date < table.c.first_donation_date),
+                 new.first_donation_date),
+                else_=table.c.first_donation_date,
+            ),
+            'last_donation_date': case(
+                (table.c.last_donation_date.is_(None) |
+                 (new.last_donation_date > table.c.last_donation_date),
+                 new.last_donation_date),
+                else_=table.c.last_donation_date,
+            ),
+        },
+    )
+    connection.execute(statement, rows)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_donor_stats(session: Session, flush_context) -> None:
+    """
+    Меняет итоги пользователей в той же транзакции, что и их
+    пожертвования: при создании и при распределении по проектам.
+    """
+    delta = defaultdict(lambda: dict.fromkeys(DONOR_COUNTERS, 0))
+    recount = set()
+    for obj in session.new:
+        if isinstance(obj, Donation) and obj.user_id is not None:
+            row = delta[obj.user_id]
+            row['donations'] += 1
+            row['donated_amount'] += obj.full_amount
+            row['invested_amount'] += obj.invested_amount or 0
+            row['first_donation_date'] = min(
+                row.get('first_donation_date') or obj.create_date,
+                obj.create_date,
+            )
+            row['last_donation_date'] = max(
+                row.get('last_donation_date') or obj.create_date,
+                obj.create_date,
+            )
+    for obj in session.dirty:
+        if not isinstance(obj, Donation) or obj.user_id is None:
+            continue
+        previous = previous_fund_values(obj)
+        if previous is None:
+            recount.add(obj.user_id)
+            continue
+        current = fund_values(obj)
+        row = delta[obj.user_id]
+        row['donated_amount'] += current['full_amount'] - previous[
+            'full_amount']
+        row['invested_amount'] += (current['invested_amount'] or 0) - (
+            previous['invested_amount'] or 0)
+    for obj in session.deleted:
+        if isinstance(obj, Donation) and obj.user_id is not None:
+            recount.add(obj.user_id)
+    rows = [
+        {'user_id': user_id, 'first_donation_date': None,
+         'last_donation_date': None, **row}
+        for user_id, row in delta.items()
+        if user_id not in recount and any(row.values())
+    ]
+    if rows:
+        add_donor_stats(session.connection(), rows)
+    if recount:
+        recount_donor_stats(session.connection(), recount)
+
+
+class CRUDDonorStats(CRUDBase[
+    DonorStats,
+    BaseModel,
+    BaseModel
+]):
+    async def get_by_user(
+            self,
+            user: User,
+            session: AsyncSession,
+    ) -> Optional[DonorStats]:
+        """
+        Получает итоги пожертвований пользователя.
+        #### Args:
+        - user(User): Пользователь.
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - Optional[DonorStats]: Итоги или None, если пользователь
+        не делал пожертвований.
+        """
+        return await self.get_by_attribute('user_id', user.id, session)
+
+
+donor_stats_crud = CRUDDonorStats(DonorStats)
@@ -0,0 +1,251 @@
+import logging
+from collections import Counter
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import (
+    case, event, func, insert, inspect, select, true, update)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.crud.base import CRUDBase
+from app.models import CharityProject, Donation, FundStats
+from app.models.fund_stats import FUND_STATS_ID
+
+logger = logging.getLogger(__name__)
+
+STATS_COLUMNS = (
+    'projects', 'closed_projects', 'required_amount', 'remaining_amount',
+    'collection_seconds', 'donations', 'closed_donations', 'raised_amount',
+    'invested_amount', 'waiting_amount',
+)
+FUND_COLUMNS = {
+    CharityProject: (
+        'full_amount', 'invested_amount', 'fully_invested',
+        'collection_seconds',
+    ),
+    Donation: ('full_amount', 'invested_amount', 'fully_invested'),
+}
+
+
+def fund_contribution(model, values: Dict) -> Counter:
+    """
+    Вклад одного проекта или пожертвования в сводку фонда.
+    Должен совпадать с fund_stats_query для одной строки.
+    """
+    closed = bool(values['fully_invested'])
+    full_amount = values['full_amount'] or 0
+    rest = 0 if closed else full_amount - (values['invested_amount'] or 0)
+    if model is CharityProject:
+        return Counter(
+            projects=1,
+            closed_projects=closed,
+            required_amount=full_amount,
+            remaining_amount=rest,
+            collection_seconds=values['collection_seconds'] or 0,
+        )
+    return Counter(
+        donations=1,
+        closed_donations=closed,
+        raised_amount=full_amount,
+        invested_amount=values['invested_amount'] or 0,
+        waiting_amount=rest,
+    )
+
+
+def _sum(value):
+    return func.coalesce(func.sum(value), 0)
+
+
+def _totals(model) -> Select:
+    closed = model.fully_invested.is_(True)
+    rest = case(
+        (closed, 0),
+        else_=model.full_amount - func.coalesce(model.invested_amount, 0),
+    )
+    if model is CharityProject:
+        columns = (
+            func.count(model.id).label('projects'),
+            _sum(case((closed, 1), else_=0)).label('closed_projects'),
+            _sum(model.full_amount).label('required_amount'),
+            _sum(rest).label('remaining_amount'),
+            _sum(model.collection_seconds).label('collection_seconds'),
+        )
+    else:
+        columns = (
+            func.count(model.id).label('donations'),
+            _sum(case((closed, 1), else_=0)).label('closed_donations'),
+            _sum(model.full_amount).label('raised_amount'),
+            _sum(model.invested_amount).label('invested_amount'),
+            _sum(rest).label('waiting_amount'),
+        )
+    return select(*columns).subquery()
+
+
+def fund_stats_query() -> Select:
+    """Запрос, считающий сводку заново за один проход по каждой таблице."""
+    projects, donations = _totals(CharityProject), _totals(Donation)
+    # Обе части возвращают по одной строке.
+    return select(
+        *(getattr(projects.c, name) for name in STATS_COLUMNS[:5]),
+        *(getattr(donations.c, name) for name in STATS_COLUMNS[5:]),
+    ).select_from(projects.join(donations, true()))
+
+
+def count_fund_stats(connection: Connection) -> Dict[str, int]:
+    return dict(connection.execute(fund_stats_query()).mappings().one())
+
+
+def store_fund_stats(connection: Connection, values: Dict[str, int]) -> None:
+    """Записывает сводку целиком, создавая строку при ее отсутствии."""
+    result = connection.execute(
+        update(FundStats).where(FundStats.id == FUND_STATS_ID).values(values)
+    )
+    if not result.rowcount:
+        connection.execute(
+            insert(FundStats).values(id=FUND_STATS_ID, **values)
+        )
+
+
+def add_fund_stats(connection: Connection, delta: Dict[str, int]) -> None:
+    """
+    Прибавляет разницу к счетчикам сводки одним UPDATE. Сводка
+    никогда не перезаписывается целиком из транзакции записи: такой
+    пересчет затер бы разницу параллельной транзакции. Без строки
+    сводки, например в базе, заполненной в обход приложения,
+    ее восстанавливает команда fundstats --fix.
+    """
+    result = connection.execute(
+        update(FundStats).where(FundStats.id == FUND_STATS_ID).values({
+            getattr(FundStats, name): getattr(FundStats, name) + value
+            for name, value in delta.items()
+        })
+    )
+    if not result.rowcount:
+        logger.warning(
+            'Нет строки сводки фонда, запустите '
+            'python -m app.commands.fundstats --fix'
+        )
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+# Прежнее значение загружается при присваивании, даже если поле
+# не было загружено, поэтому разница сводки известна всегда.
+for _model, _names in FUND_COLUMNS.items():
+    for _name in _names:
+        event.listen(
+            getattr(_model, _name), 'set', _keep_previous,
+            active_history=True, retval=True,
+        )
+
+
+def previous_fund_values(obj) -> Optional[Dict]:
+    """
+    Значения полей объекта до изменения в текущем flush.
+    None, если прежнее значение не было загружено, например
+    при изменении в обход атрибутов модели.
+    """
+    state = inspect(obj)
+    values = {}
+    for name in FUND_COLUMNS[type(obj)]:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.added:
+            return None
+        else:
+            values[name] = getattr(obj, name)
+    return values
+
+
+def fund_values(obj) -> Dict:
+    return {name: getattr(obj, name) for name in FUND_COLUMNS[type(obj)]}
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_fund_stats(session: Session, flush_context) -> None:
+    """
+    Меняет сводку фонда в той же транзакции, что и проекты
+    с пожертвованиями: invest_process, обновление и удаление
+    через CRUD и любые другие записи через ORM.
+    """
+    delta = Counter()
+    for obj in session.new:
+        if type(obj) in FUND_COLUMNS:
+            delta.update(fund_contribution(type(obj), fund_values(obj)))
+    for obj in session.dirty:
+        if type(obj) not in FUND_COLUMNS:
+            continue
+        previous = previous_fund_values(obj)
+        if previous is None:
+            logger.warning(
+                'Нет прежних значений %r, сводка фонда не изменена; '
+                'запустите python -m app.commands.fundstats --fix', obj
+            )
+            continue
+        delta.update(fund_contribution(type(obj), fund_values(obj)))
+        delta.subtract(fund_contribution(type(obj), previous))
+    for obj in session.deleted:
+        if type(obj) in FUND_COLUMNS:
+            delta.subtract(fund_contribution(
+                type(obj), previous_fund_values(obj) or fund_values(obj)
+            ))
+    delta = {name: value for name, value in delta.items() if value}
+    if delta:
+        add_fund_stats(session.connection(), delta)
+
+
+class CRUDFundStats(CRUDBase[
+    FundStats,
+    BaseModel,
+    BaseModel
+]):
+    async def get_stats(self, session: AsyncSession) -> FundStats:
+        """
+        Получает сводку фонда. Если строки сводки нет,
+        считает ее по таблицам без сохранения.
+        #### Args:
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - FundStats: Сводка фонда.
+        """
+        stats = await self.get(FUND_STATS_ID, session)
+        if stats is None:
+            stats = FundStats(id=FUND_STATS_ID, **await self.count(session))
+        return stats
+
+    async def count(self, session: AsyncSession) -> Dict[str, int]:
+        """
+        Считает сводку заново по таблицам проектов и пожертвований.
+        #### Args:
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - Dict[str, int]: Значения счетчиков сводки.
+        """
+        result = await session.execute(fund_stats_query())
+        return dict(result.mappings().one())
+
+    async def save(
+            self,
+            values: Dict[str, int],
+            session: AsyncSession,
+    ) -> None:
+        """
+        Перезаписывает сводку фонда.
+        #### Args:
+        - values(Dict[str, int]): Значения счетчиков сводки.
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        """
+        await session.run_sync(
+            lambda sync_session: store_fund_stats(
+                sync_session.connection(), values)
+        )
+        await session.commit()
+
+
+fund_stats_crud = CRUDFundStats(FundStats)
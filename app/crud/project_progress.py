@@ -0,0 +1,100 @@
+from typing import Dict, List
+
+from cachetools import TTLCache
+from pydantic import BaseModel
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models import CharityProject
+
+PROGRESS_COLUMNS = ('id', 'invested_amount', 'full_amount', 'fully_invested')
+PENDING_KEY = 'project_progress'
+
+# Кэш прогресса проектов: id -> значения колонок (TTL + LRU).
+progress_cache = TTLCache(
+    maxsize=settings.progress_cache_size, ttl=settings.progress_cache_ttl
+)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_project_progress(session: Session, flush_context) -> None:
+    """
+    Запоминает прогресс проектов, записанных в текущей транзакции:
+    invest_process, изменение и удаление через CRUD и другие записи
+    через ORM. None - проект удален или значения не загружены.
+    """
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, CharityProject):
+            if inspect(obj).unloaded & set(PROGRESS_COLUMNS):
+                pending[obj.id] = None
+            else:
+                pending[obj.id] = {
+                    name: getattr(obj, name) for name in PROGRESS_COLUMNS
+                }
+    for obj in session.deleted:
+        if isinstance(obj, CharityProject):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _store_project_progress(session: Session) -> None:
+    """Переносит прогресс в кэш только после фиксации транзакции."""
+    for project_id, progress in session.info.pop(PENDING_KEY, {}).items():
+        if progress is None:
+            progress_cache.pop(project_id, None)
+        else:
+            progress_cache[project_id] = progress
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_project_progress(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+class CRUDProjectProgress(CRUDBase[
+    CharityProject,
+    BaseModel,
+    BaseModel
+]):
+    async def get_many(
+            self,
+            project_ids: List[int],
+            session: AsyncSession,
+    ) -> List[Dict]:
+        """
+        Получает прогресс проектов из кэша; проекты, которых нет
+        в кэше, читаются одним запросом только нужных колонок.
+        #### Args:
+        - project_ids(List[int]): ID проектов.
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - List[Dict]: Прогресс найденных проектов в порядке project_ids.
+        """
+        found = {}
+        for project_id in project_ids:
+            progress = progress_cache.get(project_id)
+            if progress is not None:
+                found[project_id] = progress
+        missing = set(project_ids) - set(found)
+        if missing:
+            rows = await session.execute(
+                select(*(
+                    getattr(CharityProject, name) for name in PROGRESS_COLUMNS
+                )).where(CharityProject.id.in_(missing))
+            )
+            # Пока шел запрос, фиксация записи могла положить в кэш
+            # более новое значение; прочитанное его не заменяет.
+            for row in rows.mappings():
+                found[row['id']] = progress_cache.setdefault(
+                    row['id'], dict(row))
+        return [
+            found[project_id] for project_id in dict.fromkeys(project_ids)
+            if project_id in found
+        ]
+
+
+project_progress_crud = CRUDProjectProgress(CharityProject)
@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models import ReportState
+
+
+class CRUDReportState(CRUDBase[
+    ReportState,
+    BaseModel,
+    BaseModel
+]):
+    async def save(
+            self,
+            name: str,
+            spreadsheet_id: str,
+            watermark: Optional[datetime],
+            rows: int,
+            recent_ids: List[int],
+            session: AsyncSession,
+    ) -> ReportState:
+        """
+        Создает или обновляет состояние отчета.
+        #### Args:
+        - name(str): Название отчета.
+        - spreadsheet_id(str): ID Google таблицы с отчетом.
+        - watermark(Optional[datetime]): Наибольшая дата закрытия проекта
+        в отчете.
+        - rows(int): Количество проектов в отчете.
+        - recent_ids(List[int]): ID проектов отчета в окне повторного
+        чтения перед watermark.
+        - session(AsyncSession): Асинхронная сессия для работы с базой данных.
+        #### Returns:
+        - ReportState: Сохраненное состояние отчета.
+        """
+        state = await self.get_by_attribute('name', name, session)
+        if state is None:
+            state = ReportState(name=name)
+        state.spreadsheet_id = spreadsheet_id
+        state.watermark = watermark
+        state.rows = rows
+        state.recent_ids = recent_ids
+        session.add(state)
+        await session.commit()
+        return state
+
+
+report_state_crud = CRUDReportState(ReportState)
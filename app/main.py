@@ -2,7 +2,25 @@ from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.core.google_client import google_client
+from app.core.profiler import ProfilerMiddleware
+from app.core.timing import TimingMiddleware
+from app.services import report_job_runner
 
 app = FastAPI(title=settings.app_title, description=settings.description)
 
 app.include_router(main_router)
+
+app.add_middleware(TimingMiddleware)
+app.add_middleware(ProfilerMiddleware)
+
+
+@app.on_event('startup')
+async def startup() -> None:
+    await google_client.start()
+
+
+@app.on_event('shutdown')
+async def shutdown() -> None:
+    await report_job_runner.stop()
+    await google_client.stop()
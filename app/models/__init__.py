@@ -1,4 +1,8 @@
 from .base_model import BaseModel  # noqa
 from .charity_project import CharityProject  # noqa
 from .donation import Donation  # noqa
+from .donation_bucket import DonationBucket  # noqa
+from .donor_stats import DonorStats  # noqa
+from .fund_stats import FundStats  # noqa
+from .report_state import ReportState  # noqa
 from .user import User  # noqa
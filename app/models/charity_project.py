@@ -1,4 +1,4 @@
-from sqlalchemy import CheckConstraint, Column, String, Text
+from sqlalchemy import CheckConstraint, Column, Index, Integer, String, Text
 
 from .base_model import BaseModel
 
@@ -17,14 +17,18 @@ class CharityProject(BaseModel):
         финансирован. По умолчанию False.
         - create_date(datetime): Дата создания проекта.
         - close_date(datetime): Дата закрытия проекта.
+        - collection_seconds(int): Длительность сбора средств в секундах,
+        заполняется при закрытии проекта. Индексирована для отчета.
     """
 
     __table_args__ = BaseModel.__table_args__ + (
         CheckConstraint('LENGTH(name) > 0'),
+        Index('ix_charityproject_close_date', 'close_date'),
     )
 
     name = Column(String(100), unique=True, nullable=False)
     description = Column(Text, nullable=False)
+    collection_seconds = Column(Integer, index=True)
 
     def __repr__(self) -> str:
         return (
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, Text
 
 from .base_model import BaseModel
 
@@ -19,8 +19,14 @@ class Donation(BaseModel):
         - create_date (datetime): Дата пожертвования.
         - close_date (datetime): Дата, когда вся сумма пожертвования была распределена по
         проектам
+    Индекс по user_id и create_date обслуживает выборки и итоги
+    пожертвований пользователя.
     """
 
+    __table_args__ = BaseModel.__table_args__ + (
+        Index('ix_donation_user_id_create_date', 'user_id', 'create_date'),
+    )
+
     user_id = Column(
         Integer,
         ForeignKey('user.id', name='fk_donation_user_id_user')
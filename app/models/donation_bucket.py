@@ -0,0 +1,33 @@
+from sqlalchemy import (
+    BigInteger, Column, DateTime, String, UniqueConstraint)
+
+from app.core.db import Base
+
+
+class DonationBucket(Base):
+    """
+    Количество и сумма пожертвований за час или день.
+    Строка меняется на разницу при каждой записи пожертвований.
+    #### Attributes:
+        - id(int): ID записи в базе данных. PrimaryKey
+        - bucket(str): Размер интервала: hour или day.
+        - start(datetime): Начало интервала.
+        - donations(int): Количество пожертвований за интервал.
+        - amount(int): Сумма пожертвований за интервал.
+    """
+
+    __table_args__ = (
+        UniqueConstraint(
+            'bucket', 'start', name='uq_donationbucket_bucket_start'),
+    )
+
+    bucket = Column(String(4), nullable=False)
+    start = Column(DateTime, nullable=False)
+    donations = Column(BigInteger, nullable=False, default=0)
+    amount = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.donations} пожертвований на {self.amount} '
+            f'за {self.bucket} с {self.start}'
+        )
@@ -0,0 +1,36 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer
+
+from app.core.db import Base
+
+
+class DonorStats(Base):
+    """
+    Итоги пожертвований одного пользователя. Строка меняется
+    на разницу при каждой записи его пожертвований.
+    #### Attributes:
+        - id(int): ID записи в базе данных. PrimaryKey
+        - user_id(int): ID пользователя. ForeignKey, уникален.
+        - donations(int): Количество пожертвований.
+        - donated_amount(int): Сумма пожертвований.
+        - invested_amount(int): Сумма, распределенная по проектам.
+        - first_donation_date(datetime): Дата первого пожертвования.
+        - last_donation_date(datetime): Дата последнего пожертвования.
+    """
+
+    user_id = Column(
+        Integer,
+        ForeignKey('user.id', name='fk_donorstats_user_id_user'),
+        unique=True,
+        nullable=False,
+    )
+    donations = Column(BigInteger, nullable=False, default=0)
+    donated_amount = Column(BigInteger, nullable=False, default=0)
+    invested_amount = Column(BigInteger, nullable=False, default=0)
+    first_donation_date = Column(DateTime)
+    last_donation_date = Column(DateTime)
+
+    def __repr__(self) -> str:
+        return (
+            f'Пользователь {self.user_id} пожертвовал {self.donated_amount} '
+            f'за {self.donations} раз'
+        )
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, DateTime, event
+
+from app.core.db import Base
+
+FUND_STATS_ID = 1
+
+
+class FundStats(Base):
+    """
+    Сводные показатели фонда. В таблице одна строка, ее счетчики
+    меняются на разницу при каждой записи проектов и пожертвований.
+    #### Attributes:
+        - id(int): ID записи, всегда FUND_STATS_ID. PrimaryKey
+        - projects(int): Количество проектов.
+        - closed_projects(int): Количество закрытых проектов.
+        - required_amount(int): Сумма, требуемая всеми проектами.
+        - remaining_amount(int): Сумма, которую осталось собрать
+        открытым проектам.
+        - collection_seconds(int): Суммарная длительность сбора
+        закрытых проектов в секундах.
+        - donations(int): Количество пожертвований.
+        - closed_donations(int): Количество полностью распределенных
+        пожертвований.
+        - raised_amount(int): Сумма всех пожертвований.
+        - invested_amount(int): Сумма, распределенная по проектам.
+        - waiting_amount(int): Сумма пожертвований, ожидающая
+        распределения.
+        - update_date(datetime): Дата последнего изменения.
+    """
+
+    projects = Column(BigInteger, nullable=False, default=0)
+    closed_projects = Column(BigInteger, nullable=False, default=0)
+    required_amount = Column(BigInteger, nullable=False, default=0)
+    remaining_amount = Column(BigInteger, nullable=False, default=0)
+    collection_seconds = Column(BigInteger, nullable=False, default=0)
+    donations = Column(BigInteger, nullable=False, default=0)
+    closed_donations = Column(BigInteger, nullable=False, default=0)
+    raised_amount = Column(BigInteger, nullable=False, default=0)
+    invested_amount = Column(BigInteger, nullable=False, default=0)
+    waiting_amount = Column(BigInteger, nullable=False, default=0)
+    update_date = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    @property
+    def average_collection_seconds(self) -> Optional[float]:
+        """Средняя длительность сбора закрытого проекта в секундах."""
+        if not self.closed_projects:
+            return None
+        return self.collection_seconds / self.closed_projects
+
+    def __repr__(self) -> str:
+        return (
+            f'Фонд собрал {self.raised_amount}, распределил '
+            f'{self.invested_amount} на {self.update_date}'
+        )
+
+
+@event.listens_for(FundStats.__table__, 'after_create')
+def _create_empty_stats(target, connection, **kw) -> None:
+    """Пустая база начинается с нулевой сводки."""
+    connection.execute(target.insert().values(id=FUND_STATS_ID))
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String
+
+from app.core.db import Base
+
+
+class ReportState(Base):
+    """
+    Состояние отчета для инкрементального обновления.
+    #### Attributes:
+        - id(int): ID записи в базе данных. PrimaryKey
+        - name(str): Название отчета.*
+        - spreadsheet_id(str): ID Google таблицы с отчетом.*
+        - watermark(datetime): Наибольшая дата закрытия проекта,
+        уже попавшего в отчет.
+        - recent_ids(List[int]): ID проектов отчета, закрытых в окне
+        report_refresh_overlap перед watermark. Окно читается повторно,
+        чтобы не потерять проекты, зафиксированные после обновления.
+        - rows(int): Количество проектов в отчете.
+        - update_date(datetime): Дата последнего обновления отчета.
+    """
+
+    name = Column(String(100), unique=True, nullable=False)
+    spreadsheet_id = Column(String(100), nullable=False)
+    watermark = Column(DateTime)
+    recent_ids = Column(JSON, default=list)
+    rows = Column(Integer, default=0)
+    update_date = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self) -> str:
+        return (
+            f'Отчет {self.name} в таблице {self.spreadsheet_id} '
+            f'обновлен {self.update_date}'
+        )
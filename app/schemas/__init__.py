@@ -1,3 +1,8 @@
 from .user import UserCreate, UserRead, UserUpdate # noqa
-from .charity_project import CharityProjectCreate, CharityProjectRead, CharityProjectUpdate # noqa
-from .donation import DonationCreate, DonationRead, DonationUpdate # noqa
+from .charity_project import CharityProjectCreate, CharityProjectRead, CharityProjectUpdate, ProjectProgressRead # noqa
+from .donation import (  # noqa
+    DonationCreate, DonationRead, DonationSummary, DonationUpdate)
+from .fund_stats import (  # noqa
+    DonationBucketRead, DonationBucketSize, FundStatsRead)
+from .profiler import ProfileRead, ProfilerArm, ProfilerTargetRead # noqa
+from .report import ReportFormat, ReportJobRead, ReportJobStatus # noqa
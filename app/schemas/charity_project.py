@@ -25,6 +25,13 @@ class CharityProjectUpdate(CharityProjectBase):
         frozen = True
 
 
+class ProjectProgressRead(BaseModel):
+    id: int
+    invested_amount: int
+    full_amount: int
+    fully_invested: bool
+
+
 class CharityProjectRead(CharityProjectCreate):
     id: int
     invested_amount: int
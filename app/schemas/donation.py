@@ -29,4 +29,15 @@ class DonationRead(DonationCreate):
     close_date: Optional[datetime]
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class DonationSummary(BaseModel):
+    donations: int
+    donated_amount: int
+    invested_amount: int
+    first_donation_date: Optional[datetime]
+    last_donation_date: Optional[datetime]
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,37 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class FundStatsRead(BaseModel):
+    projects: int
+    closed_projects: int
+    required_amount: int
+    remaining_amount: int
+    average_collection_seconds: Optional[float]
+    donations: int
+    closed_donations: int
+    raised_amount: int
+    invested_amount: int
+    waiting_amount: int
+    update_date: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class DonationBucketSize(str, Enum):
+    HOUR = 'hour'
+    DAY = 'day'
+    WEEK = 'week'
+
+
+class DonationBucketRead(BaseModel):
+    start: datetime
+    donations: int
+    amount: int
+
+    class Config:
+        orm_mode = True
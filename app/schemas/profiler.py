@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Extra, Field
+
+MAX_PROFILED_REQUESTS = 100
+
+
+class ProfilerArm(BaseModel):
+    path: str = Field(..., min_length=1, regex='^/')
+    method: Optional[str] = Field(None, min_length=1, max_length=10)
+    count: int = Field(1, gt=0, le=MAX_PROFILED_REQUESTS)
+    header_only: bool = False
+
+    class Config:
+        extra = Extra.forbid
+
+
+class ProfilerTargetRead(BaseModel):
+    method: Optional[str]
+    path: str
+    remaining: int
+    header_only: bool
+    token: str
+
+    class Config:
+        orm_mode = True
+
+
+class ProfileRead(BaseModel):
+    id: str
+    method: str
+    path: str
+    create_date: datetime
+    status: Optional[int]
+    duration: float
+    samples: int
+
+    class Config:
+        orm_mode = True
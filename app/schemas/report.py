@@ -0,0 +1,31 @@
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class ReportJobStatus(str, Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class ReportFormat(str, Enum):
+    CSV = 'csv'
+    XLSX = 'xlsx'
+    PARQUET = 'parquet'
+
+
+class ReportJobRead(BaseModel):
+    id: str
+    status: ReportJobStatus
+    create_date: datetime
+    url: Optional[str]
+    rows: Optional[int]
+    timing: Optional[Dict[str, float]]
+    error: Optional[str]
+
+    class Config:
+        orm_mode = True
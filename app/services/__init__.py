@@ -1,7 +1,12 @@
 from .const import (  # noqa
     StringCharityProject, StringDonation,
-    StringGoogleApi, StringValidatorsError
+    StringGoogleApi, StringMetrics, StringProfiler, StringReport, StringStats,
+    StringValidatorsError
 )
 from .google_api import (  # noqa
-    set_user_permissions, spreadsheets_update_value, spreadsheets_create)
-from .invested import invest_process # noqa
+    generate_report, refresh_report, set_user_permissions,
+    spreadsheets_append_value, spreadsheets_update_value,
+    spreadsheets_create)
+from .report_jobs import report_job_runner # noqa
+from .invested import count_collection_seconds, invest_process # noqa
+from .report_sinks import export_report, sink_available, stream_report # noqa
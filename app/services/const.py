@@ -11,6 +11,15 @@ class StringCharityProject:
     CREATE = 'Создаёт благотворительный проект.'
     DELETE = 'Удаляет благотворительный проект.'
     UPDATE = 'Изменяет благотворительный проект.'
+    GET_PROGRESS = 'Возвращает прогресс сбора проекта.'
+    GET_PROGRESS_MANY = 'Возвращает прогресс сбора нескольких проектов.'
+    GET_PROGRESS_DESCRIPTION = (
+        'Собранная и требуемая сумма и признак закрытия проекта. '
+        'Отдается из кэша, который обновляется при каждом '
+        'распределении средств, поэтому подходит для частого опроса.')
+    GET_PROGRESS_MANY_DESCRIPTION = (
+        'Прогресс проектов, перечисленных в параметрах ids, '
+        'например ?ids=1&ids=2. Несуществующие проекты пропускаются.')
     CREATE_DESCRIPTION = (
         'Только для суперюзеров.')
     DELETE_DESCRIPTION = (
@@ -36,6 +45,37 @@ class StringDonation:
     GET_DESCRIPTION = 'Только для авторизированного пользователя'
     CREATE_DESCRIPTION = 'Только для авторизированного пользователя'
     GET_ALL_DESCRIPTION = 'Только для суперюзеров.'
+    GET_SUMMARY = 'Возвращает итоги пожертвований пользователя.'
+    GET_SUMMARY_DESCRIPTION = (
+        'Только для авторизированного пользователя. Количество '
+        'пожертвований, пожертвованная и распределенная по проектам '
+        'сумма, даты первого и последнего пожертвования.'
+    )
+
+
+@dataclass(frozen=True)
+class StringStats:
+    """
+    Строковые константы для описание конечных точек
+    /stats
+    """
+    GET = 'Возвращает сводные показатели фонда'
+    GET_DESCRIPTION = (
+        'Количество проектов и пожертвований, собранная, распределенная '
+        'и ожидающая распределения сумма, сумма, которую осталось '
+        'собрать открытым проектам, и средняя длительность сбора '
+        'закрытого проекта в секундах. Читается из сводной таблицы, '
+        'которая обновляется при каждом изменении проектов '
+        'и пожертвований'
+    )
+    GET_DONATIONS = 'Возвращает пожертвования по часам, дням или неделям'
+    GET_DONATIONS_DESCRIPTION = (
+        'Количество и сумма пожертвований в каждом интервале, '
+        'пересекающемся с периодом от from до to (to не включается). '
+        'Интервалы без пожертвований не возвращаются. Читается '
+        'из таблицы интервалов, которая обновляется при каждом '
+        'пожертвовании'
+    )
 
 
 @dataclass(frozen=True)
@@ -48,6 +88,11 @@ class StringValidatorsError:
     NOT_FOUND = 'Проект не найден'
     FUNDS_PROJECT = 'В проект были внесены средства, не подлежит удалению!'
     CLOSED_PROJECT = 'Закрытый проект нельзя редактировать!'
+    JOB_NOT_FOUND = 'Задача формирования отчета не найдена'
+    PROFILE_NOT_FOUND = 'Профиль запроса не найден'
+    FORMAT_UNAVAILABLE = 'Формат отчета недоступен: не установлена библиотека'
+    DATE_RANGE = 'Начало периода должно быть раньше его конца'
+    TOO_MANY_IDS = 'Слишком много проектов в одном запросе'
 
 
 @dataclass(frozen=True)
@@ -57,7 +102,78 @@ class StringGoogleApi:
     /google_api
     """
     GET_CREATE = 'Формирует отчет'
+    GET_JOB = 'Возвращает статус фонового формирования отчета'
+    GET_STATS = 'Возвращает счетчики запросов к Google API'
+    GET_STATS_DESCRIPTION = (
+        'Только для суперюзеров. Количество запросов, повторов '
+        'и ошибок по API, суммарные паузы ограничителя частоты '
+        'и экспоненциальной задержки в секундах, количество '
+        'записанных в таблицы проектов'
+    )
+    GET_JOB_DESCRIPTION = (
+        'Только для суперюзеров. После завершения задачи '
+        'содержит ссылку на отчет или текст ошибки'
+    )
     GET_CREATE_DESCRIPTION = (
-        'Возвращает ссылку на отчет и список'
-        'данных внесенных в отчет'
+        'Возвращает ссылку на отчет, количество '
+        'проектов в отчете и длительность '
+        'шагов формирования отчета в секундах. '
+        'С параметром background=true ставит отчет в очередь '
+        'и сразу возвращает идентификатор задачи. '
+        'С параметром incremental=true дописывает в прошлый отчет '
+        'только проекты, которых в нем еще нет. Дописанные проекты '
+        'отсортированы только между собой и идут после прежних'
+    )
+
+
+@dataclass(frozen=True)
+class StringReport:
+    """
+    Строковые константы для описание конечных точек
+    /report
+    """
+    GET_FILE = 'Выгружает отчет в файл'
+    GET_FILE_DESCRIPTION = (
+        'Только для суперюзеров. Потоково отдает закрытые проекты, '
+        'отсортированные по скорости сбора, в формате csv, xlsx '
+        'или parquet. Для xlsx и parquet на сервере должны быть '
+        'установлены openpyxl и pyarrow'
+    )
+
+
+@dataclass(frozen=True)
+class StringMetrics:
+    """
+    Строковые константы для описание конечных точек
+    /metrics
+    """
+    GET = 'Возвращает метрики в формате Prometheus'
+    GET_DESCRIPTION = (
+        'Гистограммы длительности запросов по маршрутам, '
+        'распределения средств, ожидания соединений из пула, '
+        'запросов к Google API и формирования отчетов, '
+        'а также состояние пула соединений и счетчики повторов'
+    )
+
+
+@dataclass(frozen=True)
+class StringProfiler:
+    """
+    Строковые константы для описание конечных точек
+    /profiler
+    """
+    POST_ARM = 'Включает профилирование запросов'
+    POST_ARM_DESCRIPTION = (
+        'Только для суперюзеров. Следующие count запросов с указанным '
+        'методом и началом пути выполняются под семплирующим '
+        'профилировщиком. С параметром header_only=true профилируются '
+        'только запросы с выданным токеном в заголовке X-Profile'
+    )
+    DELETE_ARM = 'Отключает профилирование запросов'
+    GET_STATUS = 'Возвращает ожидающие профилирования запросы'
+    GET_PROFILES = 'Возвращает последние профили запросов'
+    GET_PROFILE = 'Возвращает стеки профиля в свернутом формате'
+    GET_PROFILE_DESCRIPTION = (
+        'Только для суперюзеров. Строки вида `стек количество`, '
+        'которые принимают flamegraph.pl и speedscope'
     )
@@ -1,37 +1,172 @@
+import asyncio
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from http import HTTPStatus as st
+from time import perf_counter
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Dict, Hashable, List,
+    Optional, Sequence, Set, Union)
 
 from aiogoogle import Aiogoogle
+from aiogoogle.excs import HTTPError
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.core.config import settings
+from app.core.google_client import (
+    call, discover, google_client, is_retryable)
+from app.core.metrics import report_duration
+from app.crud import charity_project_crud, report_state_crud
+from app.models import ReportState
 
 FORMAT = "%Y/%m/%d %H:%M:%S"
+REPORT_NAME = 'completion_rate'
+SPREADSHEET_URL = 'https://docs.google.com/spreadsheets/d/{}'
+TABLE_HEADER = (
+    ('Отчет от',),
+    ('Топ поектов по скорости закрытия',),
+    ('Название проекта', 'Время сбора', 'Описание'),
+)
+COLUMN_COUNT = len(TABLE_HEADER[-1])
+# Размер листа по умолчанию в Google Sheets; таблица создается
+# до подсчета проектов, а лист подгоняется под отчет после него.
+DEFAULT_ROW_COUNT = 1000
+
+refresh_lock = asyncio.Lock()
+
+
+@dataclass
+class ReportProgress:
+    """
+    Состояние недописанного отчета. Хранится после временной ошибки
+    Google API, чтобы следующий запуск продолжил запись в ту же
+    таблицу с того же места, а не начинал отчет заново.
+    recent_ids - записанные проекты, закрытые после recent_after:
+    их пропускает следующее обновление, читающее окно повторно.
+    """
+    spreadsheet_id: str
+    row_count: int
+    watermark: Optional[datetime]
+    permissions: bool = False
+    resized: bool = False
+    rows: int = 0
+    recent_after: Optional[datetime] = None
+    recent_ids: Set[int] = field(default_factory=set)
+
+    def add_rows(self, chunk: Sequence) -> None:
+        """Учитывает записанную часть проектов."""
+        self.rows += len(chunk)
+        self.recent_ids.update(
+            project['id'] for project in chunk
+            if self.recent_after is None or
+            project['close_date'] > self.recent_after
+        )
+
+
+def overlap_start(watermark: Optional[datetime]) -> Optional[datetime]:
+    """
+    Начало окна, которое обновление отчета читает повторно: проект,
+    закрытый до watermark, мог зафиксироваться после прошлого обновления.
+    """
+    if watermark is None:
+        return None
+    return watermark - timedelta(seconds=settings.report_refresh_overlap)
+
+
+unfinished_reports: Dict[Hashable, ReportProgress] = {}
 
 
-async def spreadsheets_create(wrapper_services: Aiogoogle) -> str:
+async def iterate_chunks(
+        projects: Union[Sequence, AsyncIterable[Sequence]],
+        chunk_size: int,
+) -> AsyncIterator[Sequence]:
+    """
+    Разбивает проекты на части для записи в таблицу
+    #### Args:
+    - projects: Список проектов или асинхронный поток частей списка.
+    - chunk_size (int): Размер части для списка проектов.
+    #### Returns:
+    - AsyncIterator[Sequence]: Части списка проектов.
+    """
+    if isinstance(projects, AsyncIterable):
+        async for chunk in projects:
+            yield chunk
+        return
+    for start in range(0, len(projects), chunk_size):
+        yield projects[start:start + chunk_size]
+
+
+def make_row(project) -> List[str]:
+    """Строка таблицы для закрытого проекта."""
+    return [
+        project['name'],
+        str(timedelta(days=project['сollection_rate'])),
+        project['description'],
+    ]
+
+
+async def spreadsheets_create(
+        wrapper_services: Aiogoogle,
+        row_count: int = 0,
+) -> str:
     """
     Создает новую Google таблицу.
     #### Args:
     - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+    - row_count (int): Количество проектов в отчете,
+    по нему рассчитывается размер листа.
     #### Returns:
     - str: ID новой созданной таблицы.
     """
     now_date_time = datetime.now().strftime(FORMAT)
-    service = await wrapper_services.discover('sheets', 'v4')
+    service = await discover(wrapper_services, 'sheets', 'v4')
     spreadsheet_body = {
         'properties': {'title': f'Отчет на {now_date_time}',
                        'locale': 'ru_RU'},
-        'sheets': [{'properties': {'sheetType': 'GRID',
-                                   'sheetId': 0,
-                                   'title': 'Лист1',
-                                   'gridProperties': {'rowCount': 100,
-                                                      'columnCount': 7}}}]
+        'sheets': [{'properties': {
+            'sheetType': 'GRID',
+            'sheetId': 0,
+            'title': 'Лист1',
+            'gridProperties': {'rowCount': len(TABLE_HEADER) + row_count,
+                               'columnCount': COLUMN_COUNT}}}]
     }
-    response = await wrapper_services.as_service_account(
-        service.spreadsheets.create(json=spreadsheet_body)
+    response = await call(
+        wrapper_services, 'sheets',
+        service.spreadsheets.create(json=spreadsheet_body),
+        idempotent=False,
     )
     spreadsheetid = response['spreadsheetId']
     return spreadsheetid
 
 
+async def spreadsheets_resize(
+        spreadsheetid: str,
+        wrapper_services: Aiogoogle,
+        row_count: int,
+) -> None:
+    """
+    Меняет количество строк листа под количество проектов в отчете.
+    #### Args:
+    - spreadsheetid (строка): Идентификатор электронной таблицы.
+    - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+    - row_count (int): Количество проектов в отчете.
+    """
+    service = await discover(wrapper_services, 'sheets', 'v4')
+    await call(
+        wrapper_services, 'sheets',
+        service.spreadsheets.batchUpdate(
+            spreadsheetId=spreadsheetid,
+            json={'requests': [{'updateSheetProperties': {
+                'properties': {
+                    'sheetId': 0,
+                    'gridProperties': {
+                        'rowCount': len(TABLE_HEADER) + row_count},
+                },
+                'fields': 'gridProperties.rowCount',
+            }}]},
+        )
+    )
+
+
 async def set_user_permissions(
         spreadsheetid: str,
         wrapper_services: Aiogoogle
@@ -47,8 +182,9 @@ async def set_user_permissions(
     permissions_body = {'type': 'user',
                         'role': 'writer',
                         'emailAddress': settings.email}
-    service = await wrapper_services.discover('drive', 'v3')
-    await wrapper_services.as_service_account(
+    service = await discover(wrapper_services, 'drive', 'v3')
+    await call(
+        wrapper_services, 'drive',
         service.permissions.create(
             fileId=spreadsheetid,
             json=permissions_body,
@@ -58,41 +194,391 @@ async def set_user_permissions(
 
 async def spreadsheets_update_value(
         spreadsheetid: str,
-        projects: list,
-        wrapper_services: Aiogoogle
-) -> None:
+        projects: Union[Sequence, AsyncIterable[Sequence]],
+        wrapper_services: Aiogoogle,
+        progress: Optional[ReportProgress] = None,
+) -> int:
     """
-    Обновляет значения в таблице Google Spreadsheet.
+    Записывает отчет в таблицу Google Spreadsheet частями
+    через values.batchUpdate. Каждая часть пишется в свой диапазон,
+    поэтому повтор записи безопасен.
     #### Args:
     - spreadsheetid (строка): Идентификатор электронной таблицы.
-    - projects: list - Список проектов для обновления в таблице.
+    - projects: Список проектов или асинхронный поток частей списка.
     - wrapper_services (Aiogoogle): Объект Aiogoogle,
     используемый для взаимодействия с Google Drive API.
+    - progress (Optional[ReportProgress]): Состояние отчета: запись
+    начинается после progress.rows уже записанных проектов,
+    а счетчик растет после каждой записанной части.
+    #### Returns:
+    - int: Количество записанных проектов.
     """
     now_date_time = datetime.now().strftime(FORMAT)
-    service = await wrapper_services.discover('sheets', 'v4')
-    table_values = [
-        ['Отчет от', now_date_time],
-        ['Топ поектов по скорости закрытия'],
-        ['Название проекта', 'Время сбора', 'Описание']
-    ]
-    for project in projects:
-        new_row = [
-            project['name'],
-            str(timedelta(days=project['сollection_rate'])),
-            project['description'],
-        ]
-        table_values.append(new_row)
-
-    update_body = {
-        'majorDimension': 'ROWS',
-        'values': table_values
-    }
-    await wrapper_services.as_service_account(
+    service = await discover(wrapper_services, 'sheets', 'v4')
+    table_header = [list(row) for row in TABLE_HEADER]
+    table_header[0].append(now_date_time)
+    data = [{'range': f'A1:C{len(TABLE_HEADER)}', 'values': table_header}]
+    offset = progress.rows if progress is not None else 0
+    written = 0
+
+    async def write(data: List[Dict[str, Any]]) -> None:
+        await call(
+            wrapper_services, 'sheets',
+            service.spreadsheets.values.batchUpdate(
+                spreadsheetId=spreadsheetid,
+                json={'valueInputOption': 'USER_ENTERED', 'data': data},
+            )
+        )
+
+    async for chunk in iterate_chunks(
+            projects, settings.google_sheets_chunk_rows):
+        start = len(TABLE_HEADER) + offset + written + 1
+        data.append({
+            'range': f'A{start}:C{start + len(chunk) - 1}',
+            'majorDimension': 'ROWS',
+            'values': [make_row(project) for project in chunk],
+        })
+        await write(data)
+        data = []
+        written += len(chunk)
+        google_client.stats.rows_written += len(chunk)
+        if progress is not None:
+            progress.add_rows(chunk)
+    if data:
+        await write(data)
+    return written
+
+
+async def spreadsheets_append_value(
+        spreadsheetid: str,
+        projects: Union[Sequence, AsyncIterable[Sequence]],
+        wrapper_services: Aiogoogle,
+        progress: Optional[ReportProgress] = None,
+) -> int:
+    """
+    Дописывает проекты в конец существующей таблицы через values.append
+    и обновляет дату отчета в заголовке. values.append не идемпотентен,
+    поэтому повторяется только после ответа 429.
+    #### Args:
+    - spreadsheetid (строка): Идентификатор электронной таблицы.
+    - projects: Список проектов или асинхронный поток частей списка.
+    - wrapper_services (Aiogoogle): Объект Aiogoogle,
+    используемый для взаимодействия с Google Drive API.
+    - progress (Optional[ReportProgress]): Состояние отчета, счетчик
+    progress.rows растет после каждой дописанной части.
+    #### Returns:
+    - int: Количество дописанных проектов.
+    """
+    now_date_time = datetime.now().strftime(FORMAT)
+    service = await discover(wrapper_services, 'sheets', 'v4')
+    written = 0
+    async for chunk in iterate_chunks(
+            projects, settings.google_sheets_chunk_rows):
+        await call(
+            wrapper_services, 'sheets',
+            service.spreadsheets.values.append(
+                spreadsheetId=spreadsheetid,
+                range=f'A{len(TABLE_HEADER)}:C',
+                valueInputOption='USER_ENTERED',
+                insertDataOption='INSERT_ROWS',
+                json={
+                    'majorDimension': 'ROWS',
+                    'values': [make_row(project) for project in chunk],
+                },
+            ),
+            idempotent=False,
+        )
+        written += len(chunk)
+        google_client.stats.rows_written += len(chunk)
+        if progress is not None:
+            progress.add_rows(chunk)
+    await call(
+        wrapper_services, 'sheets',
         service.spreadsheets.values.update(
             spreadsheetId=spreadsheetid,
-            range='A1:C100',
+            range='A1:B1',
             valueInputOption='USER_ENTERED',
-            json=update_body
+            json={'values': [[TABLE_HEADER[0][0], now_date_time]]},
         )
     )
+    return written
+
+
+async def timed(
+        step: str,
+        timing: Dict[str, float],
+        awaitable: Awaitable,
+) -> Any:
+    """
+    Выполняет шаг формирования отчета и записывает его длительность
+    #### Args:
+    - step (str): Название шага.
+    - timing (Dict[str, float]): Словарь длительностей шагов в секундах.
+    - awaitable (Awaitable): Выполняемая корутина.
+    #### Returns:
+    - Any: Результат корутины.
+    """
+    start = perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timing[step] = round(perf_counter() - start, 3)
+
+
+async def run_resumable(
+        key: Hashable,
+        progress: ReportProgress,
+        *awaitables: Awaitable,
+) -> List[Any]:
+    """
+    Выполняет шаги записи отчета до завершения каждого из них.
+    После временной ошибки Google API состояние отчета сохраняется
+    в unfinished_reports, чтобы следующий запуск продолжил запись.
+    #### Args:
+    - key (Hashable): Ключ отчета.
+    - progress (ReportProgress): Состояние отчета.
+    - awaitables (Awaitable): Шаги записи отчета.
+    #### Returns:
+    - List[Any]: Результаты шагов.
+    #### Raises:
+    - Exception: Первая ошибка среди шагов.
+    """
+    results = await asyncio.gather(*awaitables, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            if is_retryable(result):
+                unfinished_reports[key] = progress
+            raise result
+    return results
+
+
+async def write_full_report(
+        session: AsyncSession,
+        wrapper_services: Aiogoogle,
+        timing: Dict[str, float],
+        limit: Optional[int] = None,
+) -> ReportProgress:
+    """
+    Создает новую таблицу и записывает в нее закрытые проекты.
+    Подсчет проектов выполняется параллельно с созданием таблицы
+    с листом размера по умолчанию, после подсчета лист подгоняется
+    под отчет. Проекты читаются из базы частями и сразу записываются
+    в таблицу, поэтому размер отчета не ограничен памятью. Выдача прав
+    выполняется параллельно с записью значений. Если прошлый отчет
+    с теми же параметрами прервался из-за временной ошибки,
+    запись продолжается в его таблицу с первого незаписанного проекта.
+    #### Args:
+    - session (AsyncSession): Асинхронная сессия базы данных.
+    - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+    - timing (Dict[str, float]): Словарь длительностей шагов в секундах.
+    - limit (Optional[int]): Количество самых быстрых проектов в отчете.
+    #### Returns:
+    - ReportProgress: Состояние записанного отчета: ID таблицы,
+    количество проектов, наибольшая дата закрытия среди проектов,
+    попавших в выборку, и проекты окна повторного чтения.
+    """
+    key = (REPORT_NAME, limit)
+    progress = unfinished_reports.pop(key, None)
+    if progress is None:
+        (row_count, watermark), spreadsheet_id = await asyncio.gather(
+            timed(
+                'count', timing,
+                charity_project_crud.get_closed_summary(session)
+            ),
+            timed(
+                'create', timing,
+                spreadsheets_create(wrapper_services, DEFAULT_ROW_COUNT)
+            ),
+        )
+        if limit is not None:
+            row_count = min(row_count, limit)
+        progress = ReportProgress(
+            spreadsheet_id, row_count, watermark,
+            resized=row_count == DEFAULT_ROW_COUNT,
+            recent_after=overlap_start(watermark),
+        )
+    projects = charity_project_crud.stream_projects_by_completion_rate(
+        session, settings.google_sheets_chunk_rows,
+        progress.row_count - progress.rows, offset=progress.rows,
+        closed_until=progress.watermark,
+    )
+
+    async def grant_permissions() -> None:
+        if not progress.permissions:
+            await set_user_permissions(
+                progress.spreadsheet_id, wrapper_services)
+            progress.permissions = True
+
+    async def write_values() -> None:
+        if not progress.resized:
+            await timed('resize', timing, spreadsheets_resize(
+                progress.spreadsheet_id, wrapper_services,
+                progress.row_count))
+            progress.resized = True
+        await timed('values', timing, spreadsheets_update_value(
+            progress.spreadsheet_id, projects, wrapper_services, progress))
+
+    try:
+        await run_resumable(
+            key, progress,
+            timed('permissions', timing, grant_permissions()),
+            write_values(),
+        )
+    finally:
+        await projects.aclose()
+    return progress
+
+
+async def generate_report(
+        session: AsyncSession,
+        wrapper_services: Aiogoogle,
+        limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Формирует отчет о закрытых проектах в новой Google таблице.
+    #### Args:
+    - session (AsyncSession): Асинхронная сессия базы данных.
+    - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+    - limit (Optional[int]): Количество самых быстрых проектов в отчете.
+    #### Returns:
+    - Dict[str, Any]: Ссылка на отчет, количество проектов в отчете
+    и длительности шагов.
+    """
+    timing = {}
+    start = perf_counter()
+    progress = await write_full_report(
+        session, wrapper_services, timing, limit
+    )
+    timing['total'] = round(perf_counter() - start, 3)
+    report_duration.observe(timing['total'], 'full')
+    return {
+        'URL': SPREADSHEET_URL.format(progress.spreadsheet_id),
+        'rows': progress.rows,
+        'timing': timing,
+    }
+
+
+async def append_new_projects(
+        session: AsyncSession,
+        wrapper_services: Aiogoogle,
+        state: ReportState,
+        timing: Dict[str, float],
+) -> ReportProgress:
+    """
+    Дописывает в таблицу отчета проекты, закрытые после сохраненной
+    даты закрытия или в окне report_refresh_overlap перед ней и еще
+    не попавшие в отчет. Прерванная запись продолжается с первого
+    недописанного проекта.
+    #### Args:
+    - session (AsyncSession): Асинхронная сессия базы данных.
+    - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+    - state (ReportState): Сохраненное состояние отчета.
+    - timing (Dict[str, float]): Словарь длительностей шагов в секундах.
+    #### Returns:
+    - ReportProgress: Состояние дописанного отчета; recent_ids
+    включает и прежние проекты, оставшиеся в новом окне.
+    """
+    key = (REPORT_NAME, 'incremental')
+    closed_after = overlap_start(state.watermark)
+    recent_ids = set(state.recent_ids or ())
+    progress = unfinished_reports.pop(key, None)
+    if progress is None or progress.spreadsheet_id != state.spreadsheet_id:
+        count, watermark = await timed(
+            'count', timing,
+            charity_project_crud.get_closed_summary(
+                session, closed_after, recent_ids)
+        )
+        watermark = max(
+            (date for date in (watermark, state.watermark) if date),
+            default=None,
+        )
+        progress = ReportProgress(
+            state.spreadsheet_id, count, watermark, permissions=True,
+            recent_after=overlap_start(watermark),
+        )
+    projects = charity_project_crud.stream_projects_by_completion_rate(
+        session, settings.google_sheets_chunk_rows,
+        progress.row_count - progress.rows, offset=progress.rows,
+        closed_after=closed_after, closed_until=progress.watermark,
+        exclude_ids=recent_ids,
+    )
+    try:
+        if progress.rows < progress.row_count:
+            await timed(
+                'values', timing,
+                run_resumable(
+                    key, progress,
+                    spreadsheets_append_value(
+                        state.spreadsheet_id, projects,
+                        wrapper_services, progress)
+                )
+            )
+    except HTTPError as error:
+        if error.res is not None and error.res.status_code == st.NOT_FOUND:
+            unfinished_reports.pop(key, None)
+        raise
+    finally:
+        await projects.aclose()
+    if progress.recent_after is not None:
+        progress.recent_ids.update(await charity_project_crud.get_closed_ids(
+            session, recent_ids, progress.recent_after))
+    return progress
+
+
+async def refresh_report(
+        session: AsyncSession,
+        wrapper_services: Aiogoogle,
+) -> Dict[str, Any]:
+    """
+    Обновляет ранее сформированный отчет, дописывая в ту же таблицу
+    только проекты, которых в нем еще нет. Кроме проектов, закрытых
+    после сохраненной даты закрытия, повторно читается окно
+    report_refresh_overlap перед ней: проект мог зафиксироваться
+    после прошлого обновления с более ранней датой закрытия.
+    Проекты окна, уже попавшие в отчет, пропускаются по id.
+    Дописанные проекты сортируются по скорости сбора только между
+    собой и идут после уже записанных; полностью отсортированный
+    отчет дает формирование без incremental. Если отчета еще нет
+    или его таблица удалена, формируется полный отчет в новой таблице.
+    Сессия должна работать с основной базой: в ней сохраняется
+    состояние отчета.
+    #### Args:
+    - session (AsyncSession): Асинхронная сессия базы данных.
+    - wrapper_services (Aiogoogle): Экземпляр библиотеки Aiogoogle.
+    #### Returns:
+    - Dict[str, Any]: Ссылка на отчет, количество проектов в отчете,
+    количество добавленных проектов и длительности шагов.
+    """
+    timing = {}
+    start = perf_counter()
+    async with refresh_lock:
+        state = await report_state_crud.get_by_attribute(
+            'name', REPORT_NAME, session
+        )
+        progress = None
+        if state is not None:
+            try:
+                progress = await append_new_projects(
+                    session, wrapper_services, state, timing)
+            except HTTPError as error:
+                if error.res is None or error.res.status_code != st.NOT_FOUND:
+                    raise
+            else:
+                rows = state.rows + progress.rows
+        if progress is None:
+            progress = await write_full_report(
+                session, wrapper_services, timing
+            )
+            rows = progress.rows
+        await report_state_crud.save(
+            REPORT_NAME, progress.spreadsheet_id, progress.watermark, rows,
+            sorted(progress.recent_ids), session
+        )
+    timing['total'] = round(perf_counter() - start, 3)
+    report_duration.observe(timing['total'], 'incremental')
+    return {
+        'URL': SPREADSHEET_URL.format(progress.spreadsheet_id),
+        'rows': rows,
+        'appended': progress.rows,
+        'timing': timing,
+    }
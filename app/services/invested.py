@@ -1,17 +1,22 @@
 from datetime import datetime
-from typing import AsyncGenerator, Tuple
+from time import perf_counter
+from typing import AsyncGenerator, Optional, Tuple
 
 from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_async_session
+from app.core.metrics import (
+    allocation_batch_size, allocation_duration, allocation_rows_touched)
+from app.core.timing import timed_phase
 from app.models import BaseModel, CharityProject, Donation
 
 
 async def get_open_obj_generate(
         model: BaseModel,
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_async_session),
+        trigger: Optional[str] = None,
 ) -> AsyncGenerator[BaseModel, None]:
     """
     Асинхронный генератор генерует не закрытые объекты из базы данных
@@ -19,19 +24,42 @@ async def get_open_obj_generate(
         - model (BaseModel): Экземпляр базовой модели.
         - session (AsyncSession) асинхронная сессия базы данных.
     Добавлена через Depends.
+        - trigger (Optional[str]): Модель объекта, запустившего
+        распределение, - метка метрик, как у остальных метрик
+        распределения. По умолчанию модель открытых объектов.
     #### Returns:
         - AsyncGenerator[BaseModel, None]: Генерирует объекты BaseModel.
     """
     query_open_obj = await session.execute(
         select(model)
-        .where(model.fully_invested == 0)
+        .where(model.fully_invested.is_(False))
         .order_by(model.create_date)
     )
     list_open_obj = query_open_obj.scalars().all()
+    allocation_batch_size.observe(
+        len(list_open_obj), trigger or model.__name__)
     for obj in list_open_obj:
         yield obj
 
 
+def count_collection_seconds(
+        create_date: Optional[datetime],
+        close_date: datetime,
+) -> int:
+    """
+    Вычисляет длительность сбора средств в секундах
+    #### Args:
+        - create_date (Optional[datetime]): Дата создания объекта.
+        Для еще не сохраненного объекта равна None.
+        - close_date (datetime): Дата закрытия объекта.
+    #### Returns:
+        - int: Количество секунд между созданием и закрытием.
+    """
+    if create_date is None:
+        return 0
+    return int((close_date - create_date).total_seconds())
+
+
 async def close_obj(
         obj: BaseModel,
 ) -> None:
@@ -43,6 +71,9 @@ async def close_obj(
     obj.invested_amount = obj.full_amount
     obj.close_date = datetime.now()
     obj.fully_invested = True
+    if isinstance(obj, CharityProject):
+        obj.collection_seconds = count_collection_seconds(
+            obj.create_date, obj.close_date)
 
 
 async def just_do_investing(
@@ -73,6 +104,7 @@ async def just_do_investing(
     return obj_giving, obj_receiving
 
 
+@timed_phase('invest')
 async def invest_process(
     obj_in: BaseModel,
     session: AsyncSession,
@@ -85,10 +117,12 @@ async def invest_process(
     #### Returns:
         - BaseModel: Обновленный объект obj_in после завершения инвестиций
     """
+    start = perf_counter()
+    model = type(obj_in).__name__
     if isinstance(obj_in, Donation):
-        open_obj = get_open_obj_generate(CharityProject, session)
+        open_obj = get_open_obj_generate(CharityProject, session, model)
     else:
-        open_obj = get_open_obj_generate(Donation, session)
+        open_obj = get_open_obj_generate(Donation, session, model)
     add_obj = []
     async for obj_receiving in open_obj:
         obj_in, obj_receiving = await just_do_investing(
@@ -98,9 +132,10 @@ async def invest_process(
             break
     add_obj.append(obj_in)
 
-    for obj in add_obj:
-        session.add(obj)
-        await session.commit()
-        await session.refresh(obj)
+    session.add_all(add_obj)
+    await session.commit()
+    await session.refresh(obj_in)
 
+    allocation_rows_touched.observe(len(add_obj), model)
+    allocation_duration.observe(perf_counter() - start, model)
     return obj_in
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Set
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.db import AsyncReadSessionLocal, AsyncSessionLocal
+from app.core.google_client import get_service
+from app.schemas.report import ReportJobStatus
+from app.services.google_api import generate_report, refresh_report
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReportJob:
+    """Фоновая задача формирования отчета."""
+    key: Hashable
+    id: str = field(default_factory=lambda: uuid4().hex)
+    status: ReportJobStatus = ReportJobStatus.PENDING
+    create_date: datetime = field(default_factory=datetime.now)
+    url: Optional[str] = None
+    rows: Optional[int] = None
+    timing: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+
+
+async def build_report(
+        limit: Optional[int] = None,
+        incremental: bool = False,
+) -> Dict[str, Any]:
+    """
+    Формирует отчет в собственной сессии базы и клиенте Google API.
+    Инкрементальный отчет сохраняет свое состояние,
+    поэтому работает с основной базой.
+    """
+    session_factory = AsyncSessionLocal if incremental else (
+        AsyncReadSessionLocal)
+    async with session_factory() as session:
+        async with asynccontextmanager(get_service)() as wrapper_services:
+            if incremental:
+                return await refresh_report(session, wrapper_services)
+            return await generate_report(session, wrapper_services, limit)
+
+
+class ReportJobRunner:
+    """
+    Выполняет задачи формирования отчетов в цикле событий приложения.
+    Одновременно выполняется не больше concurrency задач, одинаковые
+    задачи, ожидающие запуска, объединяются в одну. Хранится history
+    последних задач; вытесняются только завершенные задачи, поэтому
+    пока выполняются активные, реестр может быть больше history.
+    Реестр задач свой у каждого процесса.
+    """
+
+    def __init__(self, concurrency: int, history: int) -> None:
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.history = history
+        self.jobs: 'OrderedDict[str, ReportJob]' = OrderedDict()
+        self.pending: Dict[Hashable, ReportJob] = {}
+        self.tasks: Set[asyncio.Task] = set()
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self.jobs.get(job_id)
+
+    def submit(
+            self,
+            limit: Optional[int] = None,
+            incremental: bool = False,
+    ) -> ReportJob:
+        """
+        Ставит отчет в очередь
+        #### Args:
+        - limit (Optional[int]): Количество самых быстрых проектов в отчете.
+        - incremental (bool): Дописать новые проекты в прошлый отчет.
+        #### Returns:
+        - ReportJob: Новая задача или ожидающая запуска задача
+        с теми же параметрами.
+        """
+        key = ('completion_rate', None if incremental else limit, incremental)
+        job = self.pending.get(key)
+        if job is not None:
+            return job
+        job = ReportJob(key=key)
+        self.pending[key] = job
+        self.jobs[job.id] = job
+        self._evict()
+        task = asyncio.create_task(self._run(job, limit, incremental))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return job
+
+    def _evict(self) -> None:
+        """Удаляет самые старые завершенные задачи сверх history."""
+        finished = (ReportJobStatus.DONE, ReportJobStatus.FAILED)
+        excess = len(self.jobs) - self.history
+        for job_id in [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in finished
+        ][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+    async def stop(self) -> None:
+        """Отменяет незавершенные задачи при остановке приложения."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def _run(
+            self,
+            job: ReportJob,
+            limit: Optional[int],
+            incremental: bool,
+    ) -> None:
+        async with self.semaphore:
+            self.pending.pop(job.key, None)
+            job.status = ReportJobStatus.RUNNING
+            try:
+                report = await build_report(limit, incremental)
+            except Exception as error:
+                logger.exception('Отчет %s не сформирован', job.id)
+                job.status = ReportJobStatus.FAILED
+                job.error = str(error) or error.__class__.__name__
+            else:
+                job.url = report['URL']
+                job.rows = report['rows']
+                job.timing = report['timing']
+                job.status = ReportJobStatus.DONE
+            self._evict()
+
+
+report_job_runner = ReportJobRunner(
+    settings.report_jobs_concurrency, settings.report_jobs_history
+)
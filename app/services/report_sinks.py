@@ -0,0 +1,252 @@
+import csv
+import io
+import tempfile
+from abc import ABC, abstractmethod
+from typing import (
+    AsyncIterator, BinaryIO, Dict, Iterator, List, Optional,
+    Sequence, Tuple, Type)
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import charity_project_crud
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+try:
+    import pyarrow
+    from pyarrow import parquet
+except ImportError:
+    pyarrow = parquet = None
+
+REPORT_COLUMNS = ('Название проекта', 'Время сбора, дней', 'Описание')
+READ_SIZE = 64 * 1024
+
+
+def report_row(project) -> Tuple[str, float, str]:
+    """Строка файлового отчета для закрытого проекта."""
+    return (
+        project['name'],
+        project['сollection_rate'],
+        project['description'],
+    )
+
+
+class ReportSink(ABC):
+    """
+    Потоковый писатель отчета в файл.
+    Каждый метод возвращает байты, готовые к отправке клиенту:
+    header - в начале файла, write - после очередной части проектов,
+    close - в конце файла.
+    """
+    extension: str
+    media_type: str
+
+    def header(self) -> bytes:
+        return b''
+
+    @abstractmethod
+    def write(self, rows: Sequence[Tuple]) -> bytes:
+        ...
+
+    def close(self) -> Iterator[bytes]:
+        return iter(())
+
+
+class CSVSink(ReportSink):
+    """CSV в UTF-8 с BOM, чтобы Excel верно показывал кириллицу."""
+    extension = 'csv'
+    media_type = 'text/csv; charset=utf-8'
+
+    def __init__(self) -> None:
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _drain(self) -> bytes:
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self.writer.writerow(REPORT_COLUMNS)
+        return '\ufeff'.encode() + self._drain()
+
+    def write(self, rows: Sequence[Tuple]) -> bytes:
+        self.writer.writerows(rows)
+        return self._drain()
+
+
+class XLSXSink(ReportSink):
+    """
+    XLSX через openpyxl в режиме write_only: строки сразу уходят
+    во временный файл, а книга целиком отдается после последней части.
+    """
+    extension = 'xlsx'
+    media_type = (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+    def __init__(self) -> None:
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Отчет')
+
+    def header(self) -> bytes:
+        self.sheet.append(REPORT_COLUMNS)
+        return b''
+
+    def write(self, rows: Sequence[Tuple]) -> bytes:
+        for row in rows:
+            self.sheet.append(row)
+        return b''
+
+    def close(self) -> Iterator[bytes]:
+        with tempfile.TemporaryFile() as file:
+            self.workbook.save(file)
+            file.seek(0)
+            while True:
+                data = file.read(READ_SIZE)
+                if not data:
+                    break
+                yield data
+
+
+class _Drain(io.RawIOBase):
+    """Файл только для записи, отдающий накопленные байты через pop."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ParquetSink(ReportSink):
+    """Parquet через pyarrow: каждая часть проектов - отдельная row group."""
+    extension = 'parquet'
+    media_type = 'application/vnd.apache.parquet'
+
+    def __init__(self) -> None:
+        self.schema = pyarrow.schema([
+            ('name', pyarrow.string()),
+            ('collection_days', pyarrow.float64()),
+            ('description', pyarrow.string()),
+        ])
+        self.file = _Drain()
+        self.writer = parquet.ParquetWriter(self.file, self.schema)
+
+    def write(self, rows: Sequence[Tuple]) -> bytes:
+        columns = list(zip(*rows)) or [[]] * len(self.schema)
+        self.writer.write_table(
+            pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type)
+                 for column, field in zip(columns, self.schema)],
+                schema=self.schema,
+            )
+        )
+        return self.file.pop()
+
+    def close(self) -> Iterator[bytes]:
+        self.writer.close()
+        yield self.file.pop()
+
+
+REPORT_SINKS: Dict[str, Type[ReportSink]] = {
+    CSVSink.extension: CSVSink,
+    XLSXSink.extension: XLSXSink,
+    ParquetSink.extension: ParquetSink,
+}
+SINK_DEPENDENCIES = {
+    XLSXSink.extension: Workbook,
+    ParquetSink.extension: pyarrow,
+}
+
+
+def sink_available(report_format: str) -> bool:
+    """Установлена ли библиотека, нужная для формата отчета."""
+    return SINK_DEPENDENCIES.get(report_format, True) is not None
+
+
+async def stream_report(
+        session: AsyncSession,
+        report_format: str,
+        limit: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Потоково формирует файл отчета о закрытых проектах.
+    Проекты читаются частями через серверный курсор, каждая часть
+    сразу преобразуется в байты файла, поэтому в памяти находится
+    не больше report_chunk_rows проектов. Запись выполняется
+    в пуле потоков, чтобы не блокировать цикл событий.
+    #### Args:
+    - session (AsyncSession): Асинхронная сессия базы данных.
+    - report_format (str): Формат файла: csv, xlsx или parquet.
+    - limit (Optional[int]): Количество самых быстрых проектов в отчете.
+    #### Returns:
+    - AsyncIterator[bytes]: Части файла отчета.
+    """
+    sink = REPORT_SINKS[report_format]()
+    data = await run_in_threadpool(sink.header)
+    if data:
+        yield data
+    projects = charity_project_crud.stream_projects_by_completion_rate(
+        session, settings.report_chunk_rows, limit
+    )
+    try:
+        async for chunk in projects:
+            data = await run_in_threadpool(
+                sink.write, [report_row(project) for project in chunk]
+            )
+            if data:
+                yield data
+    finally:
+        await projects.aclose()
+    tail = sink.close()
+    while True:
+        data = await run_in_threadpool(next, tail, None)
+        if data is None:
+            break
+        yield data
+
+
+async def export_report(
+        session: AsyncSession,
+        report_format: str,
+        file: BinaryIO,
+        limit: Optional[int] = None,
+) -> int:
+    """
+    Записывает файл отчета о закрытых проектах на диск без обращения
+    к сети, например для выгрузок и замеров производительности.
+    #### Args:
+    - session (AsyncSession): Асинхронная сессия базы данных.
+    - report_format (str): Формат файла: csv, xlsx или parquet.
+    - file (BinaryIO): Открытый на запись файл.
+    - limit (Optional[int]): Количество самых быстрых проектов в отчете.
+    #### Returns:
+    - int: Количество записанных байт.
+    """
+    written = 0
+    async for data in stream_report(session, report_format, limit):
+        file.write(data)
+        written += len(data)
+    file.flush()
+    return written
@@ -1,9 +1,10 @@
+import os
 from pathlib import Path
 
 import pytest
-import pytest_asyncio
 from mixer.backend.sqlalchemy import Mixer as _mixer
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -16,10 +17,11 @@ except (NameError, ImportError):
     )
 
 try:
-    from app.core.db import Base, get_async_session
+    from app.core.db import Base, get_async_read_session, get_async_session
 except (NameError, ImportError):
     raise AssertionError(
-        'Не обнаружены объекты `Base, get_async_session`. '
+        'Не обнаружены объекты `Base, get_async_session, '
+        'get_async_read_session`. '
         'Проверьте и поправьте: они должны быть доступны в модуле '
         '`app.core.db`.',
     )
@@ -43,18 +45,49 @@ except (NameError, ImportError):
     )
 
 
+from app.core.user import user_cache
+from app.crud.project_progress import progress_cache
+from app.models import FundStats
+from app.models.fund_stats import FUND_STATS_ID
+
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
 
 pytest_plugins = [
     'fixtures.user',
     'fixtures.data',
+    'fixtures.google',
+    'fixtures.queries',
 ]
 
-TEST_DB = BASE_DIR / 'test.db'
-SQLALCHEMY_DATABASE_URL = f'sqlite+aiosqlite:///{str(TEST_DB)}'
+# Каждый процесс pytest-xdist работает со своей базой.
+WORKER_ID = os.getenv('PYTEST_XDIST_WORKER', 'main')
+# SQLite в памяти через VFS memdb: все соединения процесса, включая
+# синхронное соединение mixer, видят одну базу, пока открыто хотя бы
+# одно из них. В отличие от mode=memory&cache=shared, при конфликте
+# блокировок соединение ждет, как с файлом, а не падает сразу
+# с "database table is locked".
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    'TEST_DATABASE_URL',
+    f'sqlite+aiosqlite:///file:/qrkot_{WORKER_ID}?vfs=memdb&uri=true',
+)
+if 'TEST_DATABASE_URL' in os.environ and 'PYTEST_XDIST_WORKER' in os.environ:
+    # Для PostgreSQL нужны заранее созданные базы <база>_gw0, <база>_gw1...
+    SQLALCHEMY_DATABASE_URL = str(make_url(SQLALCHEMY_DATABASE_URL).set(
+        database=f'{make_url(SQLALCHEMY_DATABASE_URL).database}_{WORKER_ID}'
+    ))
+# Синхронный URL той же базы для mixer:
+# sqlite+aiosqlite -> sqlite, postgresql+asyncpg -> postgresql (psycopg2).
+SYNC_DATABASE_URL = make_url(SQLALCHEMY_DATABASE_URL).set(
+    drivername=make_url(SQLALCHEMY_DATABASE_URL).get_backend_name()
+)
+IS_SQLITE = SYNC_DATABASE_URL.get_backend_name() == 'sqlite'
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={'check_same_thread': False},
+    connect_args={'check_same_thread': False} if IS_SQLITE else {},
+)
+sync_engine = create_engine(
+    SYNC_DATABASE_URL,
+    connect_args={'check_same_thread': False} if IS_SQLITE else {},
 )
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
@@ -66,17 +99,45 @@ async def override_db():
         yield session
 
 
-@pytest_asyncio.fixture(autouse=True)
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+def clear_tables(connection) -> None:
+    """
+    Удаляет строки всех таблиц и сбрасывает счетчики id.
+    Сводка фонда возвращается к нулевой строке, как в новой базе.
+    """
+    tables = Base.metadata.sorted_tables
+    if IS_SQLITE:
+        for table in reversed(tables):
+            connection.execute(table.delete())
+    else:
+        connection.exec_driver_sql('TRUNCATE {} RESTART IDENTITY CASCADE'.format(
+            ', '.join(f'"{table.name}"' for table in tables)
+        ))
+    connection.execute(FundStats.__table__.insert().values(id=FUND_STATS_ID))
+
+
+@pytest.fixture(scope='session')
+def database():
+    """Схема создается один раз на процесс pytest."""
+    keeper = sync_engine.connect()
+    Base.metadata.drop_all(keeper)
+    Base.metadata.create_all(keeper)
+    yield
+    Base.metadata.drop_all(keeper)
+    keeper.close()
+
+
+@pytest.fixture(autouse=True)
+def init_db(database):
     yield
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+    with sync_engine.begin() as connection:
+        clear_tables(connection)
+    # id начинаются заново, кэши не должны пережить тест.
+    progress_cache.clear()
+    user_cache.clear()
 
 
 @pytest.fixture
 def mixer():
-    mixer_engine = create_engine(f'sqlite:///{str(TEST_DB)}')
-    session = sessionmaker(bind=mixer_engine)
-    return _mixer(session=session(), commit=True)
+    session = sessionmaker(bind=sync_engine)()
+    yield _mixer(session=session, commit=True)
+    session.close()
@@ -40,6 +40,7 @@ def small_fully_charity_project(freezer, mixer):
             '2010-10-11T00:00:00Z', '%Y-%m-%dT%H:%M:%SZ'
         ),
         create_date=datetime.now(),
+        collection_seconds=86400,
     )
 
 
@@ -70,6 +71,7 @@ def closed_charity_project(freezer, mixer):
             '2010-10-11T00:00:00Z', '%Y-%m-%dT%H:%M:%SZ'
         ),
         create_date=datetime.now(),
+        collection_seconds=86400,
     )
 
 
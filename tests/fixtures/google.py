@@ -0,0 +1,204 @@
+from collections import Counter
+
+import pytest_asyncio
+from aiogoogle.auth.utils import _get_expires_at
+from aiogoogle.data import DISCOVERY_SERVICE_V1_DISCOVERY_DOC
+from aiogoogle.resource import GoogleAPI
+from aiohttp import web
+
+from app.core.config import settings
+from app.core.google_client import (
+    DiscoveryCache, GoogleApiStats, google_client)
+from app.services import google_api
+
+
+def path_param(*names):
+    return {
+        name: {'location': 'path', 'required': True, 'type': 'string'}
+        for name in names
+    }
+
+
+def query_param(*names):
+    return {name: {'location': 'query', 'type': 'string'} for name in names}
+
+
+def method(method_id, http_method, path, path_params=(), query_params=()):
+    return {
+        'id': method_id,
+        'httpMethod': http_method,
+        'path': path,
+        'parameterOrder': list(path_params),
+        'parameters': {
+            **path_param(*path_params), **query_param(*query_params)
+        },
+    }
+
+
+def sheets_document(root_url):
+    return {
+        'name': 'sheets',
+        'version': 'v4',
+        'rootUrl': root_url,
+        'servicePath': '',
+        'batchPath': 'batch',
+        'parameters': {},
+        'schemas': {},
+        'resources': {'spreadsheets': {
+            'methods': {
+                'create': method(
+                    'sheets.spreadsheets.create', 'POST', 'v4/spreadsheets'
+                ),
+                'batchUpdate': method(
+                    'sheets.spreadsheets.batchUpdate', 'POST',
+                    'v4/spreadsheets/{spreadsheetId}:batchUpdate',
+                    ('spreadsheetId',),
+                ),
+            },
+            'resources': {'values': {'methods': {
+                'update': method(
+                    'sheets.spreadsheets.values.update', 'PUT',
+                    'v4/spreadsheets/{spreadsheetId}/values/{range}',
+                    ('spreadsheetId', 'range'), ('valueInputOption',),
+                ),
+                'append': method(
+                    'sheets.spreadsheets.values.append', 'POST',
+                    'v4/spreadsheets/{spreadsheetId}/values/{range}:append',
+                    ('spreadsheetId', 'range'),
+                    ('valueInputOption', 'insertDataOption'),
+                ),
+                'batchUpdate': method(
+                    'sheets.spreadsheets.values.batchUpdate', 'POST',
+                    'v4/spreadsheets/{spreadsheetId}/values:batchUpdate',
+                    ('spreadsheetId',),
+                ),
+            }}},
+        }},
+    }
+
+
+def drive_document(root_url):
+    return {
+        'name': 'drive',
+        'version': 'v3',
+        'rootUrl': root_url,
+        'servicePath': 'drive/v3/',
+        'batchPath': 'batch/drive/v3',
+        'parameters': {},
+        'schemas': {},
+        'resources': {'permissions': {'methods': {
+            'create': method(
+                'drive.permissions.create', 'POST',
+                'files/{fileId}/permissions', ('fileId',), ('fields',),
+            ),
+        }}},
+    }
+
+
+class FakeGoogle:
+    """
+    Локальный сервер с discovery-документами и методами Sheets/Drive.
+    Считает принятые запросы в requests, тела запросов хранит в bodies.
+    Через failures можно вернуть ошибки: имя маршрута -> список статусов,
+    None в списке пропускает запрос без ошибки.
+    """
+
+    def __init__(self):
+        self.requests = Counter()
+        self.bodies = []
+        self.failures = {}
+        self.spreadsheets = 0
+        self.root_url = None
+
+    async def handle(self, request):
+        name = request.match_info.route.name
+        self.requests[name] += 1
+        failure = self.failures.get(name)
+        status = failure.pop(0) if failure else None
+        if status is not None:
+            return web.json_response(
+                {'error': {'message': 'fake failure'}}, status=status
+            )
+        if request.can_read_body:
+            self.bodies.append((name, await request.json()))
+        if name == 'discovery':
+            documents = {
+                'sheets': sheets_document, 'drive': drive_document
+            }
+            return web.json_response(
+                documents[request.match_info['api']](self.root_url)
+            )
+        if name == 'create':
+            self.spreadsheets += 1
+            return web.json_response(
+                {'spreadsheetId': f'sheet-{self.spreadsheets}'}
+            )
+        if name == 'permissions':
+            return web.json_response({'id': 'permission'})
+        return web.json_response({})
+
+
+@pytest_asyncio.fixture
+async def fake_google(tmp_path, monkeypatch):
+    fake = FakeGoogle()
+    application = web.Application()
+    application.add_routes([
+        web.get(
+            '/discovery/v1/apis/{api}/{version}/rest', fake.handle,
+            name='discovery'
+        ),
+        web.post('/v4/spreadsheets', fake.handle, name='create'),
+        web.post(
+            '/v4/spreadsheets/{id}:batchUpdate', fake.handle,
+            name='batch_update'
+        ),
+        web.put(
+            '/v4/spreadsheets/{id}/values/{range}', fake.handle,
+            name='values_update'
+        ),
+        web.post(
+            '/v4/spreadsheets/{id}/values/{range}:append', fake.handle,
+            name='values_append'
+        ),
+        web.post(
+            '/v4/spreadsheets/{id}/values:batchUpdate', fake.handle,
+            name='values_batch_update'
+        ),
+        web.post(
+            '/drive/v3/files/{id}/permissions', fake.handle,
+            name='permissions'
+        ),
+    ])
+    runner = web.AppRunner(application)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    fake.root_url = f'http://127.0.0.1:{port}/'
+
+    aiogoogle = google_client.aiogoogle
+    monkeypatch.setattr(
+        aiogoogle, 'discovery_service',
+        GoogleAPI({
+            **DISCOVERY_SERVICE_V1_DISCOVERY_DOC, 'rootUrl': fake.root_url
+        })
+    )
+    monkeypatch.setattr(
+        aiogoogle.service_account_manager, '_access_token', 'fake-token'
+    )
+    monkeypatch.setattr(
+        aiogoogle.service_account_manager, '_expires_at',
+        _get_expires_at(3600)
+    )
+    monkeypatch.setattr(
+        google_client, 'discovery', DiscoveryCache(str(tmp_path), 3600)
+    )
+    monkeypatch.setattr(settings, 'google_sheets_rate', 0)
+    monkeypatch.setattr(settings, 'google_drive_rate', 0)
+    monkeypatch.setattr(settings, 'google_backoff_base', 0)
+    monkeypatch.setattr(google_client, 'stats', GoogleApiStats())
+    monkeypatch.setattr(google_api, 'unfinished_reports', {})
+    await google_client.start()
+    yield fake
+    await google_client.stop()
+    await runner.cleanup()
@@ -0,0 +1,142 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+from conftest import app, engine
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from starlette.routing import Match
+
+# Запросы сводок, которые after_flush добавляет к записи пожертвований
+# в той же транзакции: UPDATE сводки фонда, UPSERT итогов пользователя
+# и UPSERT часовых и дневных интервалов (один executemany). Сводки
+# лежат в разных таблицах, а SQLite не умеет изменять несколько таблиц
+# одним запросом, поэтому объединить их нельзя. Это осознанная цена
+# чтения /stats/, /donation/my/summary и /stats/donations одним
+# запросом; новая сводка должна явно увеличить бюджеты создания ниже.
+# Число не используется в расчётах и только документирует эту цену.
+ROLLUP_QUERIES = 3
+
+# Наибольшее количество SQL-запросов на один запрос к API.
+# Ключ - метод и шаблон пути маршрута. Списки читаются одним запросом
+# независимо от количества объектов, поэтому N+1 сразу превышает бюджет.
+QUERY_BUDGETS: Dict[Tuple[str, str], int] = {
+    ('GET', '/charity_project/'): 1,
+    ('GET', '/charity_project/progress'): 1,
+    ('GET', '/charity_project/{project_id}/progress'): 1,
+    # Проверка имени, открытые пожертвования, INSERT, UPDATE пожертвования,
+    # UPDATE сводки фонда, UPSERT итогов пользователя, чтение результата.
+    ('POST', '/charity_project/'): 7,
+    ('PATCH', '/charity_project/{project_id}'): 5,
+    ('DELETE', '/charity_project/{project_id}'): 3,
+    ('GET', '/donation/'): 1,
+    ('GET', '/donation/my'): 1,
+    ('GET', '/donation/my/summary'): 2,
+    # Открытые проекты, UPDATE проекта, INSERT, UPDATE сводки фонда,
+    # UPSERT итогов пользователя, UPSERT интервалов, чтение результата.
+    ('POST', '/donation/'): 7,
+    ('GET', '/report/{report_format}'): 1,
+    ('POST', '/auth/jwt/login'): 1,
+    ('POST', '/auth/register'): 3,
+    ('GET', '/users/me'): 1,
+    ('GET', '/stats/'): 1,
+    ('GET', '/stats/donations'): 1,
+}
+
+
+@dataclass
+class RequestQueries:
+    method: str
+    path: str
+    route: Optional[str]
+    statements: List[str] = field(default_factory=list)
+
+    def report(self, budget: int) -> str:
+        queries = '\n'.join(
+            f'{number}. {statement}'
+            for number, statement in enumerate(self.statements, 1)
+        )
+        return (
+            f'Запрос {self.method} {self.path} выполнил '
+            f'{len(self.statements)} SQL-запросов при бюджете {budget}:\n'
+            f'{queries}'
+        )
+
+
+def route_path(method: str, path: str) -> Optional[str]:
+    """Шаблон пути маршрута приложения, совпадающего с запросом."""
+    scope = {'type': 'http', 'method': method, 'path': path}
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+class QueryCounter:
+    """
+    Собирает SQL-запросы тестовой базы, выполненные во время каждого
+    запроса через TestClient, и проверяет бюджеты QUERY_BUDGETS.
+    """
+
+    def __init__(self) -> None:
+        self.requests: List[RequestQueries] = []
+        self.current: Optional[RequestQueries] = None
+        self.budget: Optional[int] = None
+
+    def before_cursor_execute(
+            self, conn, cursor, statement, parameters, context,
+            executemany) -> None:
+        # EXPLAIN журнала медленных запросов не относится к запросу к API.
+        if (self.current is not None and
+                not conn.info.get('slow_query_explain')):
+            self.current.statements.append(' '.join(statement.split()))
+
+    def record(self, method: str, url: str) -> RequestQueries:
+        path = urlsplit(url).path
+        self.current = RequestQueries(method, path, route_path(method, path))
+        self.requests.append(self.current)
+        return self.current
+
+    def check(self, request: RequestQueries) -> None:
+        budget = self.budget
+        if budget is None:
+            budget = QUERY_BUDGETS.get((request.method, request.route))
+        if budget is not None and len(request.statements) > budget:
+            pytest.fail(request.report(budget), pytrace=False)
+
+    @contextmanager
+    def max_queries(self, budget: int):
+        """Бюджет для каждого запроса к API внутри блока with."""
+        previous, self.budget = self.budget, budget
+        try:
+            yield self
+        finally:
+            self.budget = previous
+
+
+@pytest.fixture(autouse=True)
+def query_counter(monkeypatch):
+    counter = QueryCounter()
+    request = TestClient.request
+
+    def counted_request(client, method, url, *args, **kwargs):
+        queries = counter.record(method.upper(), url)
+        try:
+            return request(client, method, url, *args, **kwargs)
+        finally:
+            counter.current = None
+            counter.check(queries)
+
+    monkeypatch.setattr(TestClient, 'request', counted_request)
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute',
+        counter.before_cursor_execute,
+    )
+    yield counter
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute',
+        counter.before_cursor_execute,
+    )
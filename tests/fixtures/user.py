@@ -1,6 +1,7 @@
 import pytest
 from conftest import (
-    app, current_superuser, current_user, get_async_session, override_db
+    app, current_superuser, current_user, get_async_read_session,
+    get_async_session, override_db
 )
 from fastapi.testclient import TestClient
 
@@ -28,10 +29,23 @@ not_auth_user = User(
 )
 
 
+def get_token(client, email='dead@pool.com', password='chimichangas4life'):
+    client.post('/auth/register', json={
+        'email': email,
+        'password': password,
+    })
+    response = client.post('/auth/jwt/login', data={
+        'username': email,
+        'password': password,
+    })
+    return response.json()['access_token']
+
+
 @pytest.fixture
 def user_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_async_read_session] = override_db
     app.dependency_overrides[current_user] = lambda: user
     with TestClient(app) as client:
         yield client
@@ -41,6 +55,7 @@ def user_client():
 def test_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_async_read_session] = override_db
     app.dependency_overrides[current_user] = lambda: not_auth_user
     with TestClient(app) as client:
         yield client
@@ -50,6 +65,7 @@ def test_client():
 def superuser_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_async_read_session] = override_db
     app.dependency_overrides[current_superuser] = lambda: superuser
     with TestClient(app) as client:
         yield client
@@ -56,3 +56,18 @@ def test_check_db_url():
                 'Укажите значение по умолчанию для подключения базы данных '
                 'sqlite '
             )
+
+
+def test_tables_cleared_between_tests(mixer):
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='first', description='first', full_amount=10,
+    )
+    project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='second', description='second', full_amount=10,
+    )
+    assert project.id == 2, (
+        'Каждый тест должен начинаться с пустых таблиц '
+        'и сброшенных счетчиков id.'
+    )
@@ -0,0 +1,181 @@
+from datetime import datetime
+
+from conftest import app, current_user, engine, sync_engine
+from fixtures.user import get_token, user
+import pytest
+from sqlalchemy import select
+
+from app.commands.seed import SeedConfig, seed
+from app.crud.donation_bucket import recount_donation_buckets
+from app.models import DonationBucket
+
+
+def stored_buckets():
+    with sync_engine.connect() as connection:
+        return connection.execute(
+            select(DonationBucket.bucket, DonationBucket.start,
+                   DonationBucket.donations, DonationBucket.amount)
+            .where(DonationBucket.donations > 0)
+            .order_by(DonationBucket.bucket, DonationBucket.start)
+        ).all()
+
+
+def check_recount():
+    stored = stored_buckets()
+    with sync_engine.begin() as connection:
+        recount_donation_buckets(connection)
+    assert stored == stored_buckets(), (
+        'Интервалы должны совпадать с пересчетом по пожертвованиям.'
+    )
+
+
+@pytest.fixture
+def client(superuser_client):
+    """Клиент суперпользователя, который может и жертвовать."""
+    app.dependency_overrides[current_user] = lambda: user
+    return superuser_client
+
+
+@pytest.fixture
+def donations(superuser_client, mixer):
+    for create_date, full_amount in (
+        ('2024-03-04 10:15', 100), ('2024-03-04 10:45', 50),
+        ('2024-03-04 12:05', 10), ('2024-03-10 23:59', 7),
+        ('2024-03-11 00:00', 3),
+    ):
+        mixer.blend(
+            'app.models.donation.Donation', user_id=2,
+            full_amount=full_amount, invested_amount=0,
+            fully_invested=False, close_date=None,
+            create_date=datetime.fromisoformat(create_date),
+        )
+    return superuser_client
+
+
+@pytest.mark.parametrize('bucket, expected', [
+    ('hour', [
+        ('2024-03-04T10:00:00', 2, 150), ('2024-03-04T12:00:00', 1, 10),
+        ('2024-03-10T23:00:00', 1, 7), ('2024-03-11T00:00:00', 1, 3),
+    ]),
+    ('day', [
+        ('2024-03-04T00:00:00', 3, 160), ('2024-03-10T00:00:00', 1, 7),
+        ('2024-03-11T00:00:00', 1, 3),
+    ]),
+    ('week', [
+        ('2024-03-04T00:00:00', 4, 167), ('2024-03-11T00:00:00', 1, 3),
+    ]),
+])
+def test_donation_buckets(donations, bucket, expected):
+    response = donations.get('/stats/donations', params={'bucket': bucket})
+    assert response.status_code == 200
+    assert [
+        (row['start'], row['donations'], row['amount'])
+        for row in response.json()
+    ] == expected, (
+        'Пожертвования должны складываться в часы, дни и недели.'
+    )
+    check_recount()
+
+
+def test_donation_buckets_range(donations):
+    response = donations.get('/stats/donations', params={
+        'bucket': 'hour', 'from': '2024-03-04T10:30:00',
+        'to': '2024-03-10T23:00:00',
+    })
+    assert [row['start'] for row in response.json()] == [
+        '2024-03-04T10:00:00', '2024-03-04T12:00:00',
+    ], (
+        'В ответ должны попадать интервалы, пересекающиеся с периодом, '
+        'без интервала, который начинается в его конце.'
+    )
+    response = donations.get('/stats/donations')
+    assert len(response.json()) == 3, 'По умолчанию интервал - день.'
+
+
+def test_donation_buckets_week_range(donations):
+    response = donations.get('/stats/donations', params={
+        'bucket': 'week', 'from': '2024-03-06T00:00:00',
+        'to': '2024-03-07T00:00:00',
+    })
+    assert [
+        (row['start'], row['donations'], row['amount'])
+        for row in response.json()
+    ] == [('2024-03-04T00:00:00', 4, 167)], (
+        'Неделя, пересекающаяся с периодом, должна возвращаться '
+        'с полной суммой.'
+    )
+
+
+def test_donation_buckets_aware_range(donations):
+    local = datetime(2024, 3, 4, 10, 30).astimezone()
+    response = donations.get('/stats/donations', params={
+        'bucket': 'hour', 'from': local.isoformat(),
+        'to': '2024-03-04T12:00:00',
+    })
+    assert response.status_code == 200, (
+        'Дата с часовым поясом должна сравниваться с датой без пояса.'
+    )
+    assert [row['start'] for row in response.json()] == [
+        '2024-03-04T10:00:00'
+    ]
+    response = donations.get('/stats/donations', params={
+        'from': '2024-03-04T00:00:00Z', 'to': '2024-03-05T00:00:00',
+    })
+    assert response.status_code == 200
+
+
+def test_donation_buckets_bad_range(superuser_client):
+    response = superuser_client.get('/stats/donations', params={
+        'from': '2024-03-05T00:00:00', 'to': '2024-03-04T00:00:00',
+    })
+    assert response.status_code == 400, (
+        'Начало периода позже конца должно возвращать статус-код 400.'
+    )
+    response = superuser_client.get(
+        '/stats/donations', params={'bucket': 'year'})
+    assert response.status_code == 422
+
+
+def test_donation_buckets_superuser_only(test_client, user_client):
+    for client in (test_client, user_client):
+        response = client.get('/stats/donations')
+        assert response.status_code == 401, (
+            'Пожертвования по интервалам должны быть доступны '
+            'только суперюзерам.'
+        )
+    headers = {'Authorization': f'Bearer {get_token(user_client)}'}
+    response = user_client.get('/stats/donations', headers=headers)
+    assert response.status_code == 403, (
+        'Обычный пользователь не должен получать пожертвования '
+        'по интервалам.'
+    )
+
+
+def test_donation_buckets_follow_api_writes(client):
+    for full_amount in (10, 20):
+        response = client.post(
+            '/donation/', json={'full_amount': full_amount})
+        assert response.status_code == 200
+    response = client.get('/stats/donations')
+    assert [
+        (row['donations'], row['amount']) for row in response.json()
+    ] == [(2, 30)], 'Пожертвования через API должны попадать в интервалы.'
+    check_recount()
+
+
+def test_donation_buckets_follow_orm_writes(
+        donation, another_donation, mixer):
+    check_recount()
+    assert len(stored_buckets()) == 4
+    session = mixer.params['session']
+    session.delete(donation)
+    session.commit()
+    check_recount()
+    assert len(stored_buckets()) == 2, (
+        'После удаления пожертвования его интервалы должны обнуляться.'
+    )
+
+
+async def test_donation_buckets_after_seed():
+    await seed(engine, SeedConfig(users=2, projects=5, donations=50))
+    check_recount()
@@ -0,0 +1,101 @@
+from conftest import TestingSessionLocal, app, current_user, engine
+from fixtures.user import user
+import pytest
+from sqlalchemy import select
+
+from app.commands.seed import SeedConfig, seed
+from app.crud.donor_stats import donor_totals_query
+from app.models import DonorStats
+
+COUNTERS = ('donations', 'donated_amount', 'invested_amount')
+
+
+@pytest.fixture
+def client(superuser_client):
+    """Клиент суперпользователя, который жертвует от имени user."""
+    app.dependency_overrides[current_user] = lambda: user
+    return superuser_client
+
+
+async def stored_and_counted(session=None):
+    """Строки итогов и пересчет по таблице пожертвований."""
+    if session is None:
+        async with TestingSessionLocal() as session:
+            return await stored_and_counted(session)
+    stored = (await session.execute(
+        select(DonorStats).order_by(DonorStats.user_id)
+    )).scalars().all()
+    counted = (await session.execute(
+        donor_totals_query().order_by('user_id')
+    )).mappings().all()
+    return (
+        [{name: getattr(row, name) for name in ('user_id', *COUNTERS)}
+         for row in stored],
+        [{name: row[name] for name in ('user_id', *COUNTERS)}
+         for row in counted],
+    )
+
+
+def test_summary_without_donations(user_client):
+    response = user_client.get('/donation/my/summary')
+    assert response.status_code == 200
+    assert response.json() == {
+        'donations': 0, 'donated_amount': 0, 'invested_amount': 0,
+        'first_donation_date': None, 'last_donation_date': None,
+    }, 'Итоги пользователя без пожертвований должны быть нулевыми.'
+
+
+async def test_summary_follows_api_writes(client, query_counter):
+    first = client.post('/donation/', json={'full_amount': 100}).json()
+    last = client.post('/donation/', json={'full_amount': 50}).json()
+    # Проект закрывает одно пожертвование и частично забирает второе,
+    # это один UPDATE распределенного объекта сверх 7 запросов создания.
+    with query_counter.max_queries(8):
+        client.post('/charity_project/', json={
+            'name': 'Проект', 'description': 'Описание', 'full_amount': 120,
+        })
+    response = client.get('/donation/my/summary')
+    assert response.status_code == 200
+    data = response.json()
+    assert {name: data[name] for name in COUNTERS} == {
+        'donations': 2, 'donated_amount': 150, 'invested_amount': 120,
+    }, 'Итоги должны меняться при пожертвовании и его распределении.'
+    assert data['first_donation_date'] == first['create_date']
+    assert data['last_donation_date'] == last['create_date']
+    stored, counted = await stored_and_counted()
+    assert stored == counted
+
+
+async def test_summary_from_aggregate(client, donation):
+    async with TestingSessionLocal() as session:
+        row = await session.get(DonorStats, 1)
+        await session.delete(row)
+        await session.commit()
+    data = client.get('/donation/my/summary').json()
+    assert (data['donations'], data['donated_amount']) == (1, 100), (
+        'Без строки итогов они должны считаться по пожертвованиям.'
+    )
+
+
+async def test_donor_stats_follow_orm_writes(
+        donation, another_donation):
+    stored, counted = await stored_and_counted()
+    assert stored == counted, (
+        'Записи через ORM в обход API тоже должны менять итоги.'
+    )
+    async with TestingSessionLocal() as session:
+        await session.delete(await session.get(type(donation), 1))
+        await session.commit()
+        stored, counted = await stored_and_counted(session)
+    assert stored == counted, (
+        'После удаления пожертвования итоги должны пересчитываться.'
+    )
+    assert [row['user_id'] for row in stored] == [1]
+
+
+async def test_donor_stats_after_seed():
+    await seed(engine, SeedConfig(users=3, projects=10, donations=40))
+    stored, counted = await stored_and_counted()
+    assert stored == counted, (
+        'Заполнение базы должно пересчитывать итоги пользователей.'
+    )
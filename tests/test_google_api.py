@@ -0,0 +1,425 @@
+import asyncio
+from datetime import datetime
+from time import time
+
+import pytest
+from aiogoogle.excs import HTTPError
+from httpx import AsyncClient
+
+from conftest import (
+    TestingSessionLocal, app, current_superuser, get_async_read_session,
+    get_async_session, override_db
+)
+from fixtures.user import superuser
+
+from app.core import google_client as google_client_module
+from app.core.config import settings
+from app.core.google_client import DiscoveryCache, get_service, google_client
+from app.crud import charity_project_crud
+from app.services import google_api, report_jobs
+from app.services import (
+    generate_report, refresh_report, set_user_permissions,
+    spreadsheets_create, spreadsheets_update_value)
+
+
+async def test_discovery_documents_cached(fake_google, tmp_path):
+    async for wrapper_services in get_service():
+        for _ in range(2):
+            spreadsheet_id = await spreadsheets_create(wrapper_services)
+            await set_user_permissions(spreadsheet_id, wrapper_services)
+            await spreadsheets_update_value(
+                spreadsheet_id, [], wrapper_services
+            )
+    assert fake_google.requests['discovery'] == 2, (
+        'Discovery-документы Sheets и Drive должны скачиваться один раз.'
+    )
+    assert fake_google.requests['create'] == 2
+    cache = DiscoveryCache(str(tmp_path), 3600)
+    assert cache.load('sheets', 'v4') is not None, (
+        'Discovery-документ должен сохраняться на диск.'
+    )
+
+
+async def test_shared_client_session(fake_google):
+    async for wrapper_services in get_service():
+        assert wrapper_services is google_client.aiogoogle, (
+            'Запущенное приложение должно использовать общий клиент Aiogoogle.'
+        )
+        assert wrapper_services.session_context.get() is (
+            google_client.session
+        ), 'Общий клиент должен использовать общий пул соединений.'
+
+
+async def test_report_endpoint(fake_google, closed_charity_project):
+    app.dependency_overrides = {
+        get_async_read_session: override_db,
+        get_async_session: override_db,
+        current_superuser: lambda: superuser,
+    }
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        response = await client.post('/google/')
+    app.dependency_overrides = {}
+    assert response.status_code == 200, (
+        'Отчет должен формироваться через локальный сервер Google API.'
+    )
+    data = response.json()
+    assert data['URL'].endswith('sheet-1')
+    assert data['rows'] == 1
+    assert set(data['timing']) == {
+        'count', 'create', 'resize', 'permissions', 'values', 'total'
+    }, 'Ответ должен содержать длительность каждого шага формирования отчета.'
+
+
+async def test_report_count_overlaps_create(
+        fake_google, closed_charity_project, monkeypatch):
+    created = asyncio.Event()
+    create = google_api.spreadsheets_create
+    count = charity_project_crud.get_closed_summary
+
+    async def spreadsheets_create(*args):
+        created.set()
+        return await create(*args)
+
+    async def get_closed_summary(*args):
+        await asyncio.wait_for(created.wait(), timeout=5)
+        return await count(*args)
+
+    monkeypatch.setattr(google_api, 'spreadsheets_create', spreadsheets_create)
+    monkeypatch.setattr(
+        charity_project_crud, 'get_closed_summary', get_closed_summary)
+    async with TestingSessionLocal() as session:
+        async for wrapper_services in get_service():
+            report = await generate_report(session, wrapper_services)
+    assert report['rows'] == 1, (
+        'Подсчет проектов должен выполняться параллельно '
+        'с созданием таблицы.'
+    )
+
+
+async def test_report_written_in_chunks(fake_google, mixer, monkeypatch):
+    monkeypatch.setattr(settings, 'google_sheets_chunk_rows', 2)
+    for number in range(5):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime(2010, 10, 10),
+            close_date=datetime(2010, 10, 11),
+            collection_seconds=86400 + number,
+        )
+    async with TestingSessionLocal() as session:
+        async for wrapper_services in get_service():
+            report = await generate_report(session, wrapper_services)
+    assert report['rows'] == 5
+    resize_body = next(
+        body for name, body in fake_google.bodies if name == 'batch_update'
+    )
+    properties = resize_body['requests'][0]['updateSheetProperties']
+    assert properties['properties']['gridProperties']['rowCount'] == 8, (
+        'Размер листа должен рассчитываться по количеству проектов.'
+    )
+    assert [name for name, _ in fake_google.bodies].index('batch_update') < (
+        [name for name, _ in fake_google.bodies].index('values_batch_update')
+    ), 'Лист должен подгоняться под отчет до записи значений.'
+    batches = [
+        body for name, body in fake_google.bodies
+        if name == 'values_batch_update'
+    ]
+    assert len(batches) == 3, (
+        'Проекты должны записываться частями по google_sheets_chunk_rows.'
+    )
+    ranges = [data['range'] for body in batches for data in body['data']]
+    assert ranges == ['A1:C3', 'A4:C5', 'A6:C7', 'A8:C8']
+
+
+async def test_background_report_job(fake_google, closed_charity_project,
+                                     monkeypatch):
+    monkeypatch.setattr(
+        report_jobs, 'AsyncReadSessionLocal', TestingSessionLocal
+    )
+    runner = report_jobs.ReportJobRunner(concurrency=1, history=10)
+    monkeypatch.setattr(report_jobs, 'report_job_runner', runner)
+    monkeypatch.setattr(
+        'app.api.validators.report_job_runner', runner
+    )
+    monkeypatch.setattr(
+        'app.api.endpoints.google_api.report_job_runner', runner
+    )
+    app.dependency_overrides = {
+        get_async_read_session: override_db,
+        get_async_session: override_db,
+        current_superuser: lambda: superuser,
+    }
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        response = await client.post('/google/?background=true')
+        assert response.status_code == 202, (
+            'Фоновый отчет должен сразу возвращать статус-код 202.'
+        )
+        job_id = response.json()['job_id']
+        assert runner.submit().id == runner.submit().id, (
+            'Одинаковые ожидающие запуска задачи должны объединяться.'
+        )
+        await asyncio.gather(*runner.tasks)
+        response = await client.get(f'/google/jobs/{job_id}')
+        missing = await client.get('/google/jobs/unknown')
+    app.dependency_overrides = {}
+    data = response.json()
+    assert data['status'] == 'done', (
+        'После выполнения задачи статус должен быть `done`.'
+    )
+    assert data['url'].startswith('https://docs.google.com/spreadsheets/d/')
+    assert data['rows'] == 1
+    assert missing.status_code == 404, (
+        'Для несуществующей задачи должен возвращаться статус-код 404.'
+    )
+
+
+async def test_background_report_skips_connections(monkeypatch):
+    transactions = []
+
+    async def tracked_session():
+        async with TestingSessionLocal() as session:
+            yield session
+            transactions.append(session.in_transaction())
+
+    async def fake_report(limit, incremental):
+        return {'URL': 'url', 'rows': 0, 'timing': {}}
+
+    monkeypatch.setattr(report_jobs, 'build_report', fake_report)
+    runner = report_jobs.ReportJobRunner(concurrency=1, history=10)
+    monkeypatch.setattr(
+        'app.api.endpoints.google_api.report_job_runner', runner
+    )
+    app.dependency_overrides = {
+        get_async_read_session: tracked_session,
+        get_async_session: tracked_session,
+        get_service: lambda: None,
+        current_superuser: lambda: superuser,
+    }
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        response = await client.post(
+            '/google/?background=true&incremental=true')
+    app.dependency_overrides = {}
+    await asyncio.gather(*runner.tasks)
+    assert response.status_code == 202
+    assert transactions == [False, False], (
+        'Фоновый отчет не должен занимать соединения с базой в запросе.'
+    )
+
+
+async def test_report_jobs_keep_active(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_report(limit, incremental):
+        await release.wait()
+        return {'URL': 'url', 'rows': limit, 'timing': {}}
+
+    monkeypatch.setattr(report_jobs, 'build_report', slow_report)
+    runner = report_jobs.ReportJobRunner(concurrency=2, history=1)
+    first, second = runner.submit(1), runner.submit(2)
+    await asyncio.sleep(0)
+    assert runner.get(first.id) is first and runner.get(second.id) is second, (
+        'Выполняющиеся задачи не должны вытесняться из истории.'
+    )
+    release.set()
+    await asyncio.gather(*runner.tasks)
+    assert list(runner.jobs) == [second.id], (
+        'После завершения задач история должна сокращаться до history.'
+    )
+
+
+async def test_incremental_report_refresh(fake_google, mixer):
+    def close_project(number, day):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime(2010, 10, 1),
+            close_date=datetime(2010, 10, day),
+            collection_seconds=86400 * (day - 1),
+        )
+
+    close_project(1, 2)
+    close_project(2, 3)
+    async with TestingSessionLocal() as session:
+        async for wrapper_services in get_service():
+            first = await refresh_report(session, wrapper_services)
+            close_project(3, 4)
+            second = await refresh_report(session, wrapper_services)
+            third = await refresh_report(session, wrapper_services)
+    assert first['rows'] == 2 and first['appended'] == 2, (
+        'Первое обновление должно сформировать полный отчет.'
+    )
+    assert second['URL'] == first['URL'], (
+        'Обновление должно дописывать проекты в ту же таблицу.'
+    )
+    assert second['rows'] == 3 and second['appended'] == 1
+    assert third['appended'] == 0
+    assert fake_google.requests['create'] == 1, (
+        'При обновлении отчета новая таблица не должна создаваться.'
+    )
+    appended = [
+        body['values'] for name, body in fake_google.bodies
+        if name == 'values_append'
+    ]
+    assert appended == [[['project 3', '3 days, 0:00:00', 'closed']]], (
+        'В таблицу должны дописываться только новые закрытые проекты.'
+    )
+    assert fake_google.requests['values_update'] == 1, (
+        'Если новых проектов нет, к Google API обращаться не нужно.'
+    )
+
+
+async def test_refresh_appends_late_committed_project(
+        fake_google, mixer, monkeypatch):
+    monkeypatch.setattr(settings, 'report_refresh_overlap', 86400)
+
+    def close_project(number, close_date, days):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime(2010, 10, 1),
+            close_date=close_date,
+            collection_seconds=86400 * days,
+        )
+
+    close_project(1, datetime(2010, 10, 2), 1)
+    close_project(2, datetime(2010, 10, 3), 2)
+    async with TestingSessionLocal() as session:
+        async for wrapper_services in get_service():
+            await refresh_report(session, wrapper_services)
+            # Транзакция проекта зафиксирована после обновления,
+            # а дата закрытия раньше сохраненной.
+            close_project(3, datetime(2010, 10, 2, 12), 1)
+            second = await refresh_report(session, wrapper_services)
+            third = await refresh_report(session, wrapper_services)
+    assert second['appended'] == 1 and second['rows'] == 3, (
+        'Проект, зафиксированный после обновления с датой закрытия '
+        'раньше сохраненной, должен дописываться в отчет.'
+    )
+    assert third['appended'] == 0, (
+        'Проекты окна повторного чтения не должны дописываться дважды.'
+    )
+    appended = [
+        body['values'] for name, body in fake_google.bodies
+        if name == 'values_append'
+    ]
+    assert appended == [[['project 3', '1 day, 0:00:00', 'closed']]]
+
+
+async def test_report_retries_quota_errors(fake_google, mixer, monkeypatch):
+    monkeypatch.setattr(settings, 'google_sheets_chunk_rows', 2)
+    for number in range(3):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime(2010, 10, 10),
+            close_date=datetime(2010, 10, 11),
+            collection_seconds=86400 + number,
+        )
+    fake_google.failures['create'] = [429]
+    fake_google.failures['values_batch_update'] = [None, 429, 503]
+    async with TestingSessionLocal() as session:
+        async for wrapper_services in get_service():
+            report = await generate_report(session, wrapper_services)
+    assert report['rows'] == 3, (
+        'После ответов 429 и 5xx запросы должны повторяться.'
+    )
+    assert fake_google.requests['create'] == 2
+    stats = google_client.stats.as_dict()
+    assert stats['retries'] == {'sheets': 3}, (
+        'Повторы запросов должны учитываться в счетчиках.'
+    )
+    assert stats['rows_written'] == 3
+
+
+async def test_create_not_retried_on_server_error(fake_google):
+    fake_google.failures['create'] = [503]
+    async for wrapper_services in get_service():
+        with pytest.raises(HTTPError):
+            await spreadsheets_create(wrapper_services)
+    assert fake_google.requests['create'] == 1, (
+        'Неидемпотентный запрос не должен повторяться после ответа 5xx.'
+    )
+
+
+async def test_report_resumed_after_failure(fake_google, mixer, monkeypatch):
+    monkeypatch.setattr(settings, 'google_sheets_chunk_rows', 2)
+    monkeypatch.setattr(settings, 'google_retry_attempts', 2)
+    for number in range(5):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime(2010, 10, 10),
+            close_date=datetime(2010, 10, 11),
+            collection_seconds=86400,
+        )
+    fake_google.failures['values_batch_update'] = [None, 503, 503]
+    async with TestingSessionLocal() as session:
+        async for wrapper_services in get_service():
+            with pytest.raises(HTTPError):
+                await generate_report(session, wrapper_services)
+            report = await generate_report(session, wrapper_services)
+    assert report['URL'].endswith('sheet-1'), (
+        'Прерванный отчет должен дописываться в ту же таблицу.'
+    )
+    assert report['rows'] == 5
+    assert fake_google.requests['create'] == 1
+    assert fake_google.requests['permissions'] == 1
+    batches = [
+        body for name, body in fake_google.bodies
+        if name == 'values_batch_update'
+    ]
+    ranges = [data['range'] for body in batches for data in body['data']]
+    assert ranges[-3:] == ['A1:C3', 'A6:C7', 'A8:C8'], (
+        'Запись должна продолжаться с первого незаписанного проекта.'
+    )
+
+
+async def test_google_stats_endpoint(fake_google):
+    app.dependency_overrides = {current_superuser: lambda: superuser}
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        response = await client.get('/google/stats')
+    app.dependency_overrides = {}
+    assert response.status_code == 200
+    assert set(response.json()) == {
+        'requests', 'retries', 'failures', 'backoff_seconds',
+        'throttle_seconds', 'rows_written'
+    }
+
+
+async def test_discovery_memory_expires(fake_google, monkeypatch):
+    now = time()
+    monkeypatch.setattr(google_client_module, 'time', lambda: now)
+    async for wrapper_services in get_service():
+        await google_client.discovery.discover(
+            wrapper_services, 'sheets', 'v4')
+        now += 3599
+        await google_client.discovery.discover(
+            wrapper_services, 'sheets', 'v4')
+        assert fake_google.requests['discovery'] == 1
+        now += 2
+        await google_client.discovery.discover(
+            wrapper_services, 'sheets', 'v4')
+    assert fake_google.requests['discovery'] == 2, (
+        'Discovery-документ в памяти должен устаревать через '
+        'google_discovery_ttl, как и файл на диске.'
+    )
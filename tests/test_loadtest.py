@@ -0,0 +1,40 @@
+from conftest import (
+    TestingSessionLocal, app, get_async_read_session, get_async_session,
+    override_db
+)
+
+from app.commands.loadtest import LoadRunner, parse_mix, percentile
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0
+
+
+def test_parse_mix():
+    assert parse_mix('projects=3,donate=1') == {'projects': 3, 'donate': 1}
+
+
+async def test_load_runner():
+    app.dependency_overrides = {
+        get_async_session: override_db,
+        get_async_read_session: override_db,
+    }
+    runner = LoadRunner(app, TestingSessionLocal, users=2, projects=3)
+    report = await runner.run(requests=40, concurrency=4)
+    summary = report.as_dict()
+    assert sum(route['requests'] for route in summary.values()) == 40, (
+        'Прогон должен выполнить заданное количество запросов.'
+    )
+    assert set(summary) <= {
+        'GET /charity_project/', 'POST /donation/',
+        'GET /donation/my', 'GET /report/csv',
+    }
+    for route, stats in summary.items():
+        assert stats['errors'] == 0, f'Запросы {route} не должны падать.'
+        assert stats['p50_ms'] <= stats['p90_ms'] <= stats['max_ms'], (
+            'Перцентили должны расти.'
+        )
+    assert 'запросов/с' in report.format_table()
@@ -0,0 +1,57 @@
+from app.core.metrics import Histogram
+from app.services import invested
+
+
+def test_histogram_render():
+    histogram = Histogram('test_seconds', 'Тест.', ('route',), (0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, '/a')
+    lines = list(histogram.render())
+    assert lines == [
+        'test_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_seconds_bucket{route="/a",le="1"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 5.65',
+        'test_seconds_count{route="/a"} 4',
+    ], 'Корзины гистограммы должны выдаваться накопительно.'
+
+
+def test_metrics_endpoint(user_client, charity_project):
+    user_client.post('/donation/', json={'full_amount': 100})
+    response = user_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    text = response.text
+    for line in (
+        '# TYPE http_request_duration_seconds histogram',
+        'http_request_duration_seconds_count'
+        '{method="POST",route="/donation/",status="200"}',
+        'allocation_duration_seconds_count{model="Donation"}',
+        'allocation_batch_size_count{model="Donation"}',
+        'allocation_rows_touched_count{model="Donation"}',
+        '# TYPE db_pool_checkout_wait_seconds histogram',
+        '# TYPE db_pool_connections_in_use gauge',
+        '# TYPE google_api_request_duration_seconds histogram',
+        '# TYPE report_duration_seconds histogram',
+    ):
+        assert line in text, f'В метриках должна быть строка `{line}`.'
+
+
+def test_allocation_metrics_share_model_label(
+        user_client, charity_project, monkeypatch):
+    metrics = {
+        name: Histogram(name, 'Тест.', ('model',))
+        for name in (
+            'allocation_batch_size', 'allocation_rows_touched',
+            'allocation_duration',
+        )
+    }
+    for name, histogram in metrics.items():
+        monkeypatch.setattr(invested, name, histogram)
+    user_client.post('/donation/', json={'full_amount': 100})
+    assert {
+        name: list(histogram.values) for name, histogram in metrics.items()
+    } == dict.fromkeys(metrics, [('Donation',)]), (
+        'Метрики одного распределения должны помечаться моделью '
+        'объекта, запустившего распределение.'
+    )
@@ -0,0 +1,114 @@
+import asyncio
+from threading import current_thread
+from time import perf_counter
+
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users.jwt import generate_jwt
+from fastapi_users.password import PasswordHelper
+from httpx import AsyncClient
+
+from conftest import (
+    TestingSessionLocal, app, current_user, get_async_read_session,
+    get_async_session, override_db
+)
+from fixtures.user import user
+
+from app.core.password import password_helper
+from app.core.user import CachedUserDatabase, UserManager
+from app.models import User
+from app.schemas import UserCreate, UserUpdate
+
+LOGIN_STORM = 8
+DONATIONS = 10
+
+
+async def post_donation(client):
+    start = perf_counter()
+    response = await client.post('/donation/', json={'full_amount': 10})
+    assert response.status_code == 200
+    return perf_counter() - start
+
+
+async def test_donation_latency_during_login_storm():
+    app.dependency_overrides = {
+        get_async_session: override_db,
+        get_async_read_session: override_db,
+        current_user: lambda: user,
+    }
+    start = perf_counter()
+    password_helper.hash('chimichangas4life')
+    hash_seconds = perf_counter() - start
+
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        await client.post('/auth/register', json={
+            'email': 'dead@pool.com',
+            'password': 'chimichangas4life',
+        })
+        baseline = [await post_donation(client) for _ in range(DONATIONS)]
+
+        async def login():
+            response = await client.post('/auth/jwt/login', data={
+                'username': 'dead@pool.com',
+                'password': 'chimichangas4life',
+            })
+            assert response.status_code == 200
+
+        async def donations():
+            await asyncio.sleep(0)
+            return [await post_donation(client) for _ in range(DONATIONS)]
+
+        *_, during_storm = await asyncio.gather(
+            *(login() for _ in range(LOGIN_STORM)), donations()
+        )
+    app.dependency_overrides = {}
+
+    assert max(during_storm) < max(max(baseline) * 5, hash_seconds), (
+        'Во время массового входа пользователей задержка создания '
+        'пожертвований не должна расти: проверка паролей должна '
+        'выполняться вне цикла событий.'
+    )
+
+
+async def test_user_manager_passwords_off_loop(monkeypatch):
+    threads = []
+    for name in ('hash', 'verify_and_update'):
+        original = getattr(PasswordHelper, name)
+
+        def recorded(self, *args, original=original):
+            threads.append(current_thread().name)
+            return original(self, *args)
+        monkeypatch.setattr(PasswordHelper, name, recorded)
+
+    async with TestingSessionLocal() as session:
+        manager = UserManager(CachedUserDatabase(session, User))
+        # Сброс пароля в приложении не подключён, секрет нужен только тесту.
+        manager.reset_password_token_secret = 'reset-secret'
+        created = await manager.create(UserCreate(
+            email='dead@pool.com', password='chimichangas4life'
+        ))
+        token = generate_jwt(
+            {'user_id': str(created.id),
+             'aud': manager.reset_password_token_audience},
+            manager.reset_password_token_secret,
+            manager.reset_password_token_lifetime_seconds,
+        )
+        await manager.reset_password(token, 'maximumeffort')
+        await manager.update(
+            UserUpdate(password='chimichangas5life'), created
+        )
+        logged_in = await manager.authenticate(OAuth2PasswordRequestForm(
+            username='dead@pool.com', password='chimichangas5life', scope=''
+        ))
+        unknown = await manager.authenticate(OAuth2PasswordRequestForm(
+            username='wade@pool.com', password='chimichangas5life', scope=''
+        ))
+    assert logged_in is not None and unknown is None, (
+        'Вход должен проходить только с новым паролем существующего '
+        'пользователя.'
+    )
+    assert len(threads) >= 5 and all(
+        name.startswith('password-hash') for name in threads
+    ), (
+        'Хеширование и проверка паролей в создании, сбросе, обновлении '
+        'и входе должны выполняться в пуле, а не в цикле событий.'
+    )
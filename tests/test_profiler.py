@@ -0,0 +1,102 @@
+from time import perf_counter
+
+from app.core.profiler import Profile, ProfilerMiddleware, profiler
+
+
+def busy_handler(seconds):
+    end = perf_counter() + seconds
+    while perf_counter() < end:
+        pass
+
+
+async def busy_app(scope, receive, send):
+    busy_handler(0.1)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def noop(message=None):
+    return message
+
+
+def http_scope(method, path, headers=()):
+    return {
+        'type': 'http', 'method': method, 'path': path,
+        'headers': list(headers),
+    }
+
+
+async def test_profiler_samples_request_stack():
+    profiler.arm('/busy', 'post', 1)
+    await ProfilerMiddleware(busy_app)(http_scope('POST', '/busy'), noop, noop)
+    assert profiler.target is None, (
+        'После заданного количества запросов профилирование '
+        'должно отключаться.'
+    )
+    profile = profiler.profiles[-1]
+    assert profile.status == 200
+    assert profile.samples > 0, 'Профиль должен содержать семплы стека.'
+    assert 'busy_handler (test_profiler.py' in profile.folded(), (
+        'Свернутые стеки должны содержать функции обработчика запроса.'
+    )
+    await ProfilerMiddleware(busy_app)(http_scope('POST', '/busy'), noop, noop)
+    assert profiler.profiles[-1] is profile, (
+        'Без включенного профилирования запросы не должны профилироваться.'
+    )
+
+
+async def test_profiler_token_header():
+    target = profiler.arm('/', count=1, header_only=True)
+    middleware = ProfilerMiddleware(busy_app)
+    await middleware(http_scope('GET', '/busy'), noop, noop)
+    assert profiler.target is target, (
+        'Запрос без заголовка X-Profile не должен расходовать счетчик.'
+    )
+    await middleware(
+        http_scope('GET', '/busy', [(b'x-profile', b'wrong')]), noop, noop
+    )
+    assert profiler.target is target, (
+        'Запрос с чужим токеном не должен профилироваться.'
+    )
+    headers = [(b'x-profile', target.token.encode())]
+    await middleware(http_scope('GET', '/busy', headers), noop, noop)
+    assert profiler.target is None
+    assert profiler.profiles[-1].path == '/busy'
+
+
+def test_profiler_endpoints(superuser_client, charity_project):
+    response = superuser_client.post(
+        '/profiler/', json={'path': '/charity_project/', 'method': 'patch'}
+    )
+    assert response.status_code == 200
+    assert response.json()['method'] == 'PATCH'
+    assert superuser_client.get('/profiler/').json()['remaining'] == 1
+    superuser_client.patch('/charity_project/1', json={'name': 'Новое'})
+    assert superuser_client.get('/profiler/').json() is None, (
+        'После профилирования запроса цель должна сбрасываться.'
+    )
+    profiles = superuser_client.get('/profiler/profiles').json()
+    assert profiles[0]['method'] == 'PATCH'
+    assert profiles[0]['path'] == '/charity_project/1'
+    response = superuser_client.get(f'/profiler/profiles/{profiles[0]["id"]}')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    response = superuser_client.get('/profiler/profiles/unknown')
+    assert response.status_code == 404
+    superuser_client.post('/profiler/', json={'path': '/donation/'})
+    assert superuser_client.delete('/profiler/').status_code == 200
+    assert superuser_client.get('/profiler/').json() is None
+
+
+def test_profiler_superuser_only(user_client):
+    response = user_client.post('/profiler/', json={'path': '/donation/'})
+    assert response.status_code == 401, (
+        'Профилировщик должен быть доступен только суперюзерам.'
+    )
+
+
+def test_profile_folded_format():
+    profile = Profile(method='GET', path='/')
+    profile.stacks['a (x.py:1);b (x.py:2)'] += 3
+    profile.stacks['a (x.py:1)'] += 1
+    assert profile.folded() == 'a (x.py:1);b (x.py:2) 3\na (x.py:1) 1\n'
@@ -0,0 +1,118 @@
+from conftest import TestingSessionLocal, app, current_user
+from fixtures.user import user
+import pytest
+
+from app.core.config import settings
+from app.crud.project_progress import progress_cache, project_progress_crud
+
+PROGRESS_KEYS = {'id', 'invested_amount', 'full_amount', 'fully_invested'}
+
+
+@pytest.fixture
+def client(superuser_client):
+    """Клиент суперпользователя, который может и жертвовать."""
+    app.dependency_overrides[current_user] = lambda: user
+    return superuser_client
+
+
+def create_project(client, name, full_amount):
+    response = client.post('/charity_project/', json={
+        'name': name, 'description': 'Описание', 'full_amount': full_amount,
+    })
+    assert response.status_code == 200
+    return response.json()['id']
+
+
+def test_progress(charity_project, test_client):
+    response = test_client.get(f'/charity_project/{charity_project.id}/progress')
+    assert response.status_code == 200
+    assert response.json() == {
+        'id': charity_project.id, 'invested_amount': 0,
+        'full_amount': 1000000, 'fully_invested': False,
+    }, 'Прогресс должен содержать только суммы и признак закрытия.'
+    assert charity_project.id in progress_cache
+
+
+def test_progress_not_found(test_client):
+    response = test_client.get('/charity_project/1/progress')
+    assert response.status_code == 404
+
+
+def test_progress_follows_investing(client, query_counter):
+    project_id = create_project(client, 'Проект', 100)
+    client.post('/donation/', json={'full_amount': 30})
+    response = client.get(f'/charity_project/{project_id}/progress')
+    assert response.json()['invested_amount'] == 30, (
+        'Кэш прогресса должен обновляться при распределении пожертвования.'
+    )
+    assert query_counter.requests[-1].statements == [], (
+        'Прогресс проекта после записи должен отдаваться из кэша.'
+    )
+    client.patch(f'/charity_project/{project_id}', json={'full_amount': 30})
+    progress = client.get(f'/charity_project/{project_id}/progress').json()
+    assert (progress['full_amount'], progress['fully_invested']) == (
+        30, True), 'Кэш прогресса должен обновляться при изменении проекта.'
+    client.post('/charity_project/', json={
+        'name': 'Пустой', 'description': 'Описание', 'full_amount': 10,
+    })
+    empty_id = project_id + 1
+    client.delete(f'/charity_project/{empty_id}')
+    response = client.get(f'/charity_project/{empty_id}/progress')
+    assert response.status_code == 404, (
+        'Удаленный проект должен пропадать из кэша.'
+    )
+
+
+def test_progress_many(client):
+    first = create_project(client, 'Первый', 100)
+    second = create_project(client, 'Второй', 200)
+    progress_cache.clear()
+    response = client.get(
+        '/charity_project/progress',
+        params={'ids': [second, 999, first, second]},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [row['id'] for row in data] == [second, first], (
+        'Прогресс должен возвращаться в порядке ids без повторов '
+        'и несуществующих проектов.'
+    )
+    assert all(set(row) == PROGRESS_KEYS for row in data)
+    assert {first, second} <= set(progress_cache)
+
+
+def test_progress_many_limit(test_client, monkeypatch):
+    monkeypatch.setattr(settings, 'progress_max_ids', 2)
+    response = test_client.get(
+        '/charity_project/progress', params={'ids': [1, 2, 3]})
+    assert response.status_code == 400
+    response = test_client.get('/charity_project/progress')
+    assert response.status_code == 422
+
+
+async def test_progress_miss_keeps_committed_value(charity_project):
+    committed = {
+        'id': charity_project.id, 'invested_amount': 500,
+        'full_amount': 1000000, 'fully_invested': False,
+    }
+    progress_cache.clear()
+
+    class CommitDuringRead:
+        """Сессия, во время запроса которой фиксируется запись."""
+
+        def __init__(self, session):
+            self.session = session
+
+        async def execute(self, query):
+            result = await self.session.execute(query)
+            progress_cache[charity_project.id] = committed
+            return result
+
+    async with TestingSessionLocal() as session:
+        progress = await project_progress_crud.get_many(
+            [charity_project.id], CommitDuringRead(session))
+    assert progress == [committed], (
+        'Прочитанное при промахе значение не должно заменять '
+        'значение, записанное фиксацией.'
+    )
+    assert progress_cache[charity_project.id] == committed
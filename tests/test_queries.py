@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fixtures.queries import QUERY_BUDGETS, RequestQueries
+
+
+def blend_projects(mixer, count, full_amount):
+    for number in range(count):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='description',
+            full_amount=full_amount,
+            invested_amount=0,
+            fully_invested=False,
+            create_date=datetime(2010, 10, 10) + timedelta(minutes=number),
+        )
+
+
+def test_donation_to_many_projects_within_budget(
+        user_client, mixer, query_counter):
+    blend_projects(mixer, 5, 100)
+    response = user_client.post('/donation/', json={'full_amount': 500})
+    assert response.status_code == 200
+    statements = query_counter.requests[-1].statements
+    assert len(statements) <= QUERY_BUDGETS[('POST', '/donation/')], (
+        'Количество SQL-запросов при создании пожертвования не должно '
+        'расти с количеством проектов, на которые оно распределено.'
+    )
+    projects = user_client.get('/charity_project/').json()
+    assert all(project['fully_invested'] for project in projects)
+
+
+def test_project_list_single_query(user_client, mixer, query_counter):
+    blend_projects(mixer, 10, 100)
+    with query_counter.max_queries(1):
+        response = user_client.get('/charity_project/')
+    assert len(response.json()) == 10
+    assert query_counter.requests[-1].route == '/charity_project/'
+
+
+def test_budget_exceeded_lists_sql(query_counter):
+    queries = RequestQueries(
+        'GET', '/charity_project/', '/charity_project/',
+        ['SELECT 1', 'SELECT 2'],
+    )
+    with pytest.raises(pytest.fail.Exception) as error:
+        query_counter.check(queries)
+    message = str(error.value)
+    assert 'GET /charity_project/' in message
+    assert '1. SELECT 1' in message and '2. SELECT 2' in message, (
+        'При превышении бюджета должны выводиться выполненные SQL-запросы.'
+    )
+    with query_counter.max_queries(2):
+        query_counter.check(queries)
@@ -0,0 +1,131 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+from conftest import TestingSessionLocal
+
+from app.core.config import settings
+from app.crud import charity_project_crud
+from app.services import export_report
+
+
+async def test_projects_by_completion_rate(closed_charity_project,
+                                           charity_project_nunchaku):
+    async with TestingSessionLocal() as session:
+        projects = await charity_project_crud.get_projects_by_completion_rate(
+            session
+        )
+    assert len(projects) == 1, (
+        'В отчет должны попадать только закрытые проекты.'
+    )
+    assert projects[0]['сollection_rate'] == 1, (
+        'Длительность сбора закрытого проекта должна измеряться в днях.'
+    )
+
+
+async def test_projects_by_completion_rate_limit(mixer, user_client):
+    for day, name, amount in (
+        (10, 'slow', 300), (11, 'fast', 100), (12, 'open', 500)
+    ):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description=name,
+            full_amount=amount,
+            invested_amount=0,
+            fully_invested=False,
+            close_date=None,
+            collection_seconds=None,
+            create_date=datetime(2010, 10, day),
+        )
+    user_client.post('/donation/', json={'full_amount': 400})
+    async with TestingSessionLocal() as session:
+        projects = await charity_project_crud.get_projects_by_completion_rate(
+            session
+        )
+        top = await charity_project_crud.get_projects_by_completion_rate(
+            session, limit=1
+        )
+        slow = await charity_project_crud.get_by_attribute(
+            'name', 'slow', session
+        )
+    assert [project['name'] for project in projects] == ['fast', 'slow'], (
+        'При закрытии проекта должна сохраняться длительность сбора, '
+        'открытые проекты в отчет не попадают.'
+    )
+    assert slow.collection_seconds is not None, (
+        'При закрытии проекта должно заполняться поле `collection_seconds`.'
+    )
+    assert len(top) == 1, (
+        'Параметр `limit` должен ограничивать количество проектов в отчете.'
+    )
+
+
+def close_projects(mixer, count):
+    for number in range(count):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=datetime(2010, 10, 10),
+            close_date=datetime(2010, 10, 11),
+            collection_seconds=86400 * (number + 1),
+        )
+
+
+def test_report_csv_endpoint(superuser_client, mixer, monkeypatch):
+    monkeypatch.setattr(settings, 'report_chunk_rows', 2)
+    close_projects(mixer, 5)
+    response = superuser_client.get('/report/csv', params={'limit': 4})
+    assert response.status_code == 200, (
+        'Отчет в CSV должен выгружаться без обращения к Google API.'
+    )
+    assert response.headers['content-type'].startswith('text/csv')
+    assert 'attachment' in response.headers['content-disposition']
+    rows = list(csv.reader(io.StringIO(response.content.decode('utf-8-sig'))))
+    assert rows[0] == ['Название проекта', 'Время сбора, дней', 'Описание']
+    assert [row[0] for row in rows[1:]] == [
+        'project 0', 'project 1', 'project 2', 'project 3'
+    ], 'Проекты должны выгружаться по скорости сбора с учетом `limit`.'
+
+
+def test_report_unknown_format(superuser_client):
+    response = superuser_client.get('/report/pdf')
+    assert response.status_code == 422, (
+        'Для неизвестного формата отчета должен возвращаться код 422.'
+    )
+
+
+async def test_export_xlsx(mixer, monkeypatch):
+    openpyxl = pytest.importorskip('openpyxl')
+    monkeypatch.setattr(settings, 'report_chunk_rows', 2)
+    close_projects(mixer, 3)
+    file = io.BytesIO()
+    async with TestingSessionLocal() as session:
+        await export_report(session, 'xlsx', file)
+    file.seek(0)
+    sheet = openpyxl.load_workbook(file).active
+    assert [row[0] for row in sheet.iter_rows(values_only=True)] == [
+        'Название проекта', 'project 0', 'project 1', 'project 2'
+    ], 'XLSX-отчет должен содержать заголовок и все закрытые проекты.'
+
+
+async def test_export_parquet(mixer, monkeypatch):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr(settings, 'report_chunk_rows', 2)
+    close_projects(mixer, 5)
+    file = io.BytesIO()
+    async with TestingSessionLocal() as session:
+        await export_report(session, 'parquet', file)
+    file.seek(0)
+    report = parquet.ParquetFile(file)
+    assert report.metadata.num_row_groups == 3, (
+        'Каждая часть проектов должна записываться отдельной row group.'
+    )
+    assert report.read().column('collection_days').to_pylist() == [
+        1.0, 2.0, 3.0, 4.0, 5.0
+    ]
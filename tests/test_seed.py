@@ -0,0 +1,121 @@
+from conftest import clear_tables, engine, sync_engine
+from sqlalchemy import select
+
+from app.commands.seed import SeedConfig, parse_args, seed
+from app.models import CharityProject, Donation, User
+
+CONFIG = SeedConfig(users=5, projects=30, donations=300, seed=7)
+
+
+def fetch(model):
+    with sync_engine.connect() as connection:
+        return connection.execute(
+            select(model.__table__).order_by(model.id)
+        ).mappings().all()
+
+
+def check_fifo(projects, donations):
+    assert not (
+        any(not row['fully_invested'] for row in projects) and
+        any(not row['fully_invested'] for row in donations)
+    ), 'Не может одновременно быть открытых проектов и пожертвований.'
+    assert sum(row['invested_amount'] for row in projects) == sum(
+        row['invested_amount'] for row in donations
+    ), 'Распределено в проекты должно быть столько же, сколько пожертвовано.'
+    for rows in (projects, donations):
+        opened = [row for row in rows if not row['fully_invested']]
+        assert all(row['invested_amount'] == 0 for row in opened[1:]), (
+            'Частично распределенным может быть только самый старый '
+            'открытый объект.'
+        )
+        for row in rows:
+            assert row['fully_invested'] == (
+                row['invested_amount'] == row['full_amount']
+            ), 'Закрыты должны быть ровно полностью распределенные объекты.'
+            assert (row['close_date'] is not None) == row['fully_invested']
+
+
+async def test_seed_creates_rows():
+    report = await seed(engine, CONFIG)
+    users, projects, donations = (
+        fetch(User), fetch(CharityProject), fetch(Donation)
+    )
+    assert (len(users), len(projects), len(donations)) == (5, 30, 300), (
+        'Заполнение должно создать заданное количество объектов.'
+    )
+    assert report.rows == 335
+    assert report.closed_projects == sum(
+        row['fully_invested'] for row in projects
+    )
+    check_fifo(projects, donations)
+    assert {row['user_id'] for row in donations} <= {
+        row['id'] for row in users
+    }, 'Пожертвования должны принадлежать созданным пользователям.'
+    for row in projects:
+        if row['fully_invested']:
+            assert row['close_date'] >= row['create_date']
+            assert row['collection_seconds'] == int(
+                (row['close_date'] - row['create_date']).total_seconds()
+            ), 'Длительность сбора должна считаться как в приложении.'
+
+
+async def test_seed_is_deterministic():
+    def snapshot():
+        return [
+            [{key: value for key, value in row.items()
+              if key not in ('create_date', 'close_date')}
+             for row in fetch(model)]
+            for model in (CharityProject, Donation)
+        ]
+
+    await seed(engine, CONFIG)
+    first = snapshot()
+    with sync_engine.begin() as connection:
+        clear_tables(connection)
+    await seed(engine, CONFIG)
+    assert snapshot() == first, (
+        'С одинаковым seed заполнение должно давать одинаковые данные.'
+    )
+
+
+async def test_seed_continues_open_project(charity_project_little_invested):
+    await seed(engine, SeedConfig(users=2, projects=0, donations=50))
+    projects, donations = fetch(CharityProject), fetch(Donation)
+    assert projects[0]['invested_amount'] == 100 + sum(
+        row['invested_amount'] for row in donations
+    ), 'Пожертвования должны распределяться в проект, созданный ранее.'
+    assert all(row['fully_invested'] for row in donations)
+
+
+async def test_seed_uniform_distribution():
+    await seed(engine, SeedConfig(
+        users=1, projects=10, donations=20, distribution='uniform',
+        project_amount=10, donation_amount=10,
+    ))
+    projects, donations = fetch(CharityProject), fetch(Donation)
+    assert all(1 <= row['full_amount'] <= 20 for row in projects + donations)
+    check_fifo(projects, donations)
+
+
+async def test_api_after_seed(user_client):
+    await seed(engine, SeedConfig(users=3, projects=5, donations=10))
+    opened = [
+        row for row in fetch(CharityProject) if not row['fully_invested']
+    ]
+    response = user_client.post('/donation/', json={'full_amount': 1})
+    assert response.status_code == 200, (
+        'После заполнения база должна принимать пожертвования через API.'
+    )
+    invested = {
+        row['id']: row['invested_amount'] for row in fetch(CharityProject)
+    }
+    assert invested[opened[0]['id']] == opened[0]['invested_amount'] + 1, (
+        'Новое пожертвование должно попасть в самый старый открытый проект.'
+    )
+
+
+def test_parse_args():
+    args = parse_args(['--projects', '5', '--distribution', 'uniform'])
+    assert args.projects == 5
+    assert args.distribution == 'uniform'
+    assert args.donations == SeedConfig.donations
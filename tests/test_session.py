@@ -0,0 +1,114 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from conftest import engine
+
+from app.core import db
+from app.models import CharityProject
+
+
+def make_request(method, token='Bearer token'):
+    return Request({
+        'type': 'http',
+        'method': method,
+        'headers': [(b'authorization', token.encode())],
+        'client': ('127.0.0.1', 5000),
+    })
+
+
+async def get_session_bind(dependency, request):
+    generator = dependency(request)
+    session = await generator.__anext__()
+    bind = session.bind
+    await generator.aclose()
+    return bind
+
+
+async def write(request, commit=True):
+    generator = db.get_async_session(request)
+    session = await generator.__anext__()
+    if commit:
+        await session.commit()
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        pass
+
+
+async def test_read_session_without_replica():
+    bind = await get_session_bind(
+        db.get_async_read_session, make_request('GET')
+    )
+    assert bind is db.engine, (
+        'Без настроенной реплики сессия чтения должна использовать '
+        'основную базу данных.'
+    )
+
+
+async def test_read_session_replica_sticky(monkeypatch):
+    replica = create_async_engine('sqlite+aiosqlite://')
+    monkeypatch.setattr(db, 'replica_engine', replica)
+    monkeypatch.setattr(
+        db, 'AsyncReadSessionLocal',
+        db.sessionmaker(replica, class_=db.AsyncSession)
+    )
+    monkeypatch.setattr(db.settings, 'replica_sticky_seconds', 60)
+    monkeypatch.setattr(db, '_recent_writes', {})
+
+    bind = await get_session_bind(
+        db.get_async_read_session, make_request('GET')
+    )
+    assert bind is replica, (
+        'Сессия чтения должна использовать реплику.'
+    )
+    await write(make_request('POST'), commit=False)
+    bind = await get_session_bind(
+        db.get_async_read_session, make_request('GET')
+    )
+    assert bind is replica, (
+        'Запрос без зафиксированной записи не должен переключать чтение '
+        'на основную базу данных.'
+    )
+    await write(make_request('POST'))
+    bind = await get_session_bind(
+        db.get_async_read_session, make_request('GET')
+    )
+    assert bind is db.engine, (
+        'После записи клиент должен читать из основной базы данных.'
+    )
+    assert 'Bearer token' not in db._recent_writes, (
+        'Токен авторизации не должен храниться в открытом виде.'
+    )
+    bind = await get_session_bind(
+        db.get_async_read_session, make_request('GET', 'Bearer other')
+    )
+    assert bind is replica, (
+        'Запись одного клиента не должна влиять на чтение других клиентов.'
+    )
+
+
+async def test_metered_session_checkout():
+    session_factory = db.sessionmaker(
+        engine,
+        class_=db.AsyncSession,
+        sync_session_class=db.MeteredSession,
+        expire_on_commit=False,
+    )
+    checkouts_before = db.checkout_stats.count
+    async with session_factory() as session:
+        assert 'checkout_seconds' not in session.sync_session.info, (
+            'Сессия не должна брать соединение до первого запроса.'
+        )
+        project = CharityProject(
+            name='lazy', description='lazy', full_amount=10)
+        session.add(project)
+        await session.commit()
+        assert project.name == 'lazy', (
+            'После commit объекты не должны перезагружаться из базы.'
+        )
+        assert 'checkout_seconds' in session.sync_session.info, (
+            'Время получения соединения должно сохраняться в info сессии.'
+        )
+    assert db.checkout_stats.count == checkouts_before + 1, (
+        'Время получения соединения должно учитываться в checkout_stats.'
+    )
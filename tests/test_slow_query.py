@@ -0,0 +1,86 @@
+import logging
+from time import sleep
+
+import pytest
+from conftest import sync_engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core import db
+from app.core.config import settings
+
+
+@pytest.fixture
+def slow_query_log(monkeypatch, caplog):
+    monkeypatch.setattr(settings, 'slow_query_seconds', 1e-9)
+    monkeypatch.setattr(settings, 'slow_query_explain', True)
+    monkeypatch.setattr(db, 'slow_queries', {})
+    caplog.set_level(logging.WARNING, logger='app.core.db.slow_query')
+    return caplog
+
+
+def test_slow_query_logged_with_caller_and_plan(user_client, slow_query_log):
+    user_client.post('/donation/', json={'full_amount': 100})
+    response = user_client.get('/donation/my')
+    assert response.status_code == 200
+    records = [
+        record.getMessage() for record in slow_query_log.records
+        if 'donation.user_id = ?' in record.getMessage()
+    ]
+    assert records, 'Медленный запрос должен попадать в лог.'
+    message = records[0]
+    assert 'app.crud.donation.CRUDDonation.get_by_user' in message, (
+        'В логе должен быть указан метод CRUD, выполнивший запрос.'
+    )
+    assert 'Параметры: ' in message
+    assert 'План:' in message, (
+        'При slow_query_explain в лог должен попадать план запроса.'
+    )
+
+
+def test_slow_query_rate_limited(user_client, slow_query_log):
+    user_client.post('/donation/', json={'full_amount': 100})
+    for _ in range(3):
+        user_client.get('/donation/my')
+    statements = [
+        statement for statement in db.slow_queries
+        if 'donation.user_id = ?' in statement
+    ]
+    shape = db.slow_queries[statements[0]]
+    assert shape.count == 3
+    assert shape.suppressed == 2, (
+        'Повторы запроса в пределах slow_query_log_interval '
+        'не должны попадать в лог.'
+    )
+    logged = [
+        record for record in slow_query_log.records
+        if statements[0] in record.getMessage()
+    ]
+    assert len(logged) == 1
+
+
+def test_fast_queries_not_logged(user_client, caplog, monkeypatch):
+    monkeypatch.setattr(db, 'slow_queries', {})
+    caplog.set_level(logging.WARNING, logger='app.core.db.slow_query')
+    user_client.post('/donation/', json={'full_amount': 100})
+    user_client.get('/donation/my')
+    assert not db.slow_queries
+    assert not caplog.records
+
+
+def test_failed_query_not_carried_over(monkeypatch, caplog):
+    monkeypatch.setattr(settings, 'slow_query_seconds', 0.05)
+    monkeypatch.setattr(db, 'slow_queries', {})
+    caplog.set_level(logging.WARNING, logger='app.core.db.slow_query')
+    with sync_engine.connect() as connection:
+        with pytest.raises(DBAPIError):
+            connection.exec_driver_sql('SELECT * FROM missing_table')
+        sleep(0.1)
+        connection.exec_driver_sql('SELECT 1').all()
+        assert not connection.info.get('slow_query_start'), (
+            'Запрос с ошибкой не должен оставлять время начала '
+            'в соединении из пула.'
+        )
+    assert not db.slow_queries, (
+        'Быстрый запрос после запроса с ошибкой не должен считаться '
+        'медленным.'
+    )
@@ -0,0 +1,141 @@
+import pytest
+from conftest import (
+    TestingSessionLocal, app, current_user, engine, sync_engine)
+from fixtures.user import get_token, user
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.commands.fundstats import verify
+from app.commands.seed import SeedConfig, seed
+from app.models import CharityProject, FundStats
+
+
+@pytest.fixture
+def client(superuser_client):
+    """Клиент суперпользователя, который может и жертвовать."""
+    app.dependency_overrides[current_user] = lambda: user
+    return superuser_client
+
+
+def create_project(client, name, full_amount):
+    response = client.post('/charity_project/', json={
+        'name': name, 'description': 'Описание', 'full_amount': full_amount,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+def donate(client, full_amount):
+    response = client.post('/donation/', json={'full_amount': full_amount})
+    assert response.status_code == 200
+
+
+def test_empty_stats(superuser_client):
+    response = superuser_client.get('/stats/')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['projects'] == data['donations'] == data['raised_amount'] == 0
+    assert data['average_collection_seconds'] is None
+
+
+def test_stats_superuser_only(test_client, user_client):
+    for client in (test_client, user_client):
+        response = client.get('/stats/')
+        assert response.status_code == 401, (
+            'Сводка фонда должна быть доступна только суперюзерам.'
+        )
+    headers = {'Authorization': f'Bearer {get_token(user_client)}'}
+    response = user_client.get('/stats/', headers=headers)
+    assert response.status_code == 403, (
+        'Обычный пользователь не должен получать сводку фонда.'
+    )
+
+
+async def test_stats_follow_api_writes(client, query_counter):
+    create_project(client, 'Первый', 100)
+    create_project(client, 'Второй', 300)
+    # Пожертвование закрывает первый проект и попадает во второй,
+    # это один UPDATE распределенного объекта сверх 7 запросов создания.
+    with query_counter.max_queries(8):
+        donate(client, 150)
+    donate(client, 20)
+    data = client.get('/stats/').json()
+    assert {
+        name: data[name] for name in (
+            'projects', 'closed_projects', 'required_amount',
+            'remaining_amount', 'donations', 'closed_donations',
+            'raised_amount', 'invested_amount', 'waiting_amount',
+        )
+    } == {
+        'projects': 2, 'closed_projects': 1, 'required_amount': 400,
+        'remaining_amount': 230, 'donations': 2, 'closed_donations': 2,
+        'raised_amount': 170, 'invested_amount': 170, 'waiting_amount': 0,
+    }, 'Сводка должна меняться при создании проектов и пожертвований.'
+    assert data['average_collection_seconds'] is not None
+    assert await verify(TestingSessionLocal) == {}, (
+        'Сводка должна совпадать с пересчетом по таблицам.'
+    )
+
+
+async def test_stats_follow_update_and_delete(client):
+    project = create_project(client, 'Проект', 1000)
+    donate(client, 400)
+    client.patch(
+        f'/charity_project/{project["id"]}', json={'full_amount': 400}
+    )
+    data = client.get('/stats/').json()
+    assert data['closed_projects'] == 1
+    assert data['required_amount'] == 400
+    assert data['remaining_amount'] == 0
+    empty = create_project(client, 'Пустой', 500)
+    client.delete(f'/charity_project/{empty["id"]}')
+    data = client.get('/stats/').json()
+    assert data['projects'] == 1, 'Удаленный проект не должен учитываться.'
+    assert await verify(TestingSessionLocal) == {}
+
+
+async def test_stats_follow_orm_writes(charity_project, donation):
+    assert await verify(TestingSessionLocal) == {}, (
+        'Записи через ORM в обход API тоже должны менять сводку.'
+    )
+
+
+def test_stats_follow_unloaded_values():
+    with Session(sync_engine) as session:
+        project = CharityProject(name='Проект', description='Описание',
+                                 full_amount=100, invested_amount=0)
+        session.add(project)
+        session.commit()
+        # Разница параллельной транзакции не должна затираться.
+        with sync_engine.begin() as connection:
+            connection.execute(update(FundStats).values(
+                raised_amount=FundStats.raised_amount + 5))
+        session.expire(project, ['invested_amount'])
+        project.invested_amount = 30
+        session.commit()
+        stats = session.get(FundStats, 1)
+        session.refresh(stats)
+    assert stats.remaining_amount == 70, (
+        'Без загруженного прежнего значения сводка должна меняться '
+        'на разницу.'
+    )
+    assert stats.raised_amount == 5, (
+        'Запись через ORM не должна перезаписывать сводку целиком.'
+    )
+
+
+async def test_verify_fixes_stats():
+    with sync_engine.begin() as connection:
+        connection.execute(update(FundStats).values(raised_amount=5))
+    assert await verify(TestingSessionLocal) == {'raised_amount': (5, 0)}
+    await verify(TestingSessionLocal, fix=True)
+    assert await verify(TestingSessionLocal) == {}, (
+        'После --fix сводка должна совпадать с таблицами.'
+    )
+
+
+async def test_stats_after_seed():
+    await seed(engine, SeedConfig(users=2, projects=10, donations=40))
+    assert await verify(TestingSessionLocal) == {}, (
+        'Заполнение базы должно пересчитывать сводку фонда.'
+    )
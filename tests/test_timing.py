@@ -0,0 +1,76 @@
+from time import sleep
+
+import pytest
+from conftest import sync_engine
+from fixtures.user import get_token
+from sqlalchemy.exc import DBAPIError
+
+from app.core.timing import RequestTiming, current_timing, phase
+
+
+def server_timing(response):
+    metrics = {}
+    for metric in response.headers['server-timing'].split(', '):
+        name, _, value = metric.partition(';')
+        metrics[name] = value
+    return metrics
+
+
+def test_server_timing_header(user_client, charity_project):
+    response = user_client.post('/donation/', json={'full_amount': 100})
+    assert response.status_code == 200
+    metrics = server_timing(response)
+    for name in ('db', 'invest', 'endpoint', 'serialize', 'total'):
+        assert name in metrics, (
+            f'Заголовок Server-Timing должен содержать этап `{name}`.'
+        )
+    assert 'queries' in metrics['sql'], (
+        'Заголовок Server-Timing должен содержать количество SQL-запросов.'
+    )
+
+
+def test_auth_phase(test_client):
+    headers = {'Authorization': f'Bearer {get_token(test_client)}'}
+    response = test_client.get('/users/me', headers=headers)
+    assert response.status_code == 200
+    metrics = server_timing(response)
+    assert 'auth' in metrics, (
+        'Проверка токена должна учитываться как этап `auth`.'
+    )
+
+
+def test_nested_phase_counted_once():
+    with phase('outside'):
+        pass
+    timing = RequestTiming()
+    token = current_timing.set(timing)
+    try:
+        with phase('auth'):
+            with phase('auth'):
+                pass
+    finally:
+        current_timing.reset(token)
+    assert list(timing.phases) == ['auth'], (
+        'Вложенный замер этапа не должен учитываться повторно.'
+    )
+
+
+def test_failed_query_not_carried_over():
+    timing = RequestTiming()
+    token = current_timing.set(timing)
+    try:
+        with sync_engine.connect() as connection:
+            with pytest.raises(DBAPIError):
+                connection.exec_driver_sql('SELECT * FROM missing_table')
+            sleep(0.1)
+            connection.exec_driver_sql('SELECT 1').all()
+            assert not connection.info.get('query_start'), (
+                'Запрос с ошибкой не должен оставлять время начала '
+                'в соединении из пула.'
+            )
+    finally:
+        current_timing.reset(token)
+    assert timing.queries == 1 and timing.phases['db'] < 0.1, (
+        'Длительность запроса после запроса с ошибкой должна '
+        'считаться от его собственного начала.'
+    )
@@ -0,0 +1,61 @@
+from fixtures.user import get_token
+
+from app.core import user as user_module
+from app.core.user import ClaimsJWTStrategy, user_cache
+from app.models import User
+
+
+def test_user_cached_and_invalidated(test_client):
+    user_cache.clear()
+    headers = {'Authorization': f'Bearer {get_token(test_client)}'}
+    response = test_client.get('/users/me', headers=headers)
+    assert response.status_code == 200, (
+        'Авторизованный пользователь должен получать свои данные.'
+    )
+    user_id = response.json()['id']
+    assert user_id in user_cache, (
+        'После авторизации запись пользователя должна попасть в кэш.'
+    )
+    response = test_client.patch(
+        '/users/me', headers=headers, json={'email': 'wade@pool.com'}
+    )
+    assert response.status_code == 200
+    assert user_id not in user_cache, (
+        'После изменения пользователя запись должна удаляться из кэша.'
+    )
+    response = test_client.get('/users/me', headers=headers)
+    assert response.json()['email'] == 'wade@pool.com', (
+        'После сброса кэша должны возвращаться актуальные данные.'
+    )
+    response = test_client.get('/users/me', headers=headers)
+    assert response.json()['email'] == 'wade@pool.com', (
+        'Пользователь из кэша должен совпадать с записью в базе данных.'
+    )
+
+
+async def test_signed_claims_strategy(monkeypatch):
+    strategy = ClaimsJWTStrategy(secret='SECRET', lifetime_seconds=60)
+    token = await strategy.write_token(User(
+        id=7,
+        email='dead@pool.com',
+        is_active=True,
+        is_superuser=True,
+        is_verified=False,
+    ))
+
+    class UserManager:
+        parse_id = user_module.UserManager.parse_id
+
+        async def get(self, id):
+            raise AssertionError(
+                'При подписанных claims пользователь не должен '
+                'загружаться из базы данных.'
+            )
+
+    user = await strategy.read_token(token, UserManager())
+    assert user.id == 7 and user.is_superuser and user.is_active, (
+        'Статус пользователя должен читаться из подписанного токена.'
+    )
+    assert await strategy.read_token('broken', UserManager()) is None, (
+        'Некорректный токен не должен авторизовывать пользователя.'
+    )